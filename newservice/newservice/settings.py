@@ -94,6 +94,22 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Em produção com vários workers, usar um backend partilhado, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://127.0.0.1:6379/1
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -155,7 +171,7 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "service.middleware.IsAll",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "service.pagination.CursorModePagination",
     "PAGE_SIZE": 20,
 }
 
@@ -163,12 +179,120 @@ REST_FRAMEWORK = {
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+# Pool HTTP dos clients Supabase partilhados (um por processo e por chave)
+SUPABASE_HTTP_MAX_CONNECTIONS = int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", "20"))
+SUPABASE_HTTP_MAX_KEEPALIVE = int(os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE", "10"))
+SUPABASE_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_HTTP_KEEPALIVE_EXPIRY", "30"))  # segundos
+SUPABASE_HTTP_TIMEOUT = float(os.getenv("SUPABASE_HTTP_TIMEOUT", "20"))  # segundos
+SUPABASE_HTTP_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_HTTP_CONNECT_TIMEOUT", "5"))
+# Autenticação no UserHeaderMiddleware: "header" (X-User-ID), "jwt"
+# (Authorization: Bearer, verificado localmente) ou "both"
+AUTH_MODE = os.getenv("AUTH_MODE", "header")
+# Chaves para verificação offline do JWT: segredo HS256 do projeto e/ou
+# ficheiro JWKS local (chaves assimétricas, escolhidas pelo "kid")
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWKS_FILE = os.getenv("SUPABASE_JWKS_FILE")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+SUPABASE_JWT_ISSUER = os.getenv("SUPABASE_JWT_ISSUER")
+SUPABASE_JWT_LEEWAY = int(os.getenv("SUPABASE_JWT_LEEWAY", "0"))  # segundos
+# claim com o tipo de utilizador (0/1/2); aceita caminhos como "app_metadata.tipo".
+# Se o token não o tiver, a role é resolvida pelo backend de roles.
+SUPABASE_JWT_ROLE_CLAIM = os.getenv("SUPABASE_JWT_ROLE_CLAIM", "user_role")
+# Backend de resolução de roles: "orm" (tabela utilizador via Django ORM,
+# com fallback para o Supabase) ou "supabase" (PostgREST)
+ROLE_BACKEND = os.getenv("ROLE_BACKEND", "supabase")
+# Cache de roles do UserHeaderMiddleware (por processo)
+ROLE_CACHE_TTL = int(os.getenv("ROLE_CACHE_TTL", "300"))  # segundos
+ROLE_CACHE_MAX_SIZE = int(os.getenv("ROLE_CACHE_MAX_SIZE", "10000"))
+# Cache negativa de X-User-ID inexistentes (TTL curto)
+ROLE_NEGATIVE_CACHE_TTL = int(os.getenv("ROLE_NEGATIVE_CACHE_TTL", "30"))
+ROLE_NEGATIVE_CACHE_MAX_SIZE = int(os.getenv("ROLE_NEGATIVE_CACHE_MAX_SIZE", "10000"))
+# Filtro de Bloom de ids de utilizador (rejeita ids desconhecidos em memória).
+# Utilizadores criados entre rebuilds só são aceites após o próximo rebuild.
+ROLE_BLOOM_FILTER_ENABLED = os.getenv("ROLE_BLOOM_FILTER_ENABLED", "False").lower() in ("true", "1", "yes")
+ROLE_BLOOM_FILTER_REFRESH = int(os.getenv("ROLE_BLOOM_FILTER_REFRESH", "60"))  # segundos
+ROLE_BLOOM_FILTER_ERROR_RATE = float(os.getenv("ROLE_BLOOM_FILTER_ERROR_RATE", "0.01"))
+# Cache de roles partilhada entre workers (usa CACHES[ROLE_SHARED_CACHE_ALIAS])
+ROLE_SHARED_CACHE_ENABLED = os.getenv("ROLE_SHARED_CACHE_ENABLED", "False").lower() in ("true", "1", "yes")
+ROLE_SHARED_CACHE_ALIAS = os.getenv("ROLE_SHARED_CACHE_ALIAS", "default")
+# incrementar para invalidar todas as roles em cache
+ROLE_SHARED_CACHE_VERSION = int(os.getenv("ROLE_SHARED_CACHE_VERSION", "1"))
+ROLE_SHARED_CACHE_FRESH_TTL = int(os.getenv("ROLE_SHARED_CACHE_FRESH_TTL", "300"))
+# janela stale-while-revalidate após FRESH_TTL
+ROLE_SHARED_CACHE_STALE_TTL = int(os.getenv("ROLE_SHARED_CACHE_STALE_TTL", "3600"))
+# retenção da última role conhecida (fallback se o Supabase falhar)
+ROLE_SHARED_CACHE_LAST_KNOWN_TTL = int(os.getenv("ROLE_SHARED_CACHE_LAST_KNOWN_TTL", "604800"))
 # file configuration
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 ALLOWED_MIME = "application/pdf"
+# validade (s) do upload_token do upload direto ao storage; os URLs de
+# upload assinados do Supabase expiram ao fim de 2 horas
+CV_UPLOAD_URL_MAX_AGE = int(os.getenv("CV_UPLOAD_URL_MAX_AGE", "7200"))
+# URLs assinadas de CVs: validade e reutilização em cache enquanto
+# restarem mais de SIGNED_URL_CACHE_MARGIN segundos
+SIGNED_URL_EXPIRATION = int(os.getenv("SIGNED_URL_EXPIRATION", "900"))
+SIGNED_URL_CACHE_MARGIN = int(os.getenv("SIGNED_URL_CACHE_MARGIN", "300"))
+SIGNED_URL_CACHE_MAX_SIZE = int(os.getenv("SIGNED_URL_CACHE_MAX_SIZE", "5000"))
+# Modo spool de POST /curriculo/me/: o PDF é guardado localmente, o pedido
+# responde 202 e um worker em background envia-o para o storage
+CV_UPLOAD_SPOOL_ENABLED = os.getenv("CV_UPLOAD_SPOOL_ENABLED", "False").lower() in ("true", "1", "yes")
+CV_UPLOAD_SPOOL_DIR = os.getenv("CV_UPLOAD_SPOOL_DIR", str(BASE_DIR / "spool" / "cvs"))
+CV_UPLOAD_SPOOL_WORKERS = int(os.getenv("CV_UPLOAD_SPOOL_WORKERS", "2"))
+CV_UPLOAD_MAX_ATTEMPTS = int(os.getenv("CV_UPLOAD_MAX_ATTEMPTS", "5"))
+CV_UPLOAD_RETRY_BACKOFF = float(os.getenv("CV_UPLOAD_RETRY_BACKOFF", "2"))  # segundos (exponencial)
+# Outbox de remoções no storage (service/services/storage_outbox.py)
+STORAGE_OUTBOX_WORKER_ENABLED = os.getenv("STORAGE_OUTBOX_WORKER_ENABLED", "True").lower() in ("true", "1", "yes")
+STORAGE_OUTBOX_BATCH_SIZE = int(os.getenv("STORAGE_OUTBOX_BATCH_SIZE", "100"))
+STORAGE_OUTBOX_POLL_INTERVAL = int(os.getenv("STORAGE_OUTBOX_POLL_INTERVAL", "30"))  # segundos
+STORAGE_OUTBOX_RETRY_BACKOFF = int(os.getenv("STORAGE_OUTBOX_RETRY_BACKOFF", "5"))  # segundos (exponencial)
+STORAGE_OUTBOX_MAX_BACKOFF = int(os.getenv("STORAGE_OUTBOX_MAX_BACKOFF", "3600"))
+# Extração de texto dos CVs para pesquisa full-text (?q= em /curriculo/)
+CV_TEXT_EXTRACTION_ENABLED = os.getenv("CV_TEXT_EXTRACTION_ENABLED", "True").lower() in ("true", "1", "yes")
+CV_TEXT_EXTRACTION_WORKERS = int(os.getenv("CV_TEXT_EXTRACTION_WORKERS", "2"))  # processos
+CV_TEXT_EXTRACTION_TIMEOUT = int(os.getenv("CV_TEXT_EXTRACTION_TIMEOUT", "60"))  # segundos por CV
+CV_TEXT_MAX_PAGES = int(os.getenv("CV_TEXT_MAX_PAGES", "20"))
+# largura (px) da pré-visualização da primeira página; 0 desativa
+CV_THUMBNAIL_WIDTH = int(os.getenv("CV_THUMBNAIL_WIDTH", "320"))
+CV_THUMBNAIL_MAX_AGE = int(os.getenv("CV_THUMBNAIL_MAX_AGE", str(30 * 24 * 3600)))  # segundos
+# reescreve os PDFs linearizados no storage (primeira página com poucos KB; requer pikepdf)
+CV_LINEARIZE_ENABLED = os.getenv("CV_LINEARIZE_ENABLED", "False").lower() in ("true", "1", "yes")
+# configuração de text search do Postgres (alterar exige reindexar: index_cv_text --all)
+CV_SEARCH_CONFIG = os.getenv("CV_SEARCH_CONFIG", "portuguese")
+# Auditoria de acessos a CVs (service/services/access_log_writer.py):
+# "sync" (INSERT por pedido, default), "durable" (lotes + journal em disco) ou
+# "buffered" (lotes só em memória: um crash/SIGKILL do worker perde os acessos
+# ainda não escritos, até CV_ACCESS_LOG_BATCH_SIZE ou CV_ACCESS_LOG_FLUSH_INTERVAL
+# segundos de acessos por processo)
+CV_ACCESS_LOG_MODE = os.getenv("CV_ACCESS_LOG_MODE", "sync")
+CV_ACCESS_LOG_BATCH_SIZE = int(os.getenv("CV_ACCESS_LOG_BATCH_SIZE", "500"))
+CV_ACCESS_LOG_FLUSH_INTERVAL = float(os.getenv("CV_ACCESS_LOG_FLUSH_INTERVAL", "1"))  # segundos
+CV_ACCESS_LOG_JOURNAL_DIR = os.getenv("CV_ACCESS_LOG_JOURNAL_DIR", str(BASE_DIR / "spool" / "access_log"))
+# partições mensais de cv_access_log: `manage.py access_log_partitions` tem de
+# correr por cron (e.g. diário); a migração só cria 3 meses à frente e, sem
+# partição, o access_log_writer cria a do mês no INSERT (com aviso no log)
+CV_ACCESS_LOG_PARTITIONS_AHEAD = int(os.getenv("CV_ACCESS_LOG_PARTITIONS_AHEAD", "3"))  # meses
+CV_ACCESS_LOG_RETENTION_MONTHS = int(os.getenv("CV_ACCESS_LOG_RETENTION_MONTHS", "12"))  # 0 = sem remoção
 # Site URL (used in email templates)
 SITE_URL = os.getenv("SITE_URL", "http://localhost:8000")
 
+# ── Storage ──────────────────────────────────────────────────────────────
+# "supabase" (Supabase Storage), "local" (disco local com URLs assinadas)
+# ou caminho de uma subclasse de service.services.storage_service.StorageService
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase")
+LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT", str(BASE_DIR / "storage"))
+LOCAL_STORAGE_BASE_URL = os.getenv("LOCAL_STORAGE_BASE_URL", f"{SITE_URL}/service/files")
+# chave HMAC dos URLs assinados (por omissão SECRET_KEY)
+LOCAL_STORAGE_SIGNING_KEY = os.getenv("LOCAL_STORAGE_SIGNING_KEY", "")
+LOCAL_STORAGE_MAX_UPLOAD_SIZE = int(os.getenv("LOCAL_STORAGE_MAX_UPLOAD_SIZE", str(MAX_FILE_SIZE)))
+# delegar o envio ao proxy (e.g. "X-Accel-Redirect" no nginx, "X-Sendfile" no Apache);
+# com PREFIX o header recebe PREFIX/<bucket>/<caminho>, caso contrário o caminho absoluto
+LOCAL_STORAGE_SENDFILE_HEADER = os.getenv("LOCAL_STORAGE_SENDFILE_HEADER", "")
+LOCAL_STORAGE_SENDFILE_PREFIX = os.getenv("LOCAL_STORAGE_SENDFILE_PREFIX", "")
+# cache local em disco dos PDFs servidos por GET /curriculo/{id}/file/ (service/services/cv_file_cache.py)
+CV_FILE_CACHE_ENABLED = os.getenv("CV_FILE_CACHE_ENABLED", "False").lower() in ("true", "1", "yes")
+CV_FILE_CACHE_DIR = os.getenv("CV_FILE_CACHE_DIR", str(BASE_DIR / "cache" / "cvs"))
+CV_FILE_CACHE_MAX_SIZE = int(os.getenv("CV_FILE_CACHE_MAX_SIZE", str(1024 * 1024 * 1024)))  # bytes
+
 # ── Email Configuration ──────────────────────────────────────────────────
 # Em DEBUG usa o backend de consola; em produção usa SMTP real.
 # Para forçar SMTP em DEBUG (testes reais), definir EMAIL_FORCE_SMTP=True.
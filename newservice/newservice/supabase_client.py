@@ -1,43 +1,128 @@
 """
 Supabase Client Helper
-Fornece uma instância configurada do Supabase client para uso em todo o projeto.
+Fornece instâncias configuradas do Supabase client para uso em todo o projeto.
+
+Os clients são partilhados por processo (um por tipo de chave: anon e
+service role) e reutilizam um ``httpx.Client`` com pool de ligações
+keep-alive, evitando novos handshakes TLS em cada pedido. Após um fork
+(e.g. gunicorn com preload) o processo filho cria os seus próprios clients.
 """
-from supabase import create_client, Client
+import os
+import threading
+
+import httpx
+from supabase import create_client, Client, ClientOptions
 from django.conf import settings
 
+ANON = "anon"
+SERVICE = "service"
+
+_lock = threading.Lock()
+_clients: dict[str, Client] = {}
+_http_clients: dict[str, httpx.Client] = {}
+
+
+def _reset_after_fork() -> None:
+    # Não fechar: os sockets pertencem ao processo pai.
+    global _lock
+    _lock = threading.Lock()
+    _clients.clear()
+    _http_clients.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
-def get_supabase_client() -> Client:
+
+def _build_http_client() -> httpx.Client:
+    """Cria o ``httpx.Client`` com os limites de pool e timeouts das settings."""
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=getattr(settings, "SUPABASE_HTTP_MAX_CONNECTIONS", 20),
+            max_keepalive_connections=getattr(settings, "SUPABASE_HTTP_MAX_KEEPALIVE", 10),
+            keepalive_expiry=getattr(settings, "SUPABASE_HTTP_KEEPALIVE_EXPIRY", 30),
+        ),
+        timeout=httpx.Timeout(
+            getattr(settings, "SUPABASE_HTTP_TIMEOUT", 20),
+            connect=getattr(settings, "SUPABASE_HTTP_CONNECT_TIMEOUT", 5),
+        ),
+        follow_redirects=True,
+    )
+
+
+def _get_key(kind: str) -> str:
+    if kind == SERVICE:
+        return settings.SUPABASE_SERVICE_KEY
+    return settings.SUPABASE_KEY
+
+
+def get_supabase_client(kind: str = ANON) -> Client:
     """
-    Retorna uma instância autenticada do Supabase client.
-    
+    Retorna o Supabase client partilhado do processo para ``kind``.
+
+    Args:
+        kind (str): ``ANON`` (SUPABASE_KEY) ou ``SERVICE`` (SUPABASE_SERVICE_KEY).
+
     Returns:
-        Client: Instância do Supabase client configurada.
-    
+        Client: Instância do Supabase client.
+
     Raises:
-        ValueError: Se as variáveis SUPABASE_URL ou SUPABASE_KEY não estiverem configuradas.
+        ValueError: Se SUPABASE_URL ou a chave correspondente não estiverem configuradas.
     """
+    client = _clients.get(kind)
+    if client is not None:
+        return client
+
     url = settings.SUPABASE_URL
-    key = settings.SUPABASE_KEY
-    
+    key = _get_key(kind)
+
     if not url or not key:
         raise ValueError(
-            "SUPABASE_URL e SUPABASE_KEY devem estar configurados no arquivo .env"
+            "SUPABASE_URL e SUPABASE_KEY/SUPABASE_SERVICE_KEY devem estar configurados no arquivo .env"
         )
-    
-    return create_client(url, key)
+
+    with _lock:
+        client = _clients.get(kind)
+        if client is None:
+            http_client = _build_http_client()
+            client = create_client(
+                url,
+                key,
+                options=ClientOptions(
+                    httpx_client=http_client,
+                    # clients partilhados entre pedidos: sem sessão de utilizador
+                    auto_refresh_token=False,
+                    persist_session=False,
+                ),
+            )
+            _http_clients[kind] = http_client
+            _clients[kind] = client
+    return client
+
+
+def get_anon_client() -> Client:
+    """Client partilhado com a chave anon (PostgREST sujeito a RLS)."""
+    return get_supabase_client(ANON)
 
 
-# Instância global reutilizável (opcional - use com cuidado em ambientes assíncronos)
-supabase: Client = None
+def get_service_client() -> Client:
+    """Client partilhado com a service role key (Storage e Auth Admin API)."""
+    return get_supabase_client(SERVICE)
+
 
 def get_or_create_supabase_client() -> Client:
     """
-    Retorna a instância global do Supabase client ou cria uma nova se não existir.
-    
-    Returns:
-        Client: Instância do Supabase client.
+    Retorna a instância global do Supabase client (anon).
+
+    Mantido por compatibilidade; equivalente a ``get_anon_client()``.
     """
-    global supabase
-    if supabase is None:
-        supabase = get_supabase_client()
-    return supabase
+    return get_anon_client()
+
+
+def close_supabase_clients() -> None:
+    """Fecha os pools de ligações e descarta os clients do processo."""
+    with _lock:
+        for http_client in _http_clients.values():
+            http_client.close()
+        _http_clients.clear()
+        _clients.clear()
@@ -1,6 +1,8 @@
 import django_filters
-from django.db.models import Q
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Q
 from .models import Estudante, AreaEstudante, Area, Curriculo, Notification
+from service.services.cv_text import search_config
 
 
 class NotificationFilterSet(django_filters.FilterSet):
@@ -168,6 +170,7 @@ class CurriculoFilterSet(django_filters.FilterSet):
     - estudante_ano_max: Ano de faculdade máximo (<=)
     - estudante_area: ID da área do estudante
     - estudante_area_nome: Nome da área do estudante (case-insensitive, contém)
+    - q: Pesquisa no texto do CV (sintaxe websearch; resultados ordenados por relevância)
     """
     
     # Filtro para status - exact
@@ -234,10 +237,32 @@ class CurriculoFilterSet(django_filters.FilterSet):
         label='Nome da área do estudante (case-insensitive, contém)'
     )
     
+    # Pesquisa full-text no conteúdo do CV (índice GIN em curriculo_search)
+    q = django_filters.CharFilter(
+        method='filter_by_text',
+        label='Pesquisa no texto do CV'
+    )
+    
     class Meta:
         model = Curriculo
         fields = []  # Não usamos os fields padrão, apenas os customizados
     
+    def filter_by_text(self, queryset, name, value):
+        """
+        Filtra currículos cujo texto corresponde à pesquisa, ordenados por relevância.
+        
+        Aceita a sintaxe websearch do Postgres (e.g. "python -java", "\"machine learning\"").
+        """
+        value = value.strip()
+        if not value:
+            return queryset
+        query = SearchQuery(value, config=search_config(), search_type='websearch')
+        return queryset.filter(
+            search_document__search_vector=query
+        ).annotate(
+            search_rank=SearchRank(F('search_document__search_vector'), query)
+        ).order_by('-search_rank', '-id')
+    
     def filter_by_estudante_area_id(self, queryset, name, value):
         """
         Filtra currículos de estudantes que têm a área com ID específico.
@@ -0,0 +1,60 @@
+"""
+Geração de UUIDv7 (RFC 9562) para chaves primárias de tabelas append-only.
+
+Um UUIDv7 começa pelo timestamp Unix em milissegundos, por isso ids gerados
+em sequência ficam ordenados no tempo e as inserções acrescentam ao fim do
+índice B-tree da chave primária (ao contrário do uuid4, que insere em
+posições aleatórias e provoca page splits e inchaço do índice).
+
+Dentro do mesmo milissegundo os 12 bits ``rand_a`` funcionam como contador
+(método 1 da RFC), pelo que os ids de um processo são estritamente
+crescentes. Os restantes 62 bits são aleatórios.
+"""
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+_COUNTER_MAX = 0xFFF
+_RAND_B_MASK = (1 << 62) - 1
+
+
+def _reset_after_fork() -> None:
+    global _lock
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def uuid7() -> uuid.UUID:
+    """UUID versão 7, crescente dentro do processo."""
+    global _last_ms, _counter
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            # começa na metade inferior para deixar margem ao contador
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            _counter += 1
+            if _counter > _COUNTER_MAX:
+                # contador esgotado: avança o timestamp lógico
+                _last_ms += 1
+                _counter = 0
+        timestamp, counter = _last_ms, _counter
+
+    rand_b = int.from_bytes(os.urandom(8), "big") & _RAND_B_MASK
+    value = (
+        (timestamp & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | counter << 64
+        | 0b10 << 62
+        | rand_b
+    )
+    return uuid.UUID(int=value)
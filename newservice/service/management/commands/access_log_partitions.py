@@ -0,0 +1,80 @@
+"""
+comando para gerir as partições mensais de cv_access_log.
+
+cria as partições do mês atual e dos próximos meses e remove as que ficaram
+fora do período de retenção (DETACH + DROP, sem DELETE). com --archive-dir
+cada partição é exportada para CSV (gzip) antes de ser removida.
+
+deve ser agendado (e.g. cron diário): a migração 0010 só cria partições até
+CV_ACCESS_LOG_PARTITIONS_AHEAD meses à frente e não há partição DEFAULT.
+
+Uso:
+    python manage.py access_log_partitions
+    python manage.py access_log_partitions --retention-months 24 --archive-dir /backups/cv_access_log
+    python manage.py access_log_partitions --dry-run
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from service.services.access_log_partitions import (
+    archive_partition,
+    drop_partition,
+    ensure_partitions,
+    expired_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = "Cria partições futuras de cv_access_log e remove/arquiva as expiradas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=None,
+            help="Meses futuros com partição (default: CV_ACCESS_LOG_PARTITIONS_AHEAD).",
+        )
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            default=None,
+            help="Meses completos mantidos além do atual (default: CV_ACCESS_LOG_RETENTION_MONTHS; 0 não remove).",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            default=None,
+            help="Exportar cada partição expirada para <dir>/<partição>.csv.gz antes de a remover.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Apenas mostrar o que seria criado/removido.",
+        )
+
+    def handle(self, *args, **options):
+        months_ahead = options["months_ahead"]
+        if months_ahead is None:
+            months_ahead = settings.CV_ACCESS_LOG_PARTITIONS_AHEAD
+        retention = options["retention_months"]
+        if retention is None:
+            retention = settings.CV_ACCESS_LOG_RETENTION_MONTHS
+        dry_run = options["dry_run"]
+
+        for name in ensure_partitions(months_ahead, dry_run=dry_run):
+            self.stdout.write(f"  criada: {name}")
+
+        expired = expired_partitions(retention) if retention > 0 else []
+        for name in expired:
+            if dry_run:
+                self.stdout.write(f"  a remover: {name}")
+                continue
+            if options["archive_dir"]:
+                path = archive_partition(name, options["archive_dir"])
+                self.stdout.write(f"  arquivada: {name} -> {path}")
+            drop_partition(name)
+            self.stdout.write(f"  removida: {name}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Partições expiradas {'por remover' if dry_run else 'removidas'}: {len(expired)}"
+        ))
@@ -0,0 +1,71 @@
+"""
+comando para medir o desempenho do backend de storage configurado.
+
+executa N uploads, stats, signed URLs (individuais e em lote) e remoções
+de um PDF sintético e mostra a latência média e o p95 de cada operação.
+Usa um prefixo próprio no bucket e remove os ficheiros no fim.
+
+Uso:
+    python manage.py benchmark_storage
+    python manage.py benchmark_storage --backend local --iterations 200 --size 1048576
+"""
+
+import statistics
+import time
+import uuid
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from service.services.storage_service import get_storage_service
+
+
+class Command(BaseCommand):
+    help = "Mede a latência das operações do backend de storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backend", default=None, help="Backend a testar (default: STORAGE_BACKEND).")
+        parser.add_argument("--bucket", default="cvs", help="Bucket a usar (default: cvs).")
+        parser.add_argument("--iterations", type=int, default=50, help="Número de ficheiros (default: 50).")
+        parser.add_argument("--size", type=int, default=256 * 1024, help="Tamanho do PDF em bytes (default: 256KB).")
+
+    def handle(self, *args, **options):
+        if options["backend"]:
+            with override_settings(STORAGE_BACKEND=options["backend"]):
+                storage = get_storage_service()
+        else:
+            storage = get_storage_service()
+
+        bucket = options["bucket"]
+        iterations = options["iterations"]
+        content = b"%PDF-1.4\n" + b"0" * max(0, options["size"] - 9)
+        prefix = f"benchmark_{uuid.uuid4().hex[:8]}"
+        paths = [f"{prefix}/cv_{i}.pdf" for i in range(iterations)]
+        timings = {}
+
+        def measure(name, fn, *fn_args):
+            start = time.perf_counter()
+            fn(*fn_args)
+            timings.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(f"Backend: {type(storage).__name__}, bucket: {bucket}, {iterations} x {len(content)} bytes\n")
+
+        try:
+            for path in paths:
+                upload = SimpleUploadedFile("cv.pdf", content, content_type="application/pdf")
+                measure("upload", storage.upload_file, upload, bucket, path)
+            for path in paths:
+                measure("stat", storage.get_file_info, bucket, path)
+            for path in paths:
+                measure("signed_url", storage.get_signed_url, bucket, path)
+            measure("signed_urls (lote)", storage.get_signed_urls, bucket, paths)
+        finally:
+            measure("delete_files (lote)", storage.delete_files, bucket, paths)
+
+        for name, values in timings.items():
+            values.sort()
+            p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+            self.stdout.write(
+                f"{name:<22} n={len(values):<5} média={statistics.mean(values):8.2f} ms  p95={p95:8.2f} ms"
+            )
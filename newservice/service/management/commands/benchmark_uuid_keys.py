@@ -0,0 +1,94 @@
+"""
+comando para comparar chaves primárias uuid4 e UUIDv7 no Postgres.
+
+cria duas tabelas temporárias com a forma de cv_access_log (PK uuid), insere
+em cada uma N linhas em lotes, com ids uuid4 e uuid7 respetivamente, e mostra
+o débito de inserção e o tamanho final da tabela e do índice da PK.
+As tabelas são TEMP e desaparecem no fim da sessão.
+
+Uso:
+    python manage.py benchmark_uuid_keys
+    python manage.py benchmark_uuid_keys --rows 5000000 --batch-size 20000
+"""
+
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from psycopg2.extras import execute_values
+
+from service.ids import uuid7
+
+GENERATORS = {
+    "uuid4": uuid.uuid4,
+    "uuid7": uuid7,
+}
+
+
+class Command(BaseCommand):
+    help = "Compara débito de inserção e tamanho do índice da PK entre uuid4 e UUIDv7."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Linhas por tabela (default: 1000000).")
+        parser.add_argument("--batch-size", type=int, default=10_000, help="Linhas por INSERT (default: 10000).")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Este benchmark requer PostgreSQL.")
+
+        rows = options["rows"]
+        batch_size = options["batch_size"]
+        user_id = uuid.uuid4()
+        results = {}
+
+        self.stdout.write(f"{rows} linhas por tabela, lotes de {batch_size}\n")
+
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            for name, generate in GENERATORS.items():
+                table = f"benchmark_keys_{name}"
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+                cursor.execute(
+                    f"CREATE TEMP TABLE {table} ("
+                    " id uuid PRIMARY KEY,"
+                    " curriculo_id bigint NOT NULL,"
+                    " accessed_by_user_id uuid NOT NULL,"
+                    " accessed_at timestamptz NOT NULL DEFAULT now()"
+                    ")"
+                )
+
+                elapsed = 0.0
+                for offset in range(0, rows, batch_size):
+                    count = min(batch_size, rows - offset)
+                    # ids gerados fora da medição: compara-se o custo no índice
+                    batch = [(str(generate()), offset + i, str(user_id)) for i in range(count)]
+                    start = time.perf_counter()
+                    execute_values(
+                        raw,
+                        f"INSERT INTO {table} (id, curriculo_id, accessed_by_user_id) VALUES %s",
+                        batch,
+                        page_size=count,
+                    )
+                    elapsed += time.perf_counter() - start
+
+                cursor.execute(
+                    "SELECT pg_relation_size(%s), pg_relation_size(%s)",
+                    [table, f"{table}_pkey"],
+                )
+                table_size, index_size = cursor.fetchone()
+                cursor.execute(f"DROP TABLE {table}")
+                results[name] = (rows / elapsed if elapsed else 0.0, table_size, index_size)
+
+        self.stdout.write(f"{'chave':<8}{'linhas/s':>12}{'tabela MB':>12}{'índice PK MB':>15}")
+        for name, (rate, table_size, index_size) in results.items():
+            self.stdout.write(
+                f"{name:<8}{rate:>12.0f}{table_size / 2**20:>12.1f}{index_size / 2**20:>15.1f}"
+            )
+
+        rate4, _, index4 = results["uuid4"]
+        rate7, _, index7 = results["uuid7"]
+        if rate4 and index7:
+            self.stdout.write(self.style.SUCCESS(
+                f"\nuuid7 vs uuid4: {rate7 / rate4:.2f}x débito, índice {index4 / index7:.2f}x mais pequeno"
+            ))
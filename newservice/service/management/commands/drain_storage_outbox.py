@@ -0,0 +1,36 @@
+"""
+comando para processar a outbox de remoções no storage.
+
+remove do storage, em lotes, os ficheiros registados em StorageDeletion
+cujo próximo retry já venceu.
+
+Uso:
+    python manage.py drain_storage_outbox
+    python manage.py drain_storage_outbox --batch-size 500
+"""
+
+from django.core.management.base import BaseCommand
+
+from service.models import StorageDeletion
+from service.services.storage_outbox import drain
+
+
+class Command(BaseCommand):
+    help = "Remove do storage os ficheiros pendentes na outbox de remoções."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Caminhos por pedido remove() (default: STORAGE_OUTBOX_BATCH_SIZE).",
+        )
+
+    def handle(self, *args, **options):
+        removed, failed = drain(options["batch_size"])
+        pending = StorageDeletion.objects.count()
+
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(
+            f"Removidos: {removed}, reagendados: {failed}, pendentes: {pending}"
+        ))
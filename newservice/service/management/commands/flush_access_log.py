@@ -0,0 +1,24 @@
+"""
+comando para reenviar os journals pendentes da auditoria de acessos.
+
+insere em CVAccessLog os acessos guardados em CV_ACCESS_LOG_JOURNAL_DIR por
+lotes que falharam ou por processos que terminaram sem flush (modo durable).
+Reenviar é idempotente: entradas já inseridas são ignoradas.
+
+Uso:
+    python manage.py flush_access_log
+"""
+
+from django.core.management.base import BaseCommand
+
+from service.services.access_log_writer import replay_journals
+
+
+class Command(BaseCommand):
+    help = "Reenvia para CVAccessLog os acessos pendentes nos journals em disco."
+
+    def handle(self, *args, **options):
+        inserted, failed = replay_journals()
+
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(f"Acessos reenviados: {inserted}, journals falhados: {failed}"))
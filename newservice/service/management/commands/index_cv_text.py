@@ -0,0 +1,62 @@
+"""
+comando para indexar o texto dos CVs (pesquisa ?q= em /curriculo/) e gerar
+as pré-visualizações.
+
+processa os PDFs ainda sem CVSearchDocument ou CVPreview (ou todos, com --all);
+com CV_LINEARIZE_ENABLED inclui também os PDFs ainda não linearizados.
+Necessário para CVs submetidos antes do pipeline pós-upload ou após alterar
+CV_SEARCH_CONFIG / CV_THUMBNAIL_WIDTH / CV_LINEARIZE_ENABLED.
+
+Uso:
+    python manage.py index_cv_text
+    python manage.py index_cv_text --all --status 1
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from service.models import Curriculo
+from service.services.cv_text import index_curriculo
+
+
+class Command(BaseCommand):
+    help = "Extrai o texto dos CVs e atualiza o índice de pesquisa."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Reprocessar todos os CVs (e não apenas os que não têm texto/pré-visualização).",
+        )
+        parser.add_argument(
+            "--status",
+            type=int,
+            default=None,
+            help="Apenas CVs com este status (0=pendente, 1=aprovado, 2=rejeitado).",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Curriculo.objects.exclude(file__isnull=True).exclude(file="")
+        if not options["all"]:
+            pending = Q(search_document__isnull=True) | Q(preview__isnull=True)
+            if getattr(settings, "CV_LINEARIZE_ENABLED", False):
+                pending |= Q(preview__linearized=False)
+            queryset = queryset.filter(pending)
+        if options["status"] is not None:
+            queryset = queryset.filter(status=options["status"])
+
+        curriculo_ids = list(queryset.order_by("id").values_list("id", flat=True))
+        self.stdout.write(f"{len(curriculo_ids)} CV(s) por indexar")
+
+        indexed = failed = 0
+        for curriculo_id in curriculo_ids:
+            try:
+                if index_curriculo(curriculo_id):
+                    indexed += 1
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f"  curriculo {curriculo_id}: {e}"))
+
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(f"Indexados: {indexed}, falhados: {failed}"))
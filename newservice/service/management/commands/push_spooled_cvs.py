@@ -0,0 +1,50 @@
+"""
+comando para retomar o envio de CVs que ficaram no spool.
+
+envia para o storage os CVUpload em estado "uploading" (e.g. o processo
+reiniciou antes do worker terminar) e, com --include-failed, também os que
+esgotaram as tentativas.
+
+Uso:
+    python manage.py push_spooled_cvs
+    python manage.py push_spooled_cvs --include-failed
+"""
+
+from django.core.management.base import BaseCommand
+
+from service.models import CVUpload
+from service.services.upload_spool import push_upload
+
+
+class Command(BaseCommand):
+    help = "Envia para o storage os CVs pendentes no spool local."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--include-failed",
+            action="store_true",
+            help="Repetir também uploads em estado failed.",
+        )
+
+    def handle(self, *args, **options):
+        statuses = [CVUpload.STATUS_UPLOADING]
+        if options["include_failed"]:
+            statuses.append(CVUpload.STATUS_FAILED)
+
+        upload_ids = list(
+            CVUpload.objects.filter(status__in=statuses)
+            .order_by("created_at")
+            .values_list("id", flat=True)
+        )
+        self.stdout.write(f"{len(upload_ids)} upload(s) por enviar")
+
+        results = {}
+        for upload_id in upload_ids:
+            result = push_upload(upload_id)
+            results[result] = results.get(result, 0) + 1
+            self.stdout.write(f"  upload {upload_id}: {result or 'removido'}")
+
+        done = results.get(CVUpload.STATUS_DONE, 0)
+        failed = results.get(CVUpload.STATUS_FAILED, 0)
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(f"Concluídos: {done}, falhados: {failed}"))
@@ -0,0 +1,26 @@
+"""
+comando para recalcular as contagens agregadas de visualizações de CVs.
+
+reconstrói cv_view_stats, cv_viewer_stats e cv_daily_views a partir de
+cv_access_log. necessário uma vez após a migração 0011 (os acessos anteriores
+não estão nos rollups) ou para corrigir divergências; no dia a dia os rollups
+são atualizados pelo access_log_writer.
+
+Uso:
+    python manage.py rebuild_view_rollups
+"""
+
+from django.core.management.base import BaseCommand
+
+from service.services.view_rollups import rebuild_view_rollups
+
+
+class Command(BaseCommand):
+    help = "Recalcula os rollups de visualizações de CVs a partir de cv_access_log."
+
+    def handle(self, *args, **options):
+        counts = rebuild_view_rollups()
+
+        for table, count in counts.items():
+            self.stdout.write(f"  {table}: {count}")
+        self.stdout.write(self.style.SUCCESS("Rollups de visualizações recalculados."))
@@ -0,0 +1,115 @@
+"""
+comando para reconciliar o bucket cvs com Curriculo.file.
+
+lista em streaming os objetos do storage e os caminhos dos Curriculos (ambos
+ordenados) e compara-os com um merge ordenado, em memória constante:
+- órfãos: objetos no storage sem Curriculo (removidos com --delete);
+- em falta: Curriculos cujo ficheiro não existe no storage (apenas reportados).
+
+objetos mais recentes que --min-age minutos não são considerados órfãos
+(default e mínimo com --delete: validade das URLs de upload direto,
+CV_UPLOAD_URL_MAX_AGE, mais uma hora).
+
+Uso:
+    python manage.py reconcile_storage
+    python manage.py reconcile_storage --delete --min-age 240
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from service.services.exceptions import StorageListException
+from service.services.storage_reconcile import ReconcileOrderError, minimum_orphan_age, reconcile
+
+
+class Command(BaseCommand):
+    help = "Compara o bucket cvs com Curriculo.file e (opcionalmente) remove os órfãos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Remover do storage os ficheiros órfãos.",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=None,
+            help="Idade mínima (minutos) de um objeto para ser considerado órfão "
+                 "(default e mínimo com --delete: CV_UPLOAD_URL_MAX_AGE + 60).",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=1000,
+            help="Objetos por pedido de listagem ao storage (default: 1000).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Caminhos por pedido de remoção (default: 1000).",
+        )
+        parser.add_argument(
+            "--show",
+            type=int,
+            default=20,
+            help="Número máximo de órfãos/ficheiros em falta a listar (default: 20).",
+        )
+
+    def handle(self, *args, **options):
+        shown = {"orphan": 0, "missing": 0}
+        limit = options["show"]
+
+        def on_orphan(obj):
+            if shown["orphan"] < limit:
+                shown["orphan"] += 1
+                self.stdout.write(f"  órfão: {obj.path} ({obj.size or 0} bytes)")
+
+        def on_missing(file_path, curriculo_id):
+            if shown["missing"] < limit:
+                shown["missing"] += 1
+                self.stdout.write(f"  em falta: {file_path} (curriculo {curriculo_id})")
+
+        minimum = minimum_orphan_age()
+        if options["min_age"] is None:
+            min_age = minimum
+        else:
+            min_age = timedelta(minutes=options["min_age"])
+            if options["delete"] and min_age < minimum:
+                raise CommandError(
+                    f"--min-age com --delete deve ser pelo menos {int(minimum.total_seconds() // 60)} minutos "
+                    "(uploads diretos podem ser finalizados até CV_UPLOAD_URL_MAX_AGE)."
+                )
+
+        try:
+            stats = reconcile(
+                delete=options["delete"],
+                min_age=min_age,
+                page_size=options["page_size"],
+                batch_size=options["batch_size"],
+                on_orphan=on_orphan,
+                on_missing=on_missing,
+            )
+        except (StorageListException, ReconcileOrderError) as e:
+            raise CommandError(str(e))
+
+        elapsed = max(stats["elapsed"], 1e-6)
+        self.stdout.write(
+            f"Objetos: {stats['objects']} ({stats['objects'] / elapsed:.0f}/s), "
+            f"Curriculos: {stats['rows']} ({stats['rows'] / elapsed:.0f}/s), "
+            f"em {stats['elapsed']:.1f}s"
+        )
+        self.stdout.write(
+            f"Associados: {stats['matched']}, recentes ignorados: {stats['recent']}"
+        )
+
+        clean = not stats["orphans"] and not stats["missing"] and not stats["delete_failed"]
+        style = self.style.SUCCESS if clean else self.style.WARNING
+        summary = (
+            f"Órfãos: {stats['orphans']} ({stats['orphan_bytes'] / 1024 / 1024:.1f} MB), "
+            f"em falta: {stats['missing']}"
+        )
+        if options["delete"]:
+            summary += f", removidos: {stats['deleted']}, falhados: {stats['delete_failed']}"
+        self.stdout.write(style(summary))
@@ -1,9 +1,12 @@
+from django.conf import settings
 from django.http import JsonResponse
 from .supabase_client import (
-    get_user_role,
     UserNotFoundError,
     InvalidUserRoleError,
 )
+from service.services.role_service import get_cached_user_role
+from service.services.jwt_auth import decode_supabase_jwt
+from service.services.exceptions import InvalidAuthTokenException
 from rest_framework.permissions import BasePermission
 import logging
 
@@ -13,26 +16,71 @@ EXCLUDED_PATHS = [
     "/service/",
 ]
 
+# autenticados pela assinatura do URL (backend de storage local)
+EXCLUDED_PATH_PREFIXES = (
+    "/service/files/",
+)
+
 class UserHeaderMiddleware:
+    """
+    Autentica o pedido e define ``request.user_id`` e ``request.role``.
+
+    Modos (``settings.AUTH_MODE``):
+    - "header": X-User-ID validado no backend de roles (com cache).
+    - "jwt": apenas ``Authorization: Bearer <JWT do Supabase>``, verificado
+      localmente; a role vem do claim do token.
+    - "both": usa o JWT se presente, caso contrário o X-User-ID.
+    """
 
     def __init__(self, get_response):
         self.get_response = get_response
+        self.auth_mode = getattr(settings, "AUTH_MODE", "header")
+
+    def _get_bearer_token(self, request):
+        auth_header = request.headers.get("Authorization", "")
+        scheme, _, token = auth_header.partition(" ")
+        if scheme.lower() == "bearer" and token.strip():
+            return token.strip()
+        return None
 
     def __call__(self, request):
-        if request.path in EXCLUDED_PATHS:
+        if request.path in EXCLUDED_PATHS or request.path.startswith(EXCLUDED_PATH_PREFIXES):
             return self.get_response(request)
 
-        user_id = request.headers.get("X-User-ID")
-
-        if not user_id:
+        token = None
+        if self.auth_mode in ("jwt", "both"):
+            token = self._get_bearer_token(request)
+
+        if token:
+            try:
+                user_id, role = decode_supabase_jwt(token)
+            except InvalidAuthTokenException as e:
+                logger.info("Token JWT rejeitado: %s", e)
+                return JsonResponse(
+                    {"detail": "Token de autenticação inválido ou expirado"},
+                    status=401
+                )
+        elif self.auth_mode == "jwt":
             return JsonResponse(
-                {"detail": "Header X-User-ID em falta"},
+                {"detail": "Header Authorization em falta"},
                 status=401
             )
+        else:
+            user_id = request.headers.get("X-User-ID")
+            role = None
+
+            if not user_id:
+                return JsonResponse(
+                    {"detail": "Header X-User-ID em falta"},
+                    status=401
+                )
 
         try:
-            # valida usuário e retorna role a partir do Supabase
-            role = get_user_role(user_id)
+            if role is None:
+                # valida usuário e retorna role (cache local ou Supabase)
+                role = get_cached_user_role(user_id)
+            elif role not in [0, 1, 2]:
+                raise InvalidUserRoleError(f"Role inválida: {role}")
 
         except UserNotFoundError:
             return JsonResponse(
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # junta também os dois ramos 0002_notification / 0003_alter_crcurriculo
+    dependencies = [
+        ('service', '0002_notification'),
+        ('service', '0003_alter_crcurriculo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(max_length=100)),
+                ('file_path', models.CharField(max_length=512)),
+                ('spool_path', models.CharField(max_length=1024)),
+                ('status', models.CharField(choices=[('uploading', 'A enviar'), ('done', 'Concluído'), ('failed', 'Falha')], db_index=True, default='uploading', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('curriculo', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='upload', to='service.curriculo')),
+            ],
+            options={
+                'db_table': 'cv_upload',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0004_cvupload'),
+    ]
+
+    operations = [
+        # Curriculo: managed=False — a coluna e o índice são criados por SQL
+        # explícito; as operações de estado mantêm o modelo sincronizado.
+        migrations.RunSQL(
+            sql=[
+                "ALTER TABLE curriculo ADD COLUMN IF NOT EXISTS file_sha256 varchar(64) NULL;",
+                "CREATE INDEX IF NOT EXISTS curriculo_estudante_sha256 "
+                "ON curriculo (estudante_utilizador_auth_user_supabase__id, file_sha256);",
+            ],
+            reverse_sql=[
+                "DROP INDEX IF EXISTS curriculo_estudante_sha256;",
+                "ALTER TABLE curriculo DROP COLUMN IF EXISTS file_sha256;",
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='curriculo',
+                    name='file_sha256',
+                    field=models.CharField(blank=True, max_length=64, null=True),
+                ),
+                migrations.AddIndex(
+                    model_name='curriculo',
+                    index=models.Index(fields=['estudante_utilizador_auth_user_supabase_field', 'file_sha256'], name='curriculo_estudante_sha256'),
+                ),
+            ],
+        ),
+    ]
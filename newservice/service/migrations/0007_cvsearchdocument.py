@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 13:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0006_storagedeletion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVSearchDocument',
+            fields=[
+                ('curriculo', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='service.curriculo')),
+                ('content', models.TextField(blank=True, default='')),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+                ('extracted_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'curriculo_search',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='curriculo_search_vector_gin')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 14:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0007_cvsearchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVPreview',
+            fields=[
+                ('curriculo', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='preview', serialize=False, to='service.curriculo')),
+                ('page_count', models.PositiveIntegerField()),
+                ('file_size', models.PositiveIntegerField(help_text='Tamanho do PDF em bytes')),
+                ('text_length', models.PositiveIntegerField(help_text='Caracteres de texto extraído')),
+                ('thumbnail', models.BinaryField(null=True)),
+                ('thumbnail_etag', models.CharField(blank=True, max_length=64, null=True)),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'curriculo_preview',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0008_cvpreview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cvpreview',
+            name='linearized',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='cvpreview',
+            name='stored_sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
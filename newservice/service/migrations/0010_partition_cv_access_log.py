@@ -0,0 +1,153 @@
+# Generated by Django 5.2 on 2026-10-18 16:00
+
+from django.db import migrations
+
+
+def copy_security_sql(source: str, target: str) -> str:
+    """
+    PL/pgSQL que copia RLS (ENABLE/FORCE), políticas e GRANTs de ``source``
+    para ``target``; deixa em ``has_rls`` se ``source`` tem RLS ativo.
+    """
+    return """
+    SELECT relrowsecurity INTO has_rls FROM pg_class WHERE oid = '{source}'::regclass;
+    IF has_rls THEN
+        ALTER TABLE {target} ENABLE ROW LEVEL SECURITY;
+    END IF;
+    IF (SELECT relforcerowsecurity FROM pg_class WHERE oid = '{source}'::regclass) THEN
+        ALTER TABLE {target} FORCE ROW LEVEL SECURITY;
+    END IF;
+    FOR pol IN
+        SELECT policyname, permissive, cmd, qual, with_check,
+               (SELECT string_agg(CASE WHEN r = 'public' THEN 'PUBLIC' ELSE quote_ident(r) END, ', ')
+                FROM unnest(roles) AS r) AS role_list
+        FROM pg_policies
+        WHERE schemaname = current_schema() AND tablename = '{source}'
+    LOOP
+        EXECUTE format(
+            'CREATE POLICY %I ON {target} AS %s FOR %s TO %s%s%s',
+            pol.policyname, pol.permissive, pol.cmd, pol.role_list,
+            CASE WHEN pol.qual IS NOT NULL THEN ' USING (' || pol.qual || ')' ELSE '' END,
+            CASE WHEN pol.with_check IS NOT NULL THEN ' WITH CHECK (' || pol.with_check || ')' ELSE '' END
+        );
+    END LOOP;
+    FOR acl IN
+        SELECT a.privilege_type, a.is_grantable,
+               CASE WHEN a.grantee = 0 THEN 'PUBLIC' ELSE quote_ident(pg_get_userbyid(a.grantee)) END AS grantee
+        FROM pg_class c, aclexplode(c.relacl) AS a
+        WHERE c.oid = '{source}'::regclass
+    LOOP
+        EXECUTE format(
+            'GRANT %s ON {target} TO %s%s',
+            acl.privilege_type, acl.grantee,
+            CASE WHEN acl.is_grantable THEN ' WITH GRANT OPTION' ELSE '' END
+        );
+    END LOOP;
+""".format(source=source, target=target)
+
+
+# CVAccessLog: managed=False — a tabela é convertida por SQL explícito numa
+# tabela particionada por mês (RANGE em accessed_at, limites em UTC).
+# Partições: cv_access_log_yYYYYmMM, do mês do acesso mais antigo até 3 meses
+# à frente; as seguintes são criadas por `manage.py access_log_partitions`
+# (cron diário) e, se faltar a do mês, pelo access_log_writer no INSERT.
+# Sem partição DEFAULT: assim o Postgres pode ler as partições por ordem
+# (ORDER BY accessed_at DESC LIMIT n).
+# RLS, políticas e GRANTs da tabela original são copiados para a nova; as
+# partições têm RLS ativo (sem políticas), para não serem lidas diretamente
+# sem as políticas da tabela-mãe.
+PARTITION_SQL = """
+DO $$
+DECLARE
+    fk record;
+    pol record;
+    acl record;
+    partition_name text;
+    has_rls boolean;
+    m date;
+    last_month date := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months')::date;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'cv_access_log' AND relkind = 'p') THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE cv_access_log RENAME TO cv_access_log_legacy;
+
+    CREATE TABLE cv_access_log (LIKE cv_access_log_legacy INCLUDING DEFAULTS)
+        PARTITION BY RANGE (accessed_at);
+    ALTER TABLE cv_access_log
+        ADD CONSTRAINT cv_access_log_id_accessed_pkey PRIMARY KEY (id, accessed_at);
+    FOR fk IN
+        SELECT pg_get_constraintdef(oid) AS def FROM pg_constraint
+        WHERE conrelid = 'cv_access_log_legacy'::regclass AND contype = 'f'
+    LOOP
+        EXECUTE 'ALTER TABLE cv_access_log ADD ' || fk.def;
+    END LOOP;
+    """ + copy_security_sql("cv_access_log_legacy", "cv_access_log") + """
+    CREATE INDEX cv_access_log_curriculo_accessed ON cv_access_log (curriculo_id, accessed_at DESC);
+
+    SELECT COALESCE(
+        date_trunc('month', min(accessed_at) AT TIME ZONE 'UTC'),
+        date_trunc('month', now() AT TIME ZONE 'UTC')
+    )::date INTO m FROM cv_access_log_legacy;
+
+    WHILE m <= last_month LOOP
+        partition_name := 'cv_access_log_y' || to_char(m, 'YYYY') || 'm' || to_char(m, 'MM');
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF cv_access_log FOR VALUES FROM (%L) TO (%L)',
+            partition_name,
+            m::timestamp AT TIME ZONE 'UTC',
+            (m + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+        );
+        IF has_rls THEN
+            EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', partition_name);
+        END IF;
+        m := (m + interval '1 month')::date;
+    END LOOP;
+
+    INSERT INTO cv_access_log SELECT * FROM cv_access_log_legacy;
+    DROP TABLE cv_access_log_legacy;
+END
+$$;
+"""
+
+UNPARTITION_SQL = """
+DO $$
+DECLARE
+    fk record;
+    pol record;
+    acl record;
+    has_rls boolean;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_class WHERE relname = 'cv_access_log' AND relkind = 'p') THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE cv_access_log RENAME TO cv_access_log_partitioned;
+
+    CREATE TABLE cv_access_log (LIKE cv_access_log_partitioned INCLUDING DEFAULTS);
+    ALTER TABLE cv_access_log ADD PRIMARY KEY (id);
+    FOR fk IN
+        SELECT pg_get_constraintdef(oid) AS def FROM pg_constraint
+        WHERE conrelid = 'cv_access_log_partitioned'::regclass AND contype = 'f'
+    LOOP
+        EXECUTE 'ALTER TABLE cv_access_log ADD ' || fk.def;
+    END LOOP;
+    """ + copy_security_sql("cv_access_log_partitioned", "cv_access_log") + """
+    CREATE INDEX cv_access_log_curriculo_accessed_at ON cv_access_log (curriculo_id, accessed_at DESC);
+
+    INSERT INTO cv_access_log SELECT * FROM cv_access_log_partitioned;
+    DROP TABLE cv_access_log_partitioned;
+END
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0009_cvpreview_linearized'),
+    ]
+
+    operations = [
+        migrations.RunSQL(sql=PARTITION_SQL, reverse_sql=UNPARTITION_SQL),
+    ]
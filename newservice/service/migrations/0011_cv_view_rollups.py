@@ -0,0 +1,58 @@
+# Generated by Django 5.2 on 2026-10-18 18:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0010_partition_cv_access_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVViewStats',
+            fields=[
+                ('curriculo', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='view_stats', serialize=False, to='service.curriculo')),
+                ('views', models.BigIntegerField(default=0)),
+                ('company_views', models.BigIntegerField(default=0)),
+                ('unique_companies', models.IntegerField(default=0)),
+                ('last_viewed_at', models.DateTimeField(null=True)),
+            ],
+            options={
+                'db_table': 'cv_view_stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='CVDailyViews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.IntegerField(default=0)),
+                ('company_views', models.IntegerField(default=0)),
+                ('curriculo', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='service.curriculo')),
+            ],
+            options={
+                'db_table': 'cv_daily_views',
+                'constraints': [models.UniqueConstraint(fields=('curriculo', 'day'), name='cv_daily_views_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CVViewerStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('viewer_user_id', models.UUIDField()),
+                ('viewer_role', models.SmallIntegerField()),
+                ('views', models.BigIntegerField(default=0)),
+                ('first_viewed_at', models.DateTimeField()),
+                ('last_viewed_at', models.DateTimeField()),
+                ('curriculo', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='viewer_stats', to='service.curriculo')),
+            ],
+            options={
+                'db_table': 'cv_viewer_stats',
+                'indexes': [models.Index(fields=['curriculo', '-last_viewed_at'], name='cv_viewer_stats_recent')],
+                'constraints': [models.UniqueConstraint(fields=('curriculo', 'viewer_user_id'), name='cv_viewer_stats_unique')],
+            },
+        ),
+    ]
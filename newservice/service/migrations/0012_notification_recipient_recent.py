@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0011_cv_view_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient_user_id', '-created_at', '-id'], name='notification_recipient_recent'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-18 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0012_notification_recipient_recent'),
+    ]
+
+    operations = [
+        # Curriculo: managed=False — o índice é criado por SQL explícito; a
+        # operação de estado mantém o modelo sincronizado.
+        migrations.RunSQL(
+            sql=[
+                "CREATE UNIQUE INDEX IF NOT EXISTS curriculo_file_unique "
+                "ON curriculo (file) WHERE file <> '';",
+            ],
+            reverse_sql=[
+                "DROP INDEX IF EXISTS curriculo_file_unique;",
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='curriculo',
+                    constraint=models.UniqueConstraint(condition=models.Q(('file', ''), _negated=True), fields=('file',), name='curriculo_file_unique'),
+                ),
+            ],
+        ),
+    ]
@@ -6,9 +6,13 @@
 #   * Remove `managed = False` lines if you wish to allow Django to create, modify, and delete the table
 # Feel free to rename the models, but don't rename db_table values or field names.
 import uuid
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 from django.db import models
 
+from service.ids import uuid7
+
 # Constantes para status de currículo
 CV_STATUS_LABELS = {
     0: "pendente",
@@ -104,6 +108,8 @@ class Curriculo(models.Model):
     )
 
     file = models.CharField(blank=True, null=True)
+    # SHA-256 (hex) do PDF, calculado durante o upload; deteta resubmissões idênticas
+    file_sha256 = models.CharField(max_length=64, blank=True, null=True)
     status = models.IntegerField(choices=CV_STATUS_CHOICES, default=CV_STATUS_PENDING)
     #usar curriculo.get_status_display() para obter a descrição do status
     descricao = models.TextField(blank=True, null=True)
@@ -129,6 +135,20 @@ class Curriculo(models.Model):
     class Meta:
         managed = False
         db_table = 'curriculo'
+        indexes = [
+            models.Index(
+                fields=['estudante_utilizador_auth_user_supabase_field', 'file_sha256'],
+                name='curriculo_estudante_sha256',
+            ),
+        ]
+        constraints = [
+            # um objeto do storage pertence a um só CV (finalize-upload concorrente)
+            models.UniqueConstraint(
+                fields=['file'],
+                condition=~models.Q(file=''),
+                name='curriculo_file_unique',
+            ),
+        ]
 
     def get_latest_review(self):
         return self.reviews.first()
@@ -144,11 +164,21 @@ class Curriculo(models.Model):
         self.save(update_fields=["status", "validated_date"])
 
 class CVAccessLog(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    """
+    Auditoria de acessos a CVs.
+
+    Tabela particionada por mês em ``accessed_at`` (migração 0010); a chave
+    primária na base de dados é ``(id, accessed_at)``. Filtrar por
+    ``accessed_at`` limita a consulta às partições desse período.
+    """
+
+    # UUIDv7: ids ordenados no tempo, inserções no fim do índice da PK
+    id = models.UUIDField(primary_key=True, default=uuid7)
     curriculo = models.ForeignKey('Curriculo', on_delete=models.CASCADE)
     accessed_by_user_id = models.UUIDField()  # Alterado de BigIntegerField para UUIDField
     accessed_by_role = models.SmallIntegerField()
-    accessed_at = models.DateTimeField(auto_now_add=True)
+    # hora do acesso, definida no pedido (a escrita pode ser feita mais tarde, em lote)
+    accessed_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         managed = False
@@ -412,6 +442,220 @@ class Notification(models.Model):
     class Meta:
         db_table = 'notification'
         ordering = ['-created_at']
+        indexes = [
+            # listagem do estudante (mais recentes primeiro) e paginação por cursor
+            models.Index(fields=['recipient_user_id', '-created_at', '-id'], name='notification_recipient_recent'),
+        ]
 
     def __str__(self):
         return f"Notification({self.type}, {self.status}) -> {self.recipient_email}"
+
+
+class CVUpload(models.Model):
+    """
+    Estado do envio para o storage de um CV submetido em modo spool.
+
+    O PDF é guardado numa diretoria local (``spool_path``) e o pedido
+    responde 202; um worker em background envia-o para ``bucket``/``file_path``.
+
+    Estados:
+        - uploading: A aguardar envio (ou a repetir após falha)
+        - done: Ficheiro guardado no storage
+        - failed: Esgotadas as tentativas (o ficheiro mantém-se no spool)
+    """
+
+    STATUS_UPLOADING = 'uploading'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, 'A enviar'),
+        (STATUS_DONE, 'Concluído'),
+        (STATUS_FAILED, 'Falha'),
+    ]
+
+    curriculo = models.OneToOneField(
+        'Curriculo',
+        on_delete=models.CASCADE,
+        related_name='upload',
+        db_constraint=False,
+    )
+    bucket = models.CharField(max_length=100)
+    file_path = models.CharField(max_length=512)
+    spool_path = models.CharField(max_length=1024)
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_UPLOADING,
+        db_index=True,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'cv_upload'
+
+    def __str__(self):
+        return f"CVUpload({self.curriculo_id}, {self.status})"
+
+
+class StorageDeletion(models.Model):
+    """
+    Outbox de ficheiros a remover do storage.
+
+    Registado na mesma transação que elimina o Curriculo; um worker remove os
+    ficheiros em lote e apaga a linha. Em caso de falha a remoção é repetida
+    a partir de ``next_attempt_at`` (backoff exponencial).
+    """
+
+    bucket = models.CharField(max_length=100)
+    file_path = models.CharField(max_length=512)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, db_index=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'storage_deletion_outbox'
+        ordering = ['id']
+
+    def __str__(self):
+        return f"StorageDeletion({self.bucket}/{self.file_path})"
+
+
+class CVSearchDocument(models.Model):
+    """
+    Texto extraído do PDF de um Curriculo e respetivo ``tsvector``.
+
+    Preenchido em background após o upload (``service/services/cv_text.py``);
+    ``search_vector`` tem índice GIN e serve o filtro ``?q=`` de /curriculo/.
+    """
+
+    curriculo = models.OneToOneField(
+        'Curriculo',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document',
+        db_constraint=False,
+    )
+    content = models.TextField(blank=True, default="")
+    search_vector = SearchVectorField(null=True)
+    extracted_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'curriculo_search'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='curriculo_search_vector_gin'),
+        ]
+
+    def __str__(self):
+        return f"CVSearchDocument({self.curriculo_id})"
+
+
+class CVPreview(models.Model):
+    """
+    Pré-visualização (primeira página em WebP) e metadata do PDF de um Curriculo.
+
+    Gerada em background após o upload, juntamente com o texto para pesquisa.
+    ``thumbnail_etag`` é None se não foi possível gerar a imagem.
+
+    ``stored_sha256`` é o hash do objeto guardado no storage; difere de
+    ``Curriculo.file_sha256`` (hash do ficheiro submetido, usado na auditoria
+    e na deteção de duplicados) quando o PDF foi linearizado.
+    """
+
+    curriculo = models.OneToOneField(
+        'Curriculo',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='preview',
+        db_constraint=False,
+    )
+    page_count = models.PositiveIntegerField()
+    file_size = models.PositiveIntegerField(help_text="Tamanho do PDF em bytes")
+    text_length = models.PositiveIntegerField(help_text="Caracteres de texto extraído")
+    thumbnail = models.BinaryField(null=True)
+    thumbnail_etag = models.CharField(max_length=64, null=True, blank=True)
+    linearized = models.BooleanField(default=False)
+    stored_sha256 = models.CharField(max_length=64, null=True, blank=True)
+    generated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'curriculo_preview'
+
+    def __str__(self):
+        return f"CVPreview({self.curriculo_id}, {self.page_count} páginas)"
+
+
+class CVViewStats(models.Model):
+    """
+    Totais de visualizações de um Curriculo.
+
+    Mantido pelo access_log_writer na mesma transação que insere os acessos
+    em ``CVAccessLog`` (ver ``services.view_rollups``). ``views`` conta todos
+    os acessos; ``company_views`` e ``unique_companies`` só os de empresas.
+    """
+
+    curriculo = models.OneToOneField(
+        'Curriculo',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='view_stats',
+        db_constraint=False,
+    )
+    views = models.BigIntegerField(default=0)
+    company_views = models.BigIntegerField(default=0)
+    unique_companies = models.IntegerField(default=0)
+    last_viewed_at = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table = 'cv_view_stats'
+
+
+class CVViewerStats(models.Model):
+    """Visualizações de um Curriculo por utilizador (CR ou empresa)."""
+
+    curriculo = models.ForeignKey(
+        'Curriculo',
+        on_delete=models.CASCADE,
+        related_name='viewer_stats',
+        db_constraint=False,
+        db_index=False,  # coberto pela UniqueConstraint
+    )
+    viewer_user_id = models.UUIDField()
+    viewer_role = models.SmallIntegerField()
+    views = models.BigIntegerField(default=0)
+    first_viewed_at = models.DateTimeField()
+    last_viewed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'cv_viewer_stats'
+        constraints = [
+            models.UniqueConstraint(fields=['curriculo', 'viewer_user_id'], name='cv_viewer_stats_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['curriculo', '-last_viewed_at'], name='cv_viewer_stats_recent'),
+        ]
+
+
+class CVDailyViews(models.Model):
+    """Visualizações de um Curriculo por dia (``TIME_ZONE``)."""
+
+    curriculo = models.ForeignKey(
+        'Curriculo',
+        on_delete=models.CASCADE,
+        related_name='daily_views',
+        db_constraint=False,
+        db_index=False,  # coberto pela UniqueConstraint
+    )
+    day = models.DateField()
+    views = models.IntegerField(default=0)
+    company_views = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'cv_daily_views'
+        constraints = [
+            models.UniqueConstraint(fields=['curriculo', 'day'], name='cv_daily_views_unique'),
+        ]
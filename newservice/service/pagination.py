@@ -0,0 +1,279 @@
+"""
+Paginação das listagens da API.
+
+Por omissão as listagens são paginadas por número de página (``?page=``),
+com ``COUNT(*)`` e ``OFFSET`` em cada pedido: o custo cresce com a
+profundidade da página e com o tamanho da tabela. Com ``?pagination=cursor``
+passam a ser paginadas por cursor (keyset): o cursor guarda os valores de
+todos os campos da ordenação (com a chave primária como desempate) da
+última linha da página, e a seguinte filtra por comparação lexicográfica
+com esses valores, ``(campo, id) > (v, n)``, sem OFFSET nem saltos sobre
+empates. Com um índice que cubra a ordenação (a PK, ou e.g.
+``notification_recipient_recent``) cada página custa o mesmo em qualquer
+profundidade; numa coluna sem índice (e.g. ``?ordering=visualizacoes`` em
+``/vagas/``) o filtro evita o OFFSET, mas a base de dados tem de ordenar as
+linhas que restam depois do cursor.
+Os cursores das ligações ``next``/``previous`` são opacos e mantêm-se
+válidos com inserções entre pedidos.
+
+Em modo cursor não há ``count``; com ``?approximate_count=true`` a resposta
+inclui ``approximate_count``, a estimativa de linhas do planner do
+PostgreSQL (EXPLAIN, sem executar a consulta).
+"""
+import json
+import operator
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+def approximate_count(queryset):
+    """
+    Número de linhas estimado pelo planner para ``queryset``.
+
+    Returns:
+        int | None: Estimativa, ou None fora do PostgreSQL.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Paginação por cursor sobre a ordenação completa, com total aproximado opcional.
+
+    O ``CursorPagination`` do DRF posiciona-se só pelo primeiro campo da
+    ordenação e salta os empates com um offset; aqui a chave primária é
+    acrescentada como desempate e a posição é a tupla de todos os campos, por
+    isso é única e o offset fica sempre a 0. NULL conta como maior que
+    qualquer valor (``NULLS LAST`` ascendente, ``NULLS FIRST`` descendente,
+    como por omissão no PostgreSQL).
+    """
+    approximate_count_query_param = 'approximate_count'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = self._queryset_ordering(queryset, view) or super().get_ordering(request, queryset, view)
+        pk_name = queryset.model._meta.pk.name
+        ordering = tuple(
+            field.replace('pk', pk_name) if field.lstrip('-') == 'pk' else field
+            for field in ordering
+        )
+        if not any(field.lstrip('-') == pk_name for field in ordering):
+            ordering += (f"-{pk_name}" if ordering[0].startswith('-') else pk_name,)
+        return ordering
+
+    @staticmethod
+    def _queryset_ordering(queryset, view):
+        """
+        Ordenação já aplicada ao queryset por um filtro (e.g. relevância de
+        ``?q=``, ``-search_rank``), numa view sem ``OrderingFilter``; None se
+        não houver, e aplica-se a ordenação por omissão.
+        """
+        if view is None or any(hasattr(backend, 'get_ordering') for backend in getattr(view, 'filter_backends', [])):
+            return None
+        ordering = queryset.query.order_by
+        if ordering and all(isinstance(field, str) for field in ordering):
+            return tuple(ordering)
+        return None
+
+    def _keys(self, queryset):
+        """(nome, descendente, field) de cada campo da ordenação."""
+        keys = []
+        for name in self.ordering:
+            annotation = queryset.query.annotations.get(name.lstrip('-'))
+            try:
+                if annotation is not None:
+                    field = annotation.output_field
+                else:
+                    field = queryset.model._meta.get_field(name.lstrip('-'))
+            except FieldDoesNotExist:
+                field = None
+            keys.append((name.lstrip('-'), name.startswith('-'), field))
+        return keys
+
+    @staticmethod
+    def _order_by(keys, reverse):
+        order_by = []
+        for name, descending, field in keys:
+            descending = descending != reverse
+            if field is not None and field.null:
+                order_by.append(F(name).desc(nulls_first=True) if descending else F(name).asc(nulls_last=True))
+            else:
+                order_by.append(f"-{name}" if descending else name)
+        return order_by
+
+    @staticmethod
+    def _beyond(name, value, greater, nullable):
+        """Q dos valores de ``name`` depois de ``value``, ou None se não houver."""
+        if greater:
+            if value is None:
+                return None
+            condition = Q(**{f"{name}__gt": value})
+            return condition | Q(**{f"{name}__isnull": True}) if nullable else condition
+        if value is None:
+            return Q(**{f"{name}__isnull": False})
+        return Q(**{f"{name}__lt": value})
+
+    @staticmethod
+    def _bound(name, value, greater, nullable):
+        """Q de ``name`` igual ou depois de ``value`` (o intervalo no índice)."""
+        if value is None:
+            return Q(**{f"{name}__isnull": True}) if greater else Q()
+        if greater:
+            condition = Q(**{f"{name}__gte": value})
+            return condition | Q(**{f"{name}__isnull": True}) if nullable else condition
+        return Q(**{f"{name}__lte": value})
+
+    def _after(self, keys, position, reverse):
+        """
+        Q das linhas depois de ``position`` na ordem de leitura:
+        ``a >= x AND (a > x OR (a = x AND b > y) OR ...)``; o ``a >= x``
+        delimita o intervalo no índice do primeiro campo.
+        """
+        branches = []
+        equal = Q()
+        for (name, descending, field), value in zip(keys, position):
+            nullable = field is None or field.null
+            beyond = self._beyond(name, value, descending == reverse, nullable)
+            if beyond is not None:
+                branches.append(equal & beyond)
+            equal &= Q(**{f"{name}__isnull": True}) if value is None else Q(**{name: value})
+        if not branches:
+            return Q(pk__in=[])
+
+        name, descending, field = keys[0]
+        bound = self._bound(name, position[0], descending == reverse, field is None or field.null)
+        return bound & reduce(operator.or_, branches)
+
+    def _decode_position(self, keys, position):
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(keys):
+                raise ValueError
+            return [
+                value if value is None or field is None else field.to_python(value)
+                for (_, _, field), value in zip(keys, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for name in ordering:
+            name = name.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(None if value is None else str(value))
+        return json.dumps(values)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.approximate_count = None
+        value = request.query_params.get(self.approximate_count_query_param, '')
+        if value.lower() in ("true", "1", "yes"):
+            self.approximate_count = approximate_count(queryset)
+
+        # igual a CursorPagination.paginate_queryset, exceto a ordenação
+        # (NULLs) e o filtro pela posição, feito sobre todos os campos
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        keys = self._keys(queryset)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        queryset = queryset.order_by(*self._order_by(keys, reverse))
+        if current_position is not None:
+            position = self._decode_position(keys, current_position)
+            queryset = queryset.filter(self._after(keys, position, reverse))
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.approximate_count is not None:
+            response.data['approximate_count'] = self.approximate_count
+        return response
+
+
+class CursorModePagination(PageNumberPagination):
+    """
+    Paginação por número de página com modo cursor opcional.
+
+    ``?pagination=cursor`` (e o ``?cursor=`` das ligações seguintes) delega
+    em ``KeysetPagination``, ordenado por ``cursor_ordering``; se a view tiver
+    ``OrderingFilter``, pela ordenação pedida (``?ordering=``), e se não tiver
+    mas um filtro ordenar o queryset (``?q=``), por essa ordenação.
+    """
+    cursor_ordering = 'id'
+    cursor_mode_query_param = 'pagination'
+
+    def _cursor_mode(self, request):
+        return (
+            request.query_params.get(self.cursor_mode_query_param) == 'cursor'
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if not self._cursor_mode(request):
+            return super().paginate_queryset(queryset, request, view)
+
+        self.keyset = KeysetPagination()
+        self.keyset.ordering = self.cursor_ordering
+        self.keyset.page_size = self.page_size
+        self.keyset.page_size_query_param = self.page_size_query_param
+        self.keyset.max_page_size = self.max_page_size
+        return self.keyset.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
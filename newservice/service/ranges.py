@@ -0,0 +1,130 @@
+"""
+Respostas de ficheiros com suporte a pedidos HTTP Range.
+
+``ranged_file_response`` responde a ``Range: bytes=...`` (um único
+intervalo) com 206 e a ``If-None-Match`` com 304. O corpo é sempre um
+``FileResponse`` sobre o ficheiro aberto: servidores com
+``wsgi.file_wrapper`` (e.g. gunicorn) enviam-no com ``sendfile``, também
+para intervalos, sem copiar os bytes para o processo Python.
+"""
+import os
+
+from django.http import FileResponse, HttpResponse
+
+
+class RangeNotSatisfiable(Exception):
+    """O intervalo pedido está fora do ficheiro (resposta 416)."""
+
+
+def parse_byte_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Intervalo ``(início, fim)`` (inclusivo) de um header ``Range``.
+
+    Devolve None se o header não se aplicar: ausente, mal formado, noutra
+    unidade ou com vários intervalos (nesses casos serve-se o ficheiro
+    completo).
+
+    Erros:
+        RangeNotSatisfiable: Se o intervalo não intersetar o ficheiro.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+
+    first, sep, last = spec.partition("-")
+    if not sep:
+        return None
+    try:
+        if not first.strip():
+            # sufixo: os últimos N bytes
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable(header)
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last.strip() else size - 1
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+class RangeFile:
+    """
+    Leitura de ``length`` bytes a partir da posição atual de ``file``.
+
+    Expõe ``fileno`` para que o ``wsgi.file_wrapper`` possa usar
+    ``sendfile`` (limitado pelo Content-Length da resposta).
+    """
+
+    def __init__(self, file, length: int):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def ranged_file_response(request, file, content_type: str, etag: str | None = None, filename: str = ""):
+    """
+    Resposta 200/206/304/416 para um ficheiro aberto em modo binário.
+
+    O ficheiro passa a pertencer à resposta (é fechado por ela).
+
+    Args:
+        request: HttpRequest.
+        file: Ficheiro aberto (``rb``).
+        content_type (str): Content-Type do corpo.
+        etag (str | None): ETag já entre aspas; ativa 304 e ``If-Range``.
+        filename (str): Nome sugerido em Content-Disposition (inline).
+    """
+    if etag and request.headers.get("If-None-Match") == etag:
+        file.close()
+        response = HttpResponse(status=304)
+        response["ETag"] = etag
+        return response
+
+    size = os.fstat(file.fileno()).st_size
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    # If-Range com outra versão (ou data): responder com o ficheiro completo
+    if not if_range or (etag and if_range == etag):
+        try:
+            byte_range = parse_byte_range(request.headers.get("Range"), size)
+        except RangeNotSatisfiable:
+            file.close()
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type, filename=filename)
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = FileResponse(
+            RangeFile(file, end - start + 1), status=206, content_type=content_type, filename=filename
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = end - start + 1
+
+    response["Accept-Ranges"] = "bytes"
+    if etag:
+        response["ETag"] = etag
+    return response
@@ -10,8 +10,13 @@ from .models import (
     CVAccessLog,
     CV_STATUS_LABELS,
     Notification,
+    CVPreview,
+    CVViewerStats,
+    CVDailyViews,
+    CVUpload,
 )
 
+from django.urls import reverse
 from django.utils import timezone
 
 
@@ -47,6 +52,34 @@ class CVAccessLogSerializer(serializers.ModelSerializer):
         return role_labels.get(obj.accessed_by_role, "desconhecido")
 
 
+class CVViewerStatsSerializer(serializers.ModelSerializer):
+    """Serializer para CVViewerStats - visualizações de um CV por utilizador."""
+
+    viewer_user_id = serializers.SerializerMethodField()
+    viewer_role = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CVViewerStats
+        fields = ["viewer_user_id", "viewer_role", "views", "first_viewed_at", "last_viewed_at"]
+        read_only_fields = fields
+
+    def get_viewer_user_id(self, obj):
+        return str(obj.viewer_user_id)
+
+    def get_viewer_role(self, obj):
+        role_labels = {0: "CR", 1: "Empresa", 2: "Estudante"}
+        return role_labels.get(obj.viewer_role, "desconhecido")
+
+
+class CVDailyViewsSerializer(serializers.ModelSerializer):
+    """Serializer para CVDailyViews - visualizações de um CV por dia."""
+
+    class Meta:
+        model = CVDailyViews
+        fields = ["day", "views", "company_views"]
+        read_only_fields = fields
+
+
 class CVSignedUrlSerializer(serializers.Serializer):
     """Serializer retornar URL assinada com metadata do CV."""
 
@@ -62,6 +95,22 @@ class CVSignedUrlSerializer(serializers.Serializer):
         return CV_STATUS_LABELS.get(obj.get("status"), "desconhecido")
 
 
+class CVBulkViewSerializer(serializers.Serializer):
+    """Serializer para pedido de visualização de vários CVs (POST /curriculo/view-bulk/)."""
+
+    MAX_IDS = 100
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_IDS,
+        error_messages={
+            "empty": "Deve indicar pelo menos um id de currículo.",
+            "max_length": f"No máximo {MAX_IDS} currículos por pedido.",
+        },
+    )
+
+
 class NotificationSerializer(serializers.ModelSerializer):
     """Serializer para listagem de notificações."""
 
@@ -105,6 +154,9 @@ class AreaSerializer(serializers.Serializer):
 
 
 class CurriculoSerializer(serializers.ModelSerializer):
+    # metadata e URL da pré-visualização (None enquanto não for gerada)
+    preview = serializers.SerializerMethodField()
+
     class Meta:
         model = Curriculo
         fields = [
@@ -115,10 +167,25 @@ class CurriculoSerializer(serializers.ModelSerializer):
             "creation_date",
             "validated_date",
             "estudante_utilizador_auth_user_supabase_field",
+            "preview",
         ]
         read_only_fields = ["id", "status", "creation_date", "validated_date"]
         extra_kwargs = {"file": {"required": True, "allow_blank": False}}
 
+    def get_preview(self, obj):
+        try:
+            preview = obj.preview
+        except CVPreview.DoesNotExist:
+            return None
+        return {
+            "page_count": preview.page_count,
+            "file_size": preview.file_size,
+            "text_length": preview.text_length,
+            "thumbnail_url": (
+                reverse("curriculo-thumbnail", args=[obj.id]) if preview.thumbnail_etag else None
+            ),
+        }
+
     def validate(self, attrs):
         estudante = attrs.get("estudante_utilizador_auth_user_supabase_field")
         if not estudante:
@@ -280,6 +347,13 @@ class CRReviewSerializer(serializers.Serializer):
         if not curriculo.is_pending():
             raise serializers.ValidationError("Este currículo já foi validado.")
 
+        # envio em modo spool: o ficheiro só está no storage com o upload concluído
+        upload_status = CVUpload.objects.filter(curriculo=curriculo).values_list('status', flat=True).first()
+        if upload_status == CVUpload.STATUS_UPLOADING:
+            raise serializers.ValidationError("O ficheiro deste currículo ainda está a ser enviado para o storage.")
+        if upload_status is not None and upload_status != CVUpload.STATUS_DONE:
+            raise serializers.ValidationError("O envio do ficheiro deste currículo falhou; não pode ser validado.")
+
         return value
 
     def validate(self, attrs):
@@ -295,7 +369,7 @@ class CRReviewSerializer(serializers.Serializer):
 
     def create(self, validated_data):
         from .tasks import send_cv_status_notification
-        from service.services.storage_service import SupabaseStorageService
+        from service.services.storage_outbox import enqueue_deletion
         import logging
 
         logger = logging.getLogger(__name__)
@@ -330,23 +404,11 @@ class CRReviewSerializer(serializers.Serializer):
                 cv_anterior_id = cv_anterior.id
                 cv_anterior_file = cv_anterior.file
 
-                # Eliminar CV anterior da base de dados
+                # Eliminar CV anterior da base de dados; o ficheiro é removido
+                # do storage após o commit (outbox)
                 cv_anterior.delete()
                 cv_anterior_eliminado = cv_anterior_id
-
-                # Eliminar ficheiro do storage
-                if cv_anterior_file:
-                    try:
-                        storage_service = SupabaseStorageService()
-                        storage_service.delete_file(
-                            bucket_name="cvs", file_path=cv_anterior_file
-                        )
-                    except Exception as e:
-                        logger.warning(
-                            "Erro ao eliminar ficheiro do CV anterior (curriculo_id=%s): %s",
-                            cv_anterior_id,
-                            str(e),
-                        )
+                enqueue_deletion("cvs", cv_anterior_file)
 
                 logger.info(
                     "CV anterior eliminado automaticamente (curriculo_id=%s) ao aprovar novo CV (curriculo_id=%s) para estudante %s",
@@ -392,19 +454,8 @@ class CRReviewSerializer(serializers.Serializer):
                 .first()
             )
 
-            # Eliminar ficheiro do storage
-            if curriculo_file:
-                try:
-                    storage_service = SupabaseStorageService()
-                    storage_service.delete_file(
-                        bucket_name="cvs", file_path=curriculo_file
-                    )
-                except Exception as e:
-                    logger.warning(
-                        "Erro ao eliminar ficheiro do CV rejeitado (curriculo_id=%s): %s",
-                        curriculo_id,
-                        str(e),
-                    )
+            # Eliminar ficheiro do storage após o commit (outbox)
+            enqueue_deletion("cvs", curriculo_file)
 
             # Eliminar CV pendente da base de dados
             curriculo.delete()
@@ -0,0 +1,180 @@
+"""
+Partições mensais de ``cv_access_log`` (RANGE em ``accessed_at``, UTC).
+
+A tabela é particionada pela migração 0010; este módulo cria as partições
+dos meses seguintes e remove (opcionalmente arquivando em CSV) as que
+ficaram fora do período de retenção. Remover uma partição é uma operação
+de metadata (DETACH + DROP), sem DELETE linha a linha.
+
+Executado por ``python manage.py access_log_partitions``, que tem de ser
+agendado (e.g. cron diário): as partições criadas pela migração chegam só a
+``CV_ACCESS_LOG_PARTITIONS_AHEAD`` meses. Se ainda assim faltar a partição
+de um mês, o access_log_writer cria-a no INSERT (``ensure_partitions_for``).
+
+As partições têm RLS ativo (sem políticas) quando a tabela-mãe tem, para não
+serem lidas diretamente sem as políticas desta.
+"""
+import gzip
+import logging
+import os
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "cv_access_log"
+
+_PARTITION_RE = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def add_months(month: date, months: int) -> date:
+    """Primeiro dia do mês ``months`` meses depois de ``month``."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def current_month() -> date:
+    today = timezone.now().astimezone(dt_timezone.utc).date()
+    return today.replace(day=1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def _bound(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def list_partitions() -> list[tuple[str, date]]:
+    """Partições mensais existentes, ``(nome, mês)``, por ordem cronológica."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [PARENT_TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def create_partition(month: date) -> str:
+    """
+    Cria a partição de ``month`` (se não existir), com RLS se a tabela-mãe
+    tiver RLS ativo.
+
+    Returns:
+        str: Nome da partição.
+    """
+    name = partition_name(month)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{PARENT_TABLE}" '
+            "FOR VALUES FROM (%s) TO (%s)",
+            [_bound(month), _bound(add_months(month, 1))],
+        )
+        cursor.execute(
+            "SELECT relrowsecurity FROM pg_class WHERE relname = %s AND relkind = 'p'",
+            [PARENT_TABLE],
+        )
+        row = cursor.fetchone()
+        if row and row[0]:
+            cursor.execute(f'ALTER TABLE "{name}" ENABLE ROW LEVEL SECURITY')
+    return name
+
+
+def ensure_partitions_for(timestamps) -> list[str]:
+    """
+    Cria as partições em falta para os meses (UTC) de ``timestamps``.
+
+    Usado pelo access_log_writer quando um INSERT falha por não haver
+    partição. Erros (e.g. criação concorrente por outro processo) são
+    registados e ignorados: o INSERT seguinte decide.
+
+    Returns:
+        list[str]: Nomes das partições criadas.
+    """
+    months = sorted({ts.astimezone(dt_timezone.utc).date().replace(day=1) for ts in timestamps})
+    existing = {name for name, _ in list_partitions()}
+    created = []
+    for month in months:
+        if partition_name(month) in existing:
+            continue
+        try:
+            with transaction.atomic():
+                created.append(create_partition(month))
+        except DatabaseError as exc:
+            logger.warning("[AccessLog] Falha ao criar a partição de %s: %s", month, exc)
+    if created:
+        logger.warning(
+            "[AccessLog] Partições criadas no INSERT (access_log_partitions agendado?): %s",
+            ", ".join(created),
+        )
+    return created
+
+
+def ensure_partitions(months_ahead: int, dry_run: bool = False) -> list[str]:
+    """
+    Cria as partições do mês atual e dos ``months_ahead`` meses seguintes.
+
+    Returns:
+        list[str]: Nomes das partições criadas (ou a criar, com ``dry_run``).
+    """
+    existing = {name for name, _ in list_partitions()}
+    start = current_month()
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(start, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        if not dry_run:
+            create_partition(month)
+        created.append(name)
+    return created
+
+
+def expired_partitions(retention_months: int) -> list[str]:
+    """
+    Partições inteiramente anteriores ao período de retenção: o mês atual
+    e os ``retention_months`` meses anteriores são mantidos.
+    """
+    cutoff = add_months(current_month(), -retention_months)
+    return [name for name, month in list_partitions() if month < cutoff]
+
+
+def archive_partition(name: str, directory: str) -> str:
+    """
+    Exporta uma partição para ``<directory>/<nome>.csv.gz`` (COPY, com header).
+
+    Returns:
+        str: Caminho do ficheiro criado.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.csv.gz")
+    tmp_path = f"{path}.part"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as out, connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER)', out)
+    os.replace(tmp_path, path)
+    return path
+
+
+def drop_partition(name: str) -> None:
+    """Desanexa e remove uma partição (operação de metadata)."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{PARENT_TABLE}" DETACH PARTITION "{name}"')
+        cursor.execute(f'DROP TABLE "{name}"')
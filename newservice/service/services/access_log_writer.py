@@ -0,0 +1,363 @@
+"""
+Escrita em lote da auditoria de acessos a CVs (``CVAccessLog``).
+
+Nos modos em lote os acessos são acumulados em memória e inseridos com
+``bulk_create`` por uma thread em background quando o buffer atinge
+``CV_ACCESS_LOG_BATCH_SIZE`` entradas ou a cada
+``CV_ACCESS_LOG_FLUSH_INTERVAL`` segundos, sem INSERT no caminho do pedido.
+O buffer é escrito também quando o processo termina (``atexit``).
+
+Modos (``CV_ACCESS_LOG_MODE``):
+
+- ``sync`` (default): um INSERT por pedido, sem buffer;
+- ``buffered``: apenas em memória; um lote que falhe é gravado num journal
+  em ``CV_ACCESS_LOG_JOURNAL_DIR`` para ser reenviado, mas um crash ou
+  SIGKILL do processo perde os acessos ainda no buffer;
+- ``durable``: cada acesso é também acrescentado ao journal do lote antes
+  de o pedido terminar, pelo que sobrevive a um crash do processo.
+
+Os journals pendentes (lotes falhados ou de processos que terminaram sem
+flush) são reenviados periodicamente pelo worker e por
+``python manage.py flush_access_log``. Cada entrada tem um UUID gerado no
+acesso (UUIDv7) e os INSERTs ignoram conflitos, por isso reenviar é idempotente.
+
+Cada lote atualiza também, na mesma transação, as contagens agregadas de
+visualizações (``services.view_rollups``).
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from service.ids import uuid7
+from service.models import Curriculo, CVAccessLog
+from service.services.access_log_partitions import ensure_partitions_for
+from service.services.view_rollups import apply_view_rollups
+
+logger = logging.getLogger(__name__)
+
+MODE_SYNC = "sync"
+MODE_BUFFERED = "buffered"
+MODE_DURABLE = "durable"
+
+# intervalo mínimo entre tentativas de reenvio de journals pelo worker
+REPLAY_INTERVAL = 60
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_wakeup = threading.Event()
+_worker = None
+_buffer = []
+# journal do lote atual no modo durable: (caminho, ficheiro)
+_segment = None
+
+
+def _reset_after_fork() -> None:
+    # o buffer e o journal pertencem ao processo pai, que os escreve
+    global _lock, _flush_lock, _wakeup, _worker, _buffer, _segment
+    _lock = threading.Lock()
+    _flush_lock = threading.Lock()
+    _wakeup = threading.Event()
+    _worker = None
+    _buffer = []
+    _segment = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _mode() -> str:
+    return getattr(settings, "CV_ACCESS_LOG_MODE", MODE_SYNC)
+
+
+def _journal_dir() -> str:
+    return settings.CV_ACCESS_LOG_JOURNAL_DIR
+
+
+def _journal_path(suffix: str) -> str:
+    return os.path.join(_journal_dir(), f"access-{os.getpid()}-{uuid.uuid4().hex}{suffix}")
+
+
+def _to_line(entry: CVAccessLog) -> str:
+    return json.dumps({
+        "id": str(entry.id),
+        "curriculo_id": entry.curriculo_id,
+        "user_id": str(entry.accessed_by_user_id),
+        "role": entry.accessed_by_role,
+        "at": entry.accessed_at.isoformat(),
+    }) + "\n"
+
+
+def _from_line(line: str) -> CVAccessLog:
+    data = json.loads(line)
+    return CVAccessLog(
+        id=uuid.UUID(data["id"]),
+        curriculo_id=data["curriculo_id"],
+        accessed_by_user_id=uuid.UUID(data["user_id"]),
+        accessed_by_role=data["role"],
+        accessed_at=datetime.fromisoformat(data["at"]),
+    )
+
+
+def _append(file, entries) -> None:
+    file.writelines(_to_line(entry) for entry in entries)
+    file.flush()
+
+
+def _spill(entries) -> None:
+    """Grava um lote num journal ``.pending`` para reenvio."""
+    os.makedirs(_journal_dir(), exist_ok=True)
+    with open(_journal_path(".pending"), "a", encoding="utf-8") as fh:
+        _append(fh, entries)
+
+
+def record_accesses(curriculo_ids, user_id, user_role) -> None:
+    """
+    Regista o acesso de ``user_id`` a cada CV de ``curriculo_ids``.
+
+    Nos modos ``buffered``/``durable`` as entradas só chegam à base de dados
+    no próximo flush (até ``CV_ACCESS_LOG_FLUSH_INTERVAL`` segundos depois).
+    """
+    global _segment
+    now = timezone.now()
+    entries = [
+        CVAccessLog(
+            id=uuid7(),
+            curriculo_id=curriculo_id,
+            accessed_by_user_id=user_id,
+            accessed_by_role=user_role,
+            accessed_at=now,
+        )
+        for curriculo_id in curriculo_ids
+    ]
+    if not entries:
+        return
+
+    mode = _mode()
+    if mode == MODE_SYNC:
+        _insert(entries)
+        return
+
+    with _lock:
+        if mode == MODE_DURABLE:
+            if _segment is None:
+                os.makedirs(_journal_dir(), exist_ok=True)
+                path = _journal_path(".jsonl")
+                _segment = (path, open(path, "a", encoding="utf-8"))
+            _append(_segment[1], entries)
+        _buffer.extend(entries)
+        pending = len(_buffer)
+
+    _ensure_worker()
+    if pending >= getattr(settings, "CV_ACCESS_LOG_BATCH_SIZE", 500):
+        _wakeup.set()
+
+
+def record_access(curriculo_id, user_id, user_role) -> None:
+    """Regista o acesso de ``user_id`` a um CV (ver ``record_accesses``)."""
+    record_accesses([curriculo_id], user_id, user_role)
+
+
+def _not_inserted(entries) -> list:
+    """Entradas de um journal reenviado que ainda não estão em ``CVAccessLog``."""
+    existing = set()
+    for start in range(0, len(entries), 1000):
+        chunk = entries[start:start + 1000]
+        times = [entry.accessed_at for entry in chunk]
+        existing.update(
+            CVAccessLog.objects.filter(
+                id__in=[entry.id for entry in chunk],
+                # limita a consulta às partições do período do journal
+                accessed_at__gte=min(times),
+                accessed_at__lte=max(times),
+            ).values_list("id", flat=True)
+        )
+    return [entry for entry in entries if entry.id not in existing]
+
+
+def _missing_partition(exc: IntegrityError) -> bool:
+    """True se o INSERT falhou por não haver partição para ``accessed_at``."""
+    return "no partition of relation" in str(exc)
+
+
+def _insert(entries, replay=False) -> None:
+    """
+    INSERT em lote e atualização dos rollups de visualizações, numa transação.
+
+    Nos reenvios (``replay``) as entradas já inseridas são ignoradas, para não
+    serem contadas duas vezes. Entradas de CVs entretanto eliminados são
+    descartadas. Se faltar a partição do mês (``access_log_partitions`` não
+    agendado), é criada e o INSERT repetido.
+    """
+    try:
+        _insert_batch(entries, replay)
+    except IntegrityError as exc:
+        if not _missing_partition(exc):
+            raise
+        ensure_partitions_for(entry.accessed_at for entry in entries)
+        _insert_batch(entries, replay)
+
+
+def _insert_batch(entries, replay) -> None:
+    with transaction.atomic():
+        if replay:
+            entries = _not_inserted(entries)
+        try:
+            with transaction.atomic():
+                CVAccessLog.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+        except IntegrityError as exc:
+            if _missing_partition(exc):
+                raise
+            existing = set(
+                Curriculo.objects.filter(id__in={entry.curriculo_id for entry in entries})
+                .values_list("id", flat=True)
+            )
+            entries = [entry for entry in entries if entry.curriculo_id in existing]
+            CVAccessLog.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+        apply_view_rollups(entries)
+
+
+def flush() -> int:
+    """
+    Insere as entradas em buffer deste processo.
+
+    Se o INSERT falhar, o lote fica num journal ``.pending`` para reenvio.
+
+    Returns:
+        int: Número de entradas inseridas.
+    """
+    global _buffer, _segment
+    with _flush_lock:
+        with _lock:
+            batch, _buffer = _buffer, []
+            segment, _segment = _segment, None
+
+        if segment is not None:
+            segment[1].close()
+        if not batch:
+            if segment is not None:
+                os.remove(segment[0])
+            return 0
+
+        try:
+            _insert(batch)
+        except Exception as exc:
+            logger.warning("[AccessLog] Falha ao inserir %s acessos (guardados para reenvio): %s", len(batch), exc)
+            try:
+                if segment is not None:
+                    os.replace(segment[0], _journal_path(".pending"))
+                else:
+                    _spill(batch)
+            except OSError:
+                logger.exception("[AccessLog] %s acessos perdidos: journal indisponível", len(batch))
+            return 0
+
+        if segment is not None:
+            os.remove(segment[0])
+        return len(batch)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _replayable(name: str) -> bool:
+    if not name.startswith("access-"):
+        return False
+    if name.endswith(".pending"):
+        return True
+    # journals ativos (.jsonl) ou reenvios (.replaying) de processos que já terminaram
+    try:
+        pid = int(name.split("-")[1])
+    except (IndexError, ValueError):
+        return False
+    return pid != os.getpid() and not _pid_alive(pid)
+
+
+def replay_journals() -> tuple[int, int]:
+    """
+    Reenvia os journals pendentes da diretoria ``CV_ACCESS_LOG_JOURNAL_DIR``.
+
+    Cada ficheiro é reclamado com um rename antes do INSERT, pelo que
+    processos concorrentes não o reenviam em simultâneo.
+
+    Returns:
+        tuple: (entradas inseridas, ficheiros que falharam)
+    """
+    try:
+        names = sorted(os.listdir(_journal_dir()))
+    except FileNotFoundError:
+        return 0, 0
+
+    inserted = failed = 0
+    for name in filter(_replayable, names):
+        path = os.path.join(_journal_dir(), name)
+        claimed = _journal_path(".replaying")
+        try:
+            os.replace(path, claimed)
+        except FileNotFoundError:
+            continue
+
+        entries = []
+        with open(claimed, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entries.append(_from_line(line))
+                except (ValueError, KeyError):
+                    # última linha incompleta de um processo interrompido
+                    logger.warning("[AccessLog] Linha inválida ignorada em %s", name)
+
+        try:
+            if entries:
+                _insert(entries, replay=True)
+        except Exception as exc:
+            failed += 1
+            logger.warning("[AccessLog] Falha ao reenviar %s: %s", name, exc)
+            os.replace(claimed, _journal_path(".pending"))
+            continue
+
+        os.remove(claimed)
+        inserted += len(entries)
+    return inserted, failed
+
+
+def _run_worker() -> None:
+    interval = getattr(settings, "CV_ACCESS_LOG_FLUSH_INTERVAL", 1.0)
+    last_replay = 0.0
+    while True:
+        _wakeup.wait(interval)
+        _wakeup.clear()
+        try:
+            # a ligação é reutilizada entre flushes; fechada se inválida
+            close_old_connections()
+            flush()
+            if time.monotonic() - last_replay >= REPLAY_INTERVAL:
+                last_replay = time.monotonic()
+                replay_journals()
+        except Exception:
+            logger.exception("[AccessLog] Erro inesperado no flush da auditoria")
+
+
+def _ensure_worker() -> None:
+    global _worker
+    if _worker is None:
+        with _lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_run_worker, name="access-log", daemon=True)
+                _worker.start()
+                atexit.register(flush)
@@ -0,0 +1,118 @@
+"""
+Filtro de Bloom com os ids de ``utilizador`` conhecidos.
+
+Permite rejeitar em memória X-User-ID que certamente não existem (sem
+falsos negativos para ids presentes no último rebuild), evitando que
+ids aleatórios gerem consultas ao backend de roles.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom simples sobre um ``bytearray``.
+
+    Args:
+        capacity (int): Número esperado de elementos.
+        error_rate (float): Taxa de falsos positivos pretendida.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # double hashing: h1 + i*h2 a partir de um único digest de 128 bits
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class KnownUserFilter:
+    """
+    Filtro de Bloom de ids de utilizador, reconstruído periodicamente.
+
+    O rebuild corre numa thread em background quando o filtro tem mais de
+    ``refresh_seconds``; enquanto não existir um filtro construído, todos
+    os ids são considerados possíveis.
+
+    Args:
+        loader: Callable que devolve um iterável com os ids (str) conhecidos.
+        refresh_seconds (float): Intervalo entre rebuilds.
+        error_rate (float): Taxa de falsos positivos do filtro.
+    """
+
+    def __init__(self, loader, refresh_seconds: float = 60, error_rate: float = 0.01):
+        self.loader = loader
+        self.refresh_seconds = refresh_seconds
+        self.error_rate = error_rate
+        self._filter = None
+        self._built_at = None
+        self._rebuilding = threading.Lock()
+
+    def rebuild(self) -> None:
+        """Reconstrói o filtro a partir do loader (bloqueante)."""
+        ids = [str(user_id).lower() for user_id in self.loader()]
+        # folga para utilizadores adicionados entre rebuilds
+        new_filter = BloomFilter(int(len(ids) * 1.2) + 1000, self.error_rate)
+        for user_id in ids:
+            new_filter.add(user_id)
+
+        self._filter = new_filter
+        self._built_at = time.monotonic()
+        logger.info("[RoleCache] Filtro de utilizadores reconstruído (%s ids)", len(ids))
+
+    def _rebuild_in_background(self) -> None:
+        if not self._rebuilding.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.rebuild()
+            except Exception as e:
+                logger.warning("[RoleCache] Falha ao reconstruir filtro de utilizadores: %s", e)
+                # evita tentar de novo a cada pedido enquanto a BD estiver em baixo
+                self._built_at = time.monotonic()
+            finally:
+                connection.close()
+                self._rebuilding.release()
+
+        threading.Thread(target=run, name="known-user-filter", daemon=True).start()
+
+    def add(self, user_id) -> None:
+        """Adiciona um id ao filtro atual (e.g. utilizador acabado de criar)."""
+        if self._filter is not None:
+            self._filter.add(str(user_id).lower())
+
+    def might_exist(self, user_id) -> bool:
+        """
+        False apenas se o id certamente não existia no último rebuild.
+        """
+        if self._built_at is None or time.monotonic() - self._built_at > self.refresh_seconds:
+            self._rebuild_in_background()
+
+        current = self._filter
+        if current is None:
+            return True
+        return str(user_id).lower() in current
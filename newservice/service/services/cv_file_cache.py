@@ -0,0 +1,161 @@
+"""
+Cache local em disco dos PDFs dos CVs (GET /curriculo/{id}/file/).
+
+As entradas são endereçadas pelo SHA-256 do conteúdo
+(``CV_FILE_CACHE_DIR/<sha256>.pdf``), por isso nunca ficam desatualizadas:
+um PDF substituído no storage (e.g. linearizado) tem outro hash. Num miss o
+ficheiro é descarregado do storage e gravado de forma atómica; misses
+simultâneos do mesmo CV no processo fazem um único download.
+
+O tamanho total é limitado a ``CV_FILE_CACHE_MAX_SIZE`` bytes com remoção
+LRU: cada hit atualiza o mtime da entrada e, quando o limite é excedido,
+as entradas com mtime mais antigo são removidas até 90% do limite. A
+diretoria pode ser partilhada pelos workers do mesmo nó.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+
+from service.services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+ENTRY_SUFFIX = ".pdf"
+
+# fração do limite a que a cache é reduzida quando o excede
+EVICTION_TARGET = 0.9
+
+_lock = threading.Lock()
+_cache = None
+
+
+def _reset_after_fork() -> None:
+    global _lock, _cache
+    _lock = threading.Lock()
+    _cache = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class CVFileCache:
+    """
+    Cache LRU de ficheiros em disco, endereçada por SHA-256 do conteúdo.
+
+    Args:
+        directory (str): Diretoria das entradas.
+        max_size (int): Tamanho total máximo em bytes.
+    """
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # tamanho total estimado; None até ao primeiro scan da diretoria
+        self._size = None
+        self._fills = SingleFlight()
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.directory, f"{content_hash}{ENTRY_SUFFIX}")
+
+    def open(self, content_hash: str):
+        """Abre a entrada (``rb``) e marca-a como usada, ou None se não existir."""
+        path = self._path(content_hash)
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return file
+
+    def fill(self, key: str, fetch) -> str:
+        """
+        Grava na cache o conteúdo devolvido por ``fetch()``.
+
+        Chamadas simultâneas com a mesma ``key`` partilham um único ``fetch``.
+
+        Returns:
+            str: SHA-256 do conteúdo (abrir com ``open``).
+        """
+        return self._fills.do(key, self._fill, fetch)
+
+    def _fill(self, fetch) -> str:
+        data = fetch()
+        content_hash = hashlib.sha256(data).hexdigest()
+
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(data)
+            os.replace(tmp_path, self._path(content_hash))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        self._account(len(data))
+        return content_hash
+
+    def _account(self, added: int) -> None:
+        with self._lock:
+            if self._size is None:
+                # o scan já inclui a entrada acabada de gravar
+                self._size = self._scan_size()
+            else:
+                self._size += added
+            if self._size > self.max_size:
+                self._size = self._evict()
+
+    def _entries(self):
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(ENTRY_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, entry.path
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> int:
+        """Remove as entradas menos usadas até ``EVICTION_TARGET``; devolve o tamanho final."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_size * EVICTION_TARGET
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                # quem já tem a entrada aberta continua a lê-la
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        logger.info("[CVFileCache] %s entradas removidas (%s bytes em cache)", removed, total)
+        return total
+
+
+def get_cv_file_cache() -> CVFileCache:
+    """Cache de ficheiros de CVs partilhada do processo."""
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = CVFileCache(
+                    settings.CV_FILE_CACHE_DIR,
+                    getattr(settings, "CV_FILE_CACHE_MAX_SIZE", 1024 * 1024 * 1024),
+                )
+    return _cache
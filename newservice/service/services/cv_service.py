@@ -2,25 +2,82 @@
 Service layer para operações de Currículo (CV).
 Separa lógica de negócio das views.
 """
+import logging
+import time
+
+from django.conf import settings
+from django.db.models import Q
 from rest_framework.response import Response
 from rest_framework import status
 
-from service.models import CVAccessLog, CV_STATUS_LABELS
+from service.models import Curriculo, CVPreview, CV_STATUS_LABELS
 from service.serializers import CVSignedUrlSerializer
-from service.services.storage_service import SupabaseStorageService
-from service.services.exceptions import StorageSignedUrlException
+from service.services.access_log_writer import record_access, record_accesses
+from service.services.cv_file_cache import get_cv_file_cache
+from service.services.local_cache import LocalTTLCache
+from service.services.storage_service import get_storage_service
+from service.services.exceptions import StorageSignedUrlException, StorageDownloadException
+
+logger = logging.getLogger(__name__)
+
+# URLs assinadas reutilizadas entre pedidos: (bucket, path, expiração) -> (url, expires_at)
+signed_url_cache = LocalTTLCache(
+    max_size=getattr(settings, "SIGNED_URL_CACHE_MAX_SIZE", 5000),
+    ttl=getattr(settings, "SIGNED_URL_EXPIRATION", 900),
+)
 
 
 class CVService:
     """Service para operações relacionadas com CVs."""
     
     def __init__(self):
-        self.storage_service = SupabaseStorageService()
+        self.storage_service = get_storage_service()
         self.bucket_name = "cvs"
+        self.expiration_seconds = getattr(settings, "SIGNED_URL_EXPIRATION", 900)
+        self.cache_margin = getattr(settings, "SIGNED_URL_CACHE_MARGIN", 300)
     
-    def get_signed_url_for_curriculo(self, curriculo, user_id, user_role):
+    def _get_cached_signed_url(self, file_path):
+        """Devolve (signed_url, expires_in_seconds) da cache ou None."""
+        cached = signed_url_cache.get((self.bucket_name, file_path, self.expiration_seconds))
+        if cached is None:
+            return None
+        signed_url, expires_at = cached
+        return signed_url, int(expires_at - time.time())
+
+    def _cache_signed_url(self, file_path, signed_url, expires_at):
+        """Guarda a URL enquanto lhe restar mais do que a margem de segurança."""
+        reusable_for = self.expiration_seconds - self.cache_margin
+        if reusable_for > 0:
+            signed_url_cache.set(
+                (self.bucket_name, file_path, self.expiration_seconds),
+                (signed_url, expires_at),
+                ttl=reusable_for,
+            )
+
+    def _get_signed_url(self, file_path):
         """
-        Gera URL assinada para um CV e registra auditoria.
+        Devolve (signed_url, expires_in_seconds) para ``file_path``.
+
+        Reutiliza uma URL em cache enquanto lhe restar mais do que
+        ``SIGNED_URL_CACHE_MARGIN`` segundos; caso contrário gera uma nova.
+        """
+        cached = self._get_cached_signed_url(file_path)
+        if cached is not None:
+            return cached
+
+        expires_at = time.time() + self.expiration_seconds
+        signed_url = self.storage_service.get_signed_url(
+            bucket_name=self.bucket_name,
+            file_path=file_path,
+            expiration_seconds=self.expiration_seconds
+        )
+        self._cache_signed_url(file_path, signed_url, expires_at)
+
+        return signed_url, self.expiration_seconds
+
+    def get_signed_url_with_expiry(self, curriculo, user_id, user_role):
+        """
+        Gera (ou reutiliza) URL assinada para um CV e registra auditoria.
         
         Args:
             curriculo: Instância de Curriculo
@@ -28,25 +85,84 @@ class CVService:
             user_role: Role do utilizador (0=CR, 1=Empresa, 2=Estudante)
         
         Returns:
-            str: URL assinada ou None em caso de erro
+            tuple: (URL assinada, segundos até expirar) ou (None, None) em caso de erro
         """
         if not curriculo.file:
-            return None
+            return None, None
         
         try:
-            signed_url = self.storage_service.get_signed_url(
-                bucket_name=self.bucket_name,
-                file_path=curriculo.file,
-                expiration_seconds=900
-            )
+            signed_url, expires_in = self._get_signed_url(curriculo.file)
             
-            # Registar acesso na auditoria
+            # Registar acesso na auditoria (também quando a URL vem da cache)
             self._log_cv_access(curriculo, user_id, user_role)
             
-            return signed_url
+            return signed_url, expires_in
         except (StorageSignedUrlException, Exception):
-            return None
+            return None, None
+
+    def get_signed_url_for_curriculo(self, curriculo, user_id, user_role):
+        """
+        Gera URL assinada para um CV e registra auditoria.
+        
+        Args:
+            curriculo: Instância de Curriculo
+            user_id: UUID do utilizador
+            user_role: Role do utilizador (0=CR, 1=Empresa, 2=Estudante)
+        
+        Returns:
+            str: URL assinada ou None em caso de erro
+        """
+        signed_url, _ = self.get_signed_url_with_expiry(curriculo, user_id, user_role)
+        return signed_url
     
+    def get_signed_urls_for_curriculos(self, curriculos, user_id, user_role):
+        """
+        Gera URLs assinadas para vários CVs e registra a auditoria em lote.
+
+        URLs em cache são reutilizadas; as restantes são pedidas ao storage
+        numa única chamada e a auditoria é escrita com um único INSERT.
+
+        Args:
+            curriculos: Iterável de instâncias de Curriculo (já autorizadas)
+            user_id: UUID do utilizador
+            user_role: Role do utilizador (0=CR, 1=Empresa, 2=Estudante)
+
+        Returns:
+            dict: curriculo.id -> (URL assinada, segundos até expirar).
+            CVs sem ficheiro ou cuja URL falhou não são incluídos.
+        """
+        curriculos = [c for c in curriculos if c.file]
+        results = {}
+        by_path = {}
+
+        for curriculo in curriculos:
+            cached = self._get_cached_signed_url(curriculo.file)
+            if cached is not None:
+                results[curriculo.id] = cached
+            else:
+                by_path.setdefault(curriculo.file, []).append(curriculo)
+
+        if by_path:
+            expires_at = time.time() + self.expiration_seconds
+            try:
+                urls = self.storage_service.get_signed_urls(
+                    bucket_name=self.bucket_name,
+                    file_paths=list(by_path),
+                    expiration_seconds=self.expiration_seconds,
+                )
+            except StorageSignedUrlException:
+                urls = {}
+
+            for path, signed_url in urls.items():
+                self._cache_signed_url(path, signed_url, expires_at)
+                for curriculo in by_path.get(path, []):
+                    results[curriculo.id] = (signed_url, self.expiration_seconds)
+
+        self._log_cv_accesses(
+            [c for c in curriculos if c.id in results], user_id, user_role
+        )
+        return results
+
     def generate_signed_url_response(self, curriculo, user_id, user_role):
         """
         Gera Response completa com URL assinada e metadata do CV.
@@ -67,7 +183,7 @@ class CVService:
             )
         
         # Gerar signed URL (já registra auditoria)
-        signed_url = self.get_signed_url_for_curriculo(curriculo, user_id, user_role)
+        signed_url, expires_in = self.get_signed_url_with_expiry(curriculo, user_id, user_role)
         
         if not signed_url:
             return Response(
@@ -82,15 +198,94 @@ class CVService:
             "status": curriculo.status,
             "status_label": CV_STATUS_LABELS.get(curriculo.status, 'desconhecido'),
             "validated_date": curriculo.validated_date,
-            "expires_in_seconds": 900
+            "expires_in_seconds": expires_in
         }
         
         serializer = CVSignedUrlSerializer(response_data)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
+    def get_stored_sha256(self, curriculo):
+        """
+        SHA-256 do PDF atualmente no storage, ou None se for desconhecido.
+
+        Usa o hash registado pelo pipeline pós-upload (que difere do ficheiro
+        submetido se o PDF foi linearizado) e, na falta dele, o do upload.
+        """
+        try:
+            stored = curriculo.preview.stored_sha256
+        except CVPreview.DoesNotExist:
+            stored = None
+        return stored or curriculo.file_sha256
+
+    def _stored_is_original(self, curriculo):
+        """
+        True se o objeto no storage é de certeza o ficheiro submetido.
+
+        Um PDF linearizado tem outro hash, que pertence a
+        ``CVPreview.stored_sha256`` e não a ``Curriculo.file_sha256``. Sem
+        pré-visualização e com ``CV_LINEARIZE_ENABLED`` o pipeline pode já ter
+        reescrito o objeto, por isso o resultado é False.
+        """
+        try:
+            return not curriculo.preview.linearized
+        except CVPreview.DoesNotExist:
+            return not getattr(settings, "CV_LINEARIZE_ENABLED", False)
+
+    def open_cv_file(self, curriculo, user_id, user_role, log_access=True):
+        """
+        Abre o PDF de um CV a partir da cache local em disco e registra auditoria.
+
+        Num miss (ou com hash desconhecido) o ficheiro é descarregado do
+        storage e guardado na cache; um hash desconhecido fica registado em
+        ``Curriculo.file_sha256`` se o objeto não tiver sido linearizado.
+
+        Args:
+            curriculo: Instância de Curriculo (já autorizada)
+            user_id: UUID do utilizador
+            user_role: Role do utilizador (0=CR, 1=Empresa)
+            log_access: False para não registar o acesso (e.g. pedidos byte-range seguintes)
+
+        Returns:
+            tuple: (ficheiro aberto em modo binário, SHA-256 do conteúdo)
+
+        Erros:
+            StorageDownloadException: Se o download do storage falhar.
+        """
+        if not curriculo.file:
+            raise StorageDownloadException("Caminho do ficheiro não configurado")
+
+        cache = get_cv_file_cache()
+        content_hash = self.get_stored_sha256(curriculo)
+        file = cache.open(content_hash) if content_hash else None
+
+        if file is None:
+            content_hash = cache.fill(
+                content_hash or f"{self.bucket_name}/{curriculo.file}",
+                lambda: self.storage_service.download_file(self.bucket_name, curriculo.file),
+            )
+            file = cache.open(content_hash)
+            if file is None:
+                raise StorageDownloadException(f"Entrada removida da cache: {content_hash}")
+            if not curriculo.file_sha256 and self._stored_is_original(curriculo):
+                # CV sem hash conhecido (anterior ao registo do SHA-256): o
+                # objeto guardado é o ficheiro submetido, pelo que o hash do
+                # download passa a ser o do CV e os pedidos seguintes são hits
+                # na cache
+                Curriculo.objects.filter(
+                    Q(file_sha256__isnull=True) | Q(file_sha256=""), pk=curriculo.pk
+                ).update(file_sha256=content_hash)
+                curriculo.file_sha256 = content_hash
+
+        if log_access:
+            self._log_cv_access(curriculo, user_id, user_role)
+        return file, content_hash
+
     def _log_cv_access(self, curriculo, user_id, user_role):
         """
         Registra acesso ao CV na tabela de auditoria.
+
+        Ver ``access_log_writer``: INSERT no pedido por omissão, em lote com
+        ``CV_ACCESS_LOG_MODE`` ``"buffered"``/``"durable"``.
         
         Args:
             curriculo: Instância de Curriculo
@@ -98,12 +293,43 @@ class CVService:
             user_role: Role do utilizador
         """
         try:
-            CVAccessLog.objects.create(
-                curriculo=curriculo,
-                accessed_by_user_id=user_id,
-                accessed_by_role=user_role
-            )
+            record_access(curriculo.id, user_id, user_role)
         except Exception:
             # Log falhou, mas não impede visualização
-            # Em produção, considere alertar/logar
-            pass
+            logger.exception("[AccessLog] Falha ao registar acesso ao curriculo_id=%s", curriculo.id)
+
+    def _log_cv_accesses(self, curriculos, user_id, user_role):
+        """
+        Registra acessos a vários CVs na tabela de auditoria (ver ``_log_cv_access``).
+
+        Args:
+            curriculos: Lista de instâncias de Curriculo
+            user_id: UUID do utilizador
+            user_role: Role do utilizador
+        """
+        try:
+            record_accesses([curriculo.id for curriculo in curriculos], user_id, user_role)
+        except Exception:
+            # Log falhou, mas não impede visualização
+            logger.exception("[AccessLog] Falha ao registar %s acessos", len(curriculos))
+
+    def find_duplicate_cv(self, estudante, file_sha256):
+        """
+        Procura um CV do estudante com o mesmo conteúdo (SHA-256).
+
+        Usa o índice (estudante, file_sha256); permite responder a uma
+        resubmissão idêntica sem novo upload para o storage.
+
+        Args:
+            estudante: Instância de Estudante
+            file_sha256: Digest SHA-256 (hex) do ficheiro submetido
+
+        Returns:
+            Curriculo | None: CV existente com o mesmo conteúdo.
+        """
+        if not file_sha256:
+            return None
+        return Curriculo.objects.filter(
+            estudante_utilizador_auth_user_supabase_field=estudante,
+            file_sha256=file_sha256,
+        ).order_by('-id').first()
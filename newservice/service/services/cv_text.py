@@ -0,0 +1,230 @@
+"""
+Pipeline pós-upload dos CVs: texto para pesquisa e pré-visualização.
+
+Após o upload, ``schedule_indexing`` agenda (fora do pedido) o download do
+PDF e a sua análise num pool de processos:
+
+- o texto e o respetivo ``tsvector`` são guardados em ``CVSearchDocument``
+  (filtro ``?q=`` em /curriculo/, servido apenas pelo índice GIN);
+- a imagem da primeira página e a metadata (páginas, tamanho, texto) são
+  guardadas em ``CVPreview`` (GET /curriculo/{id}/thumbnail/);
+- com ``CV_LINEARIZE_ENABLED``, o PDF é antes reescrito linearizado e
+  substituído no storage (mesmo caminho), para que os visualizadores
+  mostrem a primeira página sem esperar pelo ficheiro completo.
+
+CVs existentes são processados com ``python manage.py index_cv_text``.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+
+from service.models import Curriculo, CVPreview, CVSearchDocument
+from service.services.exceptions import PdfProcessingTimeoutException
+from service.services.pdf_text import analyse_pdf, linearize_pdf
+from service.services.storage_outbox import enqueue_deletion
+from service.services.storage_service import get_storage_service
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_process_pool = None
+_dispatcher = None
+
+
+def _reset_after_fork() -> None:
+    global _lock, _process_pool, _dispatcher
+    _lock = threading.Lock()
+    _process_pool = None
+    _dispatcher = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        with _lock:
+            if _process_pool is None:
+                # spawn: os filhos não herdam threads nem ligações do processo web
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=getattr(settings, "CV_TEXT_EXTRACTION_WORKERS", 2),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _process_pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Termina os processos de ``pool`` e retira-o de uso.
+
+    Um PDF que excede o timeout continua a ocupar o worker; sem o matar, alguns
+    ficheiros patológicos esgotariam o pool. Os restantes trabalhos em curso
+    nesse pool falham com BrokenProcessPool e são repetidos por ``_run_in_pool``.
+    """
+    global _process_pool
+    with _lock:
+        if _process_pool is pool:
+            _process_pool = None
+    # ProcessPoolExecutor não expõe os processos (kill() só existe em 3.14)
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        if process.is_alive():
+            process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_in_pool(fn, *args):
+    """
+    Executa ``fn(*args)`` no pool de processos com ``CV_TEXT_EXTRACTION_TIMEOUT``.
+
+    Erros:
+        PdfProcessingTimeoutException: O trabalho excedeu o timeout (o pool é
+        terminado e recriado no pedido seguinte).
+    """
+    timeout = getattr(settings, "CV_TEXT_EXTRACTION_TIMEOUT", 60)
+    for attempt in range(2):
+        pool = _get_process_pool()
+        try:
+            return pool.submit(fn, *args).result(timeout=timeout)
+        except TimeoutError:
+            _discard_process_pool(pool)
+            raise PdfProcessingTimeoutException(f"{fn.__name__} excedeu {timeout}s")
+        except BrokenProcessPool:
+            # pool terminado por causa de outro trabalho: repetir uma vez num pool novo
+            _discard_process_pool(pool)
+            if attempt:
+                raise
+
+
+def _get_dispatcher() -> ThreadPoolExecutor:
+    global _dispatcher
+    if _dispatcher is None:
+        with _lock:
+            if _dispatcher is None:
+                _dispatcher = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "CV_TEXT_EXTRACTION_WORKERS", 2),
+                    thread_name_prefix="cv-text",
+                )
+    return _dispatcher
+
+
+def search_config() -> str:
+    """Configuração de text search do Postgres usada no índice e nas pesquisas."""
+    return getattr(settings, "CV_SEARCH_CONFIG", "portuguese")
+
+
+def index_curriculo(curriculo_id: int) -> bool:
+    """
+    Analisa o PDF de um Curriculo: atualiza o ``tsvector`` e a pré-visualização.
+
+    Returns:
+        bool: True se o CV foi processado; False se já não existir ou sem ficheiro.
+
+    Erros:
+        StorageDownloadException, PdfProcessingTimeoutException,
+        pypdf.errors.PdfReadError: Propagados ao chamador.
+    """
+    file_path = Curriculo.objects.filter(id=curriculo_id).values_list("file", flat=True).first()
+    if not file_path:
+        return False
+
+    data = get_storage_service().download_file("cvs", file_path)
+
+    linearized = False
+    if getattr(settings, "CV_LINEARIZE_ENABLED", False):
+        rewritten = _run_in_pool(linearize_pdf, data)
+        if rewritten is not None and rewritten != data:
+            if not _replace_stored_pdf(curriculo_id, file_path, rewritten):
+                return False
+            data = rewritten
+        linearized = rewritten is not None
+
+    result = _run_in_pool(
+        analyse_pdf,
+        data,
+        getattr(settings, "CV_TEXT_MAX_PAGES", 20),
+        getattr(settings, "CV_THUMBNAIL_WIDTH", 320),
+    )
+
+    text = result["text"]
+    thumbnail = result["thumbnail"]
+
+    with transaction.atomic():
+        if not Curriculo.objects.filter(id=curriculo_id).exists():
+            return False
+        CVSearchDocument.objects.update_or_create(
+            curriculo_id=curriculo_id, defaults={"content": text}
+        )
+        CVSearchDocument.objects.filter(curriculo_id=curriculo_id).update(
+            search_vector=SearchVector("content", config=search_config())
+        )
+        CVPreview.objects.update_or_create(
+            curriculo_id=curriculo_id,
+            defaults={
+                "page_count": result["page_count"],
+                "file_size": len(data),
+                "text_length": len(text),
+                "thumbnail": thumbnail,
+                "thumbnail_etag": hashlib.sha256(thumbnail).hexdigest() if thumbnail else None,
+                "linearized": linearized,
+                "stored_sha256": hashlib.sha256(data).hexdigest(),
+            },
+        )
+
+    logger.info(
+        "[CVText] curriculo_id=%s processado (%s páginas, %s caracteres)",
+        curriculo_id, result["page_count"], len(text),
+    )
+    return True
+
+
+def _replace_stored_pdf(curriculo_id: int, file_path: str, data: bytes) -> bool:
+    """
+    Substitui o PDF no storage pela versão linearizada.
+
+    ``Curriculo.file_sha256`` mantém o hash do ficheiro submetido. Se o CV
+    for eliminado (ou o ficheiro substituído) durante o envio, o objeto
+    reescrito é removido pelo outbox e devolve False.
+    """
+    content = ContentFile(data)
+    content.sniffed_content_type = settings.ALLOWED_MIME
+    get_storage_service().upload_file(file=content, bucket_name="cvs", file_path=file_path)
+
+    if not Curriculo.objects.filter(id=curriculo_id, file=file_path).exists():
+        logger.info(
+            "[CVText] curriculo_id=%s eliminado durante a linearização; a remover %s",
+            curriculo_id, file_path,
+        )
+        enqueue_deletion("cvs", file_path)
+        return False
+
+    logger.info("[CVText] curriculo_id=%s linearizado (%s bytes)", curriculo_id, len(data))
+    return True
+
+
+def _run(curriculo_id: int) -> None:
+    try:
+        index_curriculo(curriculo_id)
+    except PdfProcessingTimeoutException as exc:
+        logger.error("[CVText] curriculo_id=%s falhou: timeout na análise do PDF (%s)", curriculo_id, exc)
+    except Exception as exc:
+        logger.warning("[CVText] Falha ao indexar curriculo_id=%s: %s", curriculo_id, exc)
+    finally:
+        connection.close()
+
+
+def schedule_indexing(curriculo_id: int) -> None:
+    """Agenda a indexação de um CV em background (após o commit da transação atual)."""
+    if not getattr(settings, "CV_TEXT_EXTRACTION_ENABLED", True):
+        return
+    transaction.on_commit(lambda: _get_dispatcher().submit(_run, curriculo_id))
@@ -8,4 +8,24 @@ class StorageDeleteException(Exception):
 
 class StorageSignedUrlException(Exception):
     """Raised when generating a signed URL fails."""
-    pass
\ No newline at end of file
+    pass
+
+class StorageInfoException(Exception):
+    """Raised when reading object metadata from Supabase Storage fails."""
+    pass
+
+class StorageDownloadException(Exception):
+    """Raised when downloading a file from storage fails."""
+    pass
+
+class StorageListException(Exception):
+    """Raised when listing the objects of a bucket fails."""
+    pass
+
+class InvalidAuthTokenException(Exception):
+    """Raised when a bearer JWT cannot be verified locally."""
+    pass
+
+class PdfProcessingTimeoutException(Exception):
+    """Raised when analysing or rewriting a PDF exceeds the time limit."""
+    pass
@@ -0,0 +1,120 @@
+"""
+Verificação local (offline) de JWTs emitidos pelo Supabase Auth.
+
+A assinatura é validada com uma chave em memória — o segredo HS256 do
+projeto (``SUPABASE_JWT_SECRET``) ou um JWKS lido de ficheiro local
+(``SUPABASE_JWKS_FILE``) — sem qualquer pedido de rede.
+"""
+import json
+import threading
+
+import jwt
+from django.conf import settings
+
+from service.services.exceptions import InvalidAuthTokenException
+
+_SYMMETRIC_ALGORITHMS = ["HS256", "HS384", "HS512"]
+_ASYMMETRIC_ALGORITHMS = ["RS256", "ES256", "EdDSA"]
+
+_jwks_lock = threading.Lock()
+_jwks = None
+
+
+def _load_jwks():
+    """Carrega (uma vez por processo) o JWKS do ficheiro configurado."""
+    global _jwks
+    if _jwks is None:
+        with _jwks_lock:
+            if _jwks is None:
+                with open(settings.SUPABASE_JWKS_FILE, encoding="utf-8") as fh:
+                    _jwks = jwt.PyJWKSet.from_dict(json.load(fh))
+    return _jwks
+
+
+def reload_signing_keys() -> None:
+    """Descarta o JWKS em memória; será relido no próximo pedido (rotação de chaves)."""
+    global _jwks
+    with _jwks_lock:
+        _jwks = None
+
+
+def _get_signing_key(token: str):
+    """
+    Devolve (chave, algoritmos aceites) para o token, a partir do ``alg`` do header.
+
+    HS256/384/512 usam ``SUPABASE_JWT_SECRET``; algoritmos assimétricos exigem
+    um ``kid`` presente no JWKS e só aceitam o algoritmo dessa chave.
+    """
+    header = jwt.get_unverified_header(token)
+    alg = header.get("alg")
+
+    if alg in _SYMMETRIC_ALGORITHMS:
+        secret = getattr(settings, "SUPABASE_JWT_SECRET", None)
+        if not secret:
+            raise InvalidAuthTokenException(f"Token {alg} sem SUPABASE_JWT_SECRET configurado")
+        return secret, [alg]
+
+    if alg not in _ASYMMETRIC_ALGORITHMS:
+        raise InvalidAuthTokenException(f"Algoritmo não suportado: {alg}")
+    if not getattr(settings, "SUPABASE_JWKS_FILE", None):
+        raise InvalidAuthTokenException(f"Token {alg} sem SUPABASE_JWKS_FILE configurado")
+
+    kid = header.get("kid")
+    if not kid:
+        raise InvalidAuthTokenException("Token assimétrico sem kid")
+    for key in _load_jwks().keys:
+        if key.key_id == kid:
+            return key.key, [key.algorithm_name]
+    raise InvalidAuthTokenException(f"kid desconhecido: {kid}")
+
+
+def _get_claim(payload: dict, path: str):
+    """Lê um claim, aceitando caminhos com pontos (e.g. ``app_metadata.tipo``)."""
+    value = payload
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def decode_supabase_jwt(token: str) -> tuple[str, int | None]:
+    """
+    Verifica um JWT do Supabase e devolve (user_id, role).
+
+    Valida assinatura, expiração e audiência (``SUPABASE_JWT_AUDIENCE``) e,
+    se configurado, o emissor (``SUPABASE_JWT_ISSUER``). ``role`` é lido do
+    claim ``SUPABASE_JWT_ROLE_CLAIM`` e é None se o token não o incluir.
+
+    Erros:
+        InvalidAuthTokenException: Se o token for inválido ou expirado.
+    """
+    try:
+        key, algorithms = _get_signing_key(token)
+    except InvalidAuthTokenException:
+        raise
+    except (jwt.PyJWTError, OSError, ValueError, TypeError, KeyError, AttributeError) as exc:
+        # JWKS ilegível ou chave que não se consegue construir: 401, não 500
+        raise InvalidAuthTokenException(f"Chave de assinatura inválida: {exc}") from exc
+
+    try:
+        payload = jwt.decode(
+            token,
+            key=key,
+            algorithms=algorithms,
+            audience=getattr(settings, "SUPABASE_JWT_AUDIENCE", "authenticated"),
+            issuer=getattr(settings, "SUPABASE_JWT_ISSUER", None) or None,
+            options={"require": ["exp", "sub"]},
+            leeway=getattr(settings, "SUPABASE_JWT_LEEWAY", 0),
+        )
+    except (jwt.PyJWTError, ValueError, TypeError) as exc:
+        raise InvalidAuthTokenException(str(exc)) from exc
+
+    role = _get_claim(payload, getattr(settings, "SUPABASE_JWT_ROLE_CLAIM", "user_role"))
+    if role is not None:
+        try:
+            role = int(role)
+        except (TypeError, ValueError):
+            raise InvalidAuthTokenException(f"Claim de role inválido: {role}")
+
+    return payload["sub"], role
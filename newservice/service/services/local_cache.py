@@ -0,0 +1,99 @@
+"""
+Cache local (em memória do processo) com TTL e expulsão LRU.
+
+Thread-safe, limitada em número de entradas e com contadores de
+hits/misses para observabilidade.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LocalTTLCache:
+    """
+    Cache LRU limitada com expiração por entrada.
+
+    Args:
+        max_size (int): Número máximo de entradas. Ao exceder, a entrada
+            usada há mais tempo é removida.
+        ttl (float): Tempo de vida por omissão de cada entrada, em segundos.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """
+        Devolve o valor associado a ``key`` ou ``default`` se não existir
+        ou tiver expirado. Um hit move a entrada para o fim da fila LRU.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        """
+        Guarda ``value`` em ``key``.
+
+        Args:
+            ttl (float | None): TTL desta entrada; usa o TTL da cache se omitido.
+        """
+        if self.max_size <= 0:
+            return
+
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key) -> bool:
+        """Remove ``key`` da cache. Devolve True se a entrada existia."""
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def clear(self) -> None:
+        """Remove todas as entradas (os contadores mantêm-se)."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Devolve um snapshot dos contadores da cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,276 @@
+"""
+Backend de storage em disco local.
+
+Guarda os objetos em ``LOCAL_STORAGE_ROOT/<bucket>/<caminho>`` e serve-os
+através de URLs assinadas com HMAC e expiração
+(``GET /service/files/<bucket>/<caminho>?expires=...&signature=...``),
+respondidas com ``FileResponse`` (sendfile pelo servidor WSGI) ou, se
+configurado, delegadas ao proxy com ``X-Accel-Redirect``/``X-Sendfile``.
+
+Permite correr nós on-prem e testes de carga sem object storage remoto.
+"""
+import mimetypes
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from service.services.exceptions import StorageUploadException, StorageDeleteException, StorageSignedUrlException, StorageInfoException, StorageDownloadException, StorageListException
+from service.services.storage_service import StorageService, StoredObject
+
+SIGNATURE_SALT = "service.local-storage"
+
+# validade dos URLs de upload assinados (igual à do Supabase)
+UPLOAD_URL_EXPIRATION = 2 * 60 * 60
+
+PDF_MAGIC = b"%PDF-"
+
+CHUNK_SIZE = 64 * 1024
+
+
+class LocalStorageService(StorageService):
+    """
+    Storage em sistema de ficheiros local com URLs assinadas (HMAC-SHA256).
+    """
+
+    def __init__(self):
+        self.root = os.path.abspath(settings.LOCAL_STORAGE_ROOT)
+        self.base_url = settings.LOCAL_STORAGE_BASE_URL.rstrip("/")
+
+    # ── caminhos e assinaturas ───────────────────────────────────────
+
+    def path(self, bucket_name: str, file_path: str) -> str:
+        """
+        Caminho absoluto do objeto no disco.
+
+        Erros:
+            ValueError: Se o caminho sair da diretoria do bucket.
+        """
+        bucket_root = os.path.abspath(os.path.join(self.root, bucket_name))
+        full_path = os.path.abspath(os.path.join(bucket_root, file_path))
+        if os.path.dirname(bucket_root) != self.root or not full_path.startswith(bucket_root + os.sep):
+            raise ValueError(f"Caminho inválido: {bucket_name}/{file_path}")
+        return full_path
+
+    @staticmethod
+    def _sign(method: str, bucket_name: str, file_path: str, expires: int) -> str:
+        value = f"{method}\n{bucket_name}/{file_path}\n{expires}"
+        return salted_hmac(
+            SIGNATURE_SALT,
+            value,
+            secret=getattr(settings, "LOCAL_STORAGE_SIGNING_KEY", None) or settings.SECRET_KEY,
+            algorithm="sha256",
+        ).hexdigest()
+
+    def verify_signature(self, method: str, bucket_name: str, file_path: str, expires, signature) -> bool:
+        """True se a assinatura é válida para o método e ainda não expirou."""
+        try:
+            expires = int(expires)
+        except (TypeError, ValueError):
+            return False
+        if not signature or expires < time.time():
+            return False
+        return constant_time_compare(self._sign(method, bucket_name, file_path, expires), signature)
+
+    def _signed_url(self, method: str, bucket_name: str, file_path: str, expiration_seconds: int) -> tuple[str, str]:
+        expires = int(time.time()) + expiration_seconds
+        signature = self._sign(method, bucket_name, file_path, expires)
+        query = urlencode({"expires": expires, "signature": signature})
+        url = f"{self.base_url}/{quote(bucket_name)}/{quote(file_path)}?{query}"
+        return url, signature
+
+    # ── interface StorageService ─────────────────────────────────────
+
+    def _write_atomic(self, bucket_name: str, file_path: str, chunks) -> int:
+        """Grava ``chunks`` num ficheiro temporário e faz rename para o destino."""
+        destination = self.path(bucket_name, file_path)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(destination), suffix=".part")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in chunks:
+                    size += len(chunk)
+                    out.write(chunk)
+            os.replace(tmp_path, destination)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return size
+
+    def upload_file(self, file, bucket_name: str, file_path: str) -> str:
+        """
+        Grava o ficheiro de forma atómica (ficheiro temporário + rename).
+
+        Erros:
+            StorageUploadException: Se o ficheiro for nulo ou a escrita falhar.
+        """
+        if not file:
+            raise StorageUploadException("Ficheiro nulo")
+
+        try:
+            if hasattr(file, "temporary_file_path"):
+                with open(file.temporary_file_path(), "rb") as src:
+                    self._write_atomic(bucket_name, file_path, iter(lambda: src.read(CHUNK_SIZE), b""))
+            else:
+                file.seek(0)
+                self._write_atomic(bucket_name, file_path, file.chunks())
+        except Exception as exc:
+            raise StorageUploadException(str(exc)) from exc
+
+        return file_path
+
+    def write_stream(self, bucket_name: str, file_path: str, stream, max_size: int) -> int:
+        """
+        Grava um stream (corpo de um PUT) de forma atómica, até ``max_size`` bytes.
+
+        Devolve o número de bytes escritos.
+
+        Erros:
+            StorageUploadException: Se exceder ``max_size`` ou a escrita falhar.
+        """
+        def limited_chunks():
+            received = 0
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                received += len(chunk)
+                if received > max_size:
+                    raise StorageUploadException("O ficheiro excede o tamanho máximo permitido")
+                yield chunk
+
+        try:
+            return self._write_atomic(bucket_name, file_path, limited_chunks())
+        except StorageUploadException:
+            raise
+        except Exception as exc:
+            raise StorageUploadException(str(exc)) from exc
+
+    def delete_file(self, bucket_name: str, file_path: str) -> None:
+        """
+        Erros:
+            StorageDeleteException: Se o ficheiro não existir ou não puder ser apagado.
+        """
+        try:
+            os.remove(self.path(bucket_name, file_path))
+        except (OSError, ValueError) as exc:
+            raise StorageDeleteException(str(exc)) from exc
+
+    def delete_files(self, bucket_name: str, file_paths: list[str]) -> None:
+        """
+        Erros:
+            StorageDeleteException: Se algum ficheiro existente não puder ser apagado.
+        """
+        for file_path in file_paths:
+            try:
+                os.remove(self.path(bucket_name, file_path))
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as exc:
+                raise StorageDeleteException(str(exc)) from exc
+
+    def get_signed_url(self, bucket_name: str, file_path: str, expiration_seconds: int = 900) -> str:
+        """
+        Erros:
+            StorageSignedUrlException: Se o ficheiro não existir.
+        """
+        try:
+            if not os.path.isfile(self.path(bucket_name, file_path)):
+                raise StorageSignedUrlException(f"Object not found: {file_path}")
+        except ValueError as exc:
+            raise StorageSignedUrlException(str(exc)) from exc
+        return self._signed_url("GET", bucket_name, file_path, expiration_seconds)[0]
+
+    def get_signed_urls(self, bucket_name: str, file_paths: list[str], expiration_seconds: int = 900) -> dict[str, str]:
+        urls = {}
+        for file_path in file_paths:
+            try:
+                urls[file_path] = self.get_signed_url(bucket_name, file_path, expiration_seconds)
+            except StorageSignedUrlException:
+                continue
+        return urls
+
+    def create_signed_upload_url(self, bucket_name: str, file_path: str) -> dict:
+        """
+        URL para ``PUT /service/files/<bucket>/<caminho>`` com validade de 2 horas.
+        """
+        try:
+            self.path(bucket_name, file_path)
+        except ValueError as exc:
+            raise StorageSignedUrlException(str(exc)) from exc
+        url, signature = self._signed_url("PUT", bucket_name, file_path, UPLOAD_URL_EXPIRATION)
+        return {"signed_url": url, "token": signature, "path": file_path}
+
+    def get_file_info(self, bucket_name: str, file_path: str) -> dict | None:
+        """
+        O content type é detetado pelo conteúdo (PDF) ou, em alternativa,
+        pela extensão do ficheiro.
+
+        Erros:
+            StorageInfoException: Se o stat falhar por outro motivo.
+        """
+        try:
+            full_path = self.path(bucket_name, file_path)
+            size = os.stat(full_path).st_size
+            with open(full_path, "rb") as fh:
+                header = fh.read(len(PDF_MAGIC))
+        except (FileNotFoundError, ValueError):
+            return None
+        except OSError as exc:
+            raise StorageInfoException(str(exc)) from exc
+
+        content_type = "application/pdf" if header == PDF_MAGIC else mimetypes.guess_type(file_path)[0]
+        return {"size": size, "content_type": content_type}
+
+    def download_file(self, bucket_name: str, file_path: str) -> bytes:
+        """
+        Erros:
+            StorageDownloadException: Se o ficheiro não existir ou não puder ser lido.
+        """
+        try:
+            with open(self.path(bucket_name, file_path), "rb") as fh:
+                return fh.read()
+        except (OSError, ValueError) as exc:
+            raise StorageDownloadException(str(exc)) from exc
+
+    def list_files(self, bucket_name: str, prefix: str = "", page_size: int = 1000):
+        """
+        Percorre a diretoria do bucket em profundidade, uma diretoria de cada
+        vez. As entradas de cada diretoria são ordenadas com as subdiretorias
+        como ``nome/``, o que dá a ordem global dos caminhos. Ficheiros
+        temporários de escrita (``.part``) são ignorados.
+
+        Erros:
+            StorageListException: Se o bucket for inválido ou não puder ser lido.
+        """
+        try:
+            bucket_root = os.path.dirname(self.path(bucket_name, "_"))
+        except ValueError as exc:
+            raise StorageListException(str(exc)) from exc
+
+        def walk(directory, relative):
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(
+                        (entry.name + "/" if entry.is_dir(follow_symlinks=False) else entry.name, entry)
+                        for entry in it
+                    )
+            except FileNotFoundError:
+                return
+            for name, entry in entries:
+                path = relative + name
+                if name.endswith("/"):
+                    if prefix.startswith(path) or path.startswith(prefix):
+                        yield from walk(entry.path, path)
+                elif path.startswith(prefix) and not name.endswith(".part"):
+                    stat = entry.stat()
+                    yield StoredObject(
+                        path, stat.st_size, datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+                    )
+
+        try:
+            yield from walk(bucket_root, "")
+        except OSError as exc:
+            raise StorageListException(str(exc)) from exc
@@ -0,0 +1,114 @@
+"""
+Extração de texto, metadata e pré-visualização de PDFs, e linearização.
+
+Corre em processos do pool de ``cv_text`` (fora do processo web), por isso
+não importa Django: recebe bytes e devolve texto/imagens.
+"""
+import io
+import logging
+
+logger = logging.getLogger(__name__)
+
+# limite de texto por CV (o tsvector do Postgres está limitado a 1MB)
+MAX_TEXT_LENGTH = 200_000
+
+
+def _read_text(reader, max_pages: int) -> str:
+    parts = []
+    length = 0
+    for page in reader.pages[:max_pages]:
+        text = page.extract_text() or ""
+        parts.append(text)
+        length += len(text)
+        if length >= MAX_TEXT_LENGTH:
+            break
+
+    # o Postgres não aceita NUL em campos de texto
+    return "\n".join(parts).replace("\x00", " ")[:MAX_TEXT_LENGTH]
+
+
+def extract_pdf_text(data: bytes, max_pages: int = 20) -> str:
+    """
+    Extrai o texto das primeiras ``max_pages`` páginas de um PDF.
+
+    Erros:
+        ImportError: Se o pacote ``pypdf`` não estiver instalado.
+        pypdf.errors.PdfReadError: Se o PDF for inválido.
+    """
+    from pypdf import PdfReader
+
+    return _read_text(PdfReader(io.BytesIO(data)), max_pages)
+
+
+def render_first_page(data: bytes, width: int = 320, quality: int = 70) -> bytes | None:
+    """
+    Renderiza a primeira página como WebP com ``width`` píxeis de largura.
+
+    Devolve None se ``pypdfium2``/``Pillow`` não estiverem instalados ou o
+    PDF não puder ser renderizado.
+    """
+    try:
+        import pypdfium2
+    except ImportError:
+        logger.warning("pypdfium2 não instalado: pré-visualizações de CVs desativadas")
+        return None
+
+    try:
+        pdf = pypdfium2.PdfDocument(data)
+        try:
+            page = pdf[0]
+            scale = width / page.get_width()
+            image = page.render(scale=scale).to_pil()
+        finally:
+            pdf.close()
+    except Exception as exc:
+        logger.warning("Falha ao renderizar a primeira página: %s", exc)
+        return None
+
+    out = io.BytesIO()
+    image.convert("RGB").save(out, format="WEBP", quality=quality)
+    return out.getvalue()
+
+
+def analyse_pdf(data: bytes, max_pages: int = 20, thumbnail_width: int = 320) -> dict:
+    """
+    Texto, número de páginas e pré-visualização da primeira página de um PDF.
+
+    Returns:
+        dict: {"text": str, "page_count": int, "thumbnail": bytes | None}
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    return {
+        "text": _read_text(reader, max_pages),
+        "page_count": len(reader.pages),
+        "thumbnail": render_first_page(data, thumbnail_width) if thumbnail_width else None,
+    }
+
+
+def linearize_pdf(data: bytes) -> bytes | None:
+    """
+    Reescreve o PDF linearizado ("fast web view"): a primeira página e o
+    índice ficam no início do ficheiro, permitindo ao visualizador mostrá-la
+    com os primeiros pedidos byte-range.
+
+    Devolve ``data`` se o PDF já estiver linearizado, ou None se ``pikepdf``
+    não estiver instalado ou o PDF não puder ser reescrito.
+    """
+    try:
+        import pikepdf
+    except ImportError:
+        logger.warning("pikepdf não instalado: linearização de CVs desativada")
+        return None
+
+    try:
+        with pikepdf.open(io.BytesIO(data)) as pdf:
+            if pdf.is_linearized:
+                return data
+            out = io.BytesIO()
+            pdf.save(out, linearize=True)
+    except Exception as exc:
+        logger.warning("Falha ao linearizar o PDF: %s", exc)
+        return None
+    return out.getvalue()
@@ -0,0 +1,246 @@
+"""
+Service layer para resolução de roles de utilizadores (X-User-ID).
+
+Ordem de consulta:
+    0. Validação sintática do UUID e cache negativa de ids inexistentes
+       (e, opcionalmente, filtro de Bloom de ids conhecidos) — sem I/O.
+    1. Cache local do processo (LocalTTLCache).
+    2. Cache partilhada entre workers (SharedRoleCache, opcional).
+    3. Backend de roles (``settings.ROLE_BACKEND``):
+        - "orm": lookup por chave primária em ``Utilizador`` via Django ORM,
+          com fallback para o Supabase se a base de dados falhar;
+        - "supabase": PostgREST (``get_user_role``).
+
+Se o Supabase falhar por erro de rede/infraestrutura e existir uma role
+conhecida na cache partilhada, essa role é servida em vez de um erro 500.
+"""
+import logging
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connection
+
+from service.models import Utilizador
+from service.services.bloom_filter import KnownUserFilter
+from service.services.local_cache import LocalTTLCache
+from service.services.shared_role_cache import SharedRoleCache
+from service.services.single_flight import SingleFlight
+from service.supabase_client import (
+    get_user_role,
+    UserNotFoundError,
+    InvalidUserRoleError,
+)
+
+logger = logging.getLogger(__name__)
+
+role_cache = LocalTTLCache(
+    max_size=getattr(settings, "ROLE_CACHE_MAX_SIZE", 10000),
+    ttl=getattr(settings, "ROLE_CACHE_TTL", 300),
+)
+
+# ids que o backend confirmou não existirem (TTL curto)
+negative_role_cache = LocalTTLCache(
+    max_size=getattr(settings, "ROLE_NEGATIVE_CACHE_MAX_SIZE", 10000),
+    ttl=getattr(settings, "ROLE_NEGATIVE_CACHE_TTL", 30),
+)
+
+shared_role_cache = None
+if getattr(settings, "ROLE_SHARED_CACHE_ENABLED", False):
+    shared_role_cache = SharedRoleCache(
+        alias=getattr(settings, "ROLE_SHARED_CACHE_ALIAS", "default"),
+        version=getattr(settings, "ROLE_SHARED_CACHE_VERSION", 1),
+        fresh_ttl=getattr(settings, "ROLE_SHARED_CACHE_FRESH_TTL", 300),
+        stale_ttl=getattr(settings, "ROLE_SHARED_CACHE_STALE_TTL", 3600),
+        last_known_ttl=getattr(settings, "ROLE_SHARED_CACHE_LAST_KNOWN_TTL", 7 * 24 * 3600),
+    )
+
+
+# pedidos concorrentes para o mesmo utilizador partilham uma só consulta
+role_lookups = SingleFlight()
+
+known_user_filter = None
+if getattr(settings, "ROLE_BLOOM_FILTER_ENABLED", False):
+    known_user_filter = KnownUserFilter(
+        loader=lambda: Utilizador.objects.values_list("pk", flat=True).iterator(chunk_size=5000),
+        refresh_seconds=getattr(settings, "ROLE_BLOOM_FILTER_REFRESH", 60),
+        error_rate=getattr(settings, "ROLE_BLOOM_FILTER_ERROR_RATE", 0.01),
+    )
+
+
+def _cache_key(user_id) -> str:
+    """
+    Normaliza o X-User-ID para a forma canónica do UUID.
+
+    Lança UserNotFoundError se o valor não for um UUID válido, antes de
+    qualquer consulta a caches partilhadas ou ao backend.
+    """
+    try:
+        return str(uuid.UUID(str(user_id).strip()))
+    except (ValueError, AttributeError):
+        raise UserNotFoundError(f"X-User-ID inválido: {user_id}")
+
+
+def get_user_role_orm(user_id):
+    """
+    Obtém a role do utilizador diretamente da tabela ``utilizador``.
+
+    Faz um único lookup por chave primária (auth_user_supabase__id) sobre a
+    ligação persistente do Django, sem passar pela API REST do Supabase.
+
+    Lança:
+        - UserNotFoundError: se o utilizador não existir ou o id for inválido
+        - InvalidUserRoleError: se a role não estiver entre 0,1,2
+        - DatabaseError: se a base de dados falhar
+    """
+    try:
+        rows = list(
+            Utilizador.objects.filter(pk=user_id).values_list("tipo", flat=True)[:1]
+        )
+    except ValidationError:
+        raise UserNotFoundError(f"Usuário {user_id} não existe")
+
+    if not rows:
+        raise UserNotFoundError(f"Usuário {user_id} não existe")
+
+    role = rows[0]
+    if role not in [0, 1, 2]:
+        raise InvalidUserRoleError(f"Role inválida: {role}")
+
+    return role
+
+
+def resolve_user_role(user_id):
+    """
+    Resolve a role no backend configurado em ``settings.ROLE_BACKEND``.
+
+    Com o backend "orm", erros de base de dados fazem fallback para o
+    Supabase (PostgREST).
+    """
+    if getattr(settings, "ROLE_BACKEND", "supabase") == "orm":
+        try:
+            return get_user_role_orm(user_id)
+        except DatabaseError as e:
+            logger.warning("[RoleCache] Lookup ORM falhou (%s) — fallback para Supabase", e)
+
+    return get_user_role(user_id)
+
+
+def _fetch_and_store(user_id, key):
+    """Consulta o backend de roles e atualiza as duas camadas de cache."""
+    try:
+        role = role_lookups.do(key, resolve_user_role, user_id)
+    except (UserNotFoundError, InvalidUserRoleError) as e:
+        # o utilizador deixou de existir/ser válido: não manter role antiga
+        role_cache.invalidate(key)
+        if shared_role_cache is not None:
+            shared_role_cache.delete(key)
+        if isinstance(e, UserNotFoundError):
+            negative_role_cache.set(key, True)
+        raise
+
+    role_cache.set(key, role)
+    if shared_role_cache is not None:
+        shared_role_cache.set(key, role)
+    return role
+
+
+def _revalidate_in_background(user_id, key):
+    def run():
+        try:
+            _fetch_and_store(user_id, key)
+        except Exception as e:
+            logger.warning("[RoleCache] Revalidação falhou para %s: %s", key[:8], e)
+        finally:
+            # a thread pode ter aberto uma ligação à BD (backend "orm")
+            connection.close()
+
+    threading.Thread(target=run, name="role-revalidate", daemon=True).start()
+
+
+def get_cached_user_role(user_id):
+    """
+    Devolve a role do utilizador, consultando primeiro as caches.
+
+    Apenas roles válidas são guardadas. UserNotFoundError e
+    InvalidUserRoleError propagam-se sempre; outros erros (rede, Supabase
+    indisponível) só se propagam se não houver role conhecida em cache.
+    Ids malformados ou conhecidos como inexistentes são rejeitados sem I/O.
+    """
+    key = _cache_key(user_id)
+
+    role = role_cache.get(key)
+    if role is not None:
+        return role
+
+    if negative_role_cache.get(key):
+        raise UserNotFoundError(f"Usuário {user_id} não existe")
+
+    entry = shared_role_cache.get(key) if shared_role_cache is not None else None
+    if entry is not None:
+        if shared_role_cache.is_fresh(entry):
+            remaining = shared_role_cache.fresh_ttl - entry.age
+            role_cache.set(key, entry.role, ttl=min(role_cache.ttl, remaining))
+            return entry.role
+
+        if shared_role_cache.is_stale_servable(entry):
+            # stale-while-revalidate: responde já, atualiza em background
+            if shared_role_cache.acquire_refresh_lock(key):
+                _revalidate_in_background(user_id, key)
+            return entry.role
+
+    if entry is None and known_user_filter is not None and not known_user_filter.might_exist(key):
+        negative_role_cache.set(key, True)
+        raise UserNotFoundError(f"Usuário {user_id} não existe")
+
+    try:
+        return _fetch_and_store(user_id, key)
+    except (UserNotFoundError, InvalidUserRoleError):
+        raise
+    except Exception as e:
+        if entry is None:
+            raise
+        logger.warning(
+            "[RoleCache] Supabase indisponível (%s) — a usar última role conhecida para %s",
+            e,
+            key[:8],
+        )
+        return entry.role
+
+
+def invalidate_user_role(user_id) -> bool:
+    """
+    Remove a role de um utilizador das caches (e.g. após alteração do tipo).
+
+    Devolve True se existia uma entrada na cache local. O id é também
+    removido da cache negativa e adicionado ao filtro de ids conhecidos,
+    pelo que pode ser usado após criar um utilizador.
+    """
+    key = _cache_key(user_id)
+    negative_role_cache.invalidate(key)
+    if known_user_filter is not None:
+        known_user_filter.add(key)
+    if shared_role_cache is not None:
+        shared_role_cache.delete(key)
+    return role_cache.invalidate(key)
+
+
+def clear_role_cache() -> None:
+    """
+    Esvazia a cache local de roles.
+
+    Para invalidar a cache partilhada de todos os workers, incrementar
+    ``ROLE_SHARED_CACHE_VERSION``.
+    """
+    role_cache.clear()
+    negative_role_cache.clear()
+
+
+def get_role_cache_stats() -> dict:
+    """Devolve contadores de hits/misses da cache de roles."""
+    stats = role_cache.stats()
+    stats["negative"] = negative_role_cache.stats()
+    stats["shared_cache_enabled"] = shared_role_cache is not None
+    stats["bloom_filter_enabled"] = known_user_filter is not None
+    return stats
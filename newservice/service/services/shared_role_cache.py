@@ -0,0 +1,116 @@
+"""
+Cache partilhada de roles entre workers, assente no framework de cache do Django.
+
+Usa o alias configurado em ``settings.CACHES`` (locmem, ficheiro, Redis...),
+com chaves versionadas, janela stale-while-revalidate e retenção da última
+role conhecida para servir pedidos quando o Supabase está indisponível.
+"""
+import logging
+import time
+
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+class SharedRoleEntry:
+    """Entrada lida da cache partilhada, com a idade calculada no momento da leitura."""
+
+    __slots__ = ("role", "fetched_at", "age")
+
+    def __init__(self, role, fetched_at):
+        self.role = role
+        self.fetched_at = fetched_at
+        self.age = max(0.0, time.time() - fetched_at)
+
+
+class SharedRoleCache:
+    """
+    Camada L2 de cache de roles.
+
+    Cada entrada guarda a role e o instante em que foi obtida. A frescura é
+    decidida por quem lê (``fresh_ttl`` / ``stale_ttl``); a entrada em si é
+    mantida durante ``last_known_ttl`` para servir de fallback.
+
+    Args:
+        alias (str): Alias em ``settings.CACHES``.
+        version (int): Versão das chaves; incrementar invalida todas as entradas.
+        fresh_ttl (float): Idade máxima (s) em que a entrada é servida sem revalidar.
+        stale_ttl (float): Janela extra (s) em que a entrada é servida e revalidada
+            em background.
+        last_known_ttl (float): Tempo (s) que a entrada é retida como fallback.
+    """
+
+    KEY_PREFIX = "user_role"
+
+    def __init__(self, alias="default", version=1, fresh_ttl=300,
+                 stale_ttl=3600, last_known_ttl=7 * 24 * 3600):
+        self.alias = alias
+        self.version = version
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.last_known_ttl = last_known_ttl
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, user_key: str) -> str:
+        return f"{self.KEY_PREFIX}:{user_key}"
+
+    def get(self, user_key: str):
+        """
+        Devolve a ``SharedRoleEntry`` de ``user_key`` ou None.
+
+        Erros do backend de cache são registados e tratados como miss.
+        """
+        try:
+            data = self.cache.get(self._key(user_key), version=self.version)
+        except Exception:
+            logger.warning("[RoleCache] Falha ao ler cache partilhada", exc_info=True)
+            return None
+
+        if not data:
+            return None
+        return SharedRoleEntry(data["role"], data["fetched_at"])
+
+    def set(self, user_key: str, role) -> None:
+        """Guarda a role com o instante atual como ``fetched_at``."""
+        try:
+            self.cache.set(
+                self._key(user_key),
+                {"role": role, "fetched_at": time.time()},
+                timeout=self.last_known_ttl,
+                version=self.version,
+            )
+        except Exception:
+            logger.warning("[RoleCache] Falha ao escrever cache partilhada", exc_info=True)
+
+    def delete(self, user_key: str) -> None:
+        try:
+            self.cache.delete(self._key(user_key), version=self.version)
+        except Exception:
+            logger.warning("[RoleCache] Falha ao remover da cache partilhada", exc_info=True)
+
+    def is_fresh(self, entry: SharedRoleEntry) -> bool:
+        return entry.age < self.fresh_ttl
+
+    def is_stale_servable(self, entry: SharedRoleEntry) -> bool:
+        return entry.age < self.fresh_ttl + self.stale_ttl
+
+    def acquire_refresh_lock(self, user_key: str) -> bool:
+        """
+        Tenta reservar a revalidação de ``user_key`` entre todos os workers.
+
+        Usa ``cache.add`` (atómico nos backends suportados); o lock expira
+        sozinho para não bloquear revalidações futuras se um worker morrer.
+        """
+        try:
+            return self.cache.add(
+                f"{self._key(user_key)}:refresh",
+                1,
+                timeout=30,
+                version=self.version,
+            )
+        except Exception:
+            return False
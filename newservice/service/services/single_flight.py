@@ -0,0 +1,62 @@
+"""
+Coalescência de chamadas concorrentes idênticas ("single-flight").
+
+Enquanto uma chamada para uma chave está em curso, chamadas concorrentes
+com a mesma chave esperam por ela e recebem o mesmo resultado (ou a mesma
+exceção), em vez de repetirem o pedido ao Supabase.
+"""
+import threading
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Grupo de chamadas coalescidas por chave, entre as threads do processo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Executa ``fn(*args, **kwargs)`` uma única vez por ``key`` em simultâneo.
+
+        Devolve o resultado da chamada partilhada ou relança a sua exceção.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
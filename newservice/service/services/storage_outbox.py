@@ -0,0 +1,160 @@
+"""
+Outbox transacional de remoções no storage.
+
+As views e serializers não chamam o storage ao eliminar um Curriculo:
+registam o ficheiro em ``StorageDeletion`` na mesma transação
+(``enqueue_deletion``). Após o commit, um worker em background por processo
+remove os ficheiros em lote (``remove([...])`` do Supabase) e apaga as linhas;
+falhas são repetidas com backoff exponencial.
+
+``python manage.py drain_storage_outbox`` processa a outbox fora do servidor
+(e.g. cron), útil também se o worker em processo estiver desativado.
+"""
+import logging
+import os
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from service.models import StorageDeletion
+from service.services.storage_service import get_storage_service
+
+logger = logging.getLogger(__name__)
+
+# tempo durante o qual um lote reclamado não é entregue a outro worker
+CLAIM_LEASE = timedelta(minutes=5)
+
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_worker = None
+
+
+def _reset_after_fork() -> None:
+    global _lock, _wakeup, _worker
+    _lock = threading.Lock()
+    _wakeup = threading.Event()
+    _worker = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def enqueue_deletion(bucket_name: str, file_path: str) -> None:
+    """
+    Regista a remoção de um ficheiro do storage.
+
+    Deve ser chamada dentro da transação que elimina o registo; a remoção
+    só é tentada depois do commit (e nunca se a transação for revertida).
+    """
+    if not file_path:
+        return
+    StorageDeletion.objects.create(bucket=bucket_name, file_path=file_path)
+    transaction.on_commit(wake_worker)
+
+
+def _backoff(attempts: int) -> timedelta:
+    base = getattr(settings, "STORAGE_OUTBOX_RETRY_BACKOFF", 5)
+    cap = getattr(settings, "STORAGE_OUTBOX_MAX_BACKOFF", 3600)
+    return timedelta(seconds=min(cap, base * (2 ** max(0, attempts - 1))))
+
+
+def _claim_batch(batch_size: int) -> list[StorageDeletion]:
+    """Reclama um lote de remoções vencidas (lock curto, sem esperar por outros workers)."""
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            StorageDeletion.objects.select_for_update(skip_locked=True)
+            .filter(next_attempt_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        if batch:
+            StorageDeletion.objects.filter(id__in=[item.id for item in batch]).update(
+                next_attempt_at=now + CLAIM_LEASE
+            )
+    return batch
+
+
+def drain_once(batch_size: int | None = None, storage_service=None) -> tuple[int, int]:
+    """
+    Processa um lote da outbox.
+
+    Returns:
+        tuple[int, int]: (ficheiros removidos, ficheiros reagendados).
+    """
+    batch_size = batch_size or getattr(settings, "STORAGE_OUTBOX_BATCH_SIZE", 100)
+    batch = _claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    storage_service = storage_service or get_storage_service()
+    by_bucket = {}
+    for item in batch:
+        by_bucket.setdefault(item.bucket, []).append(item)
+
+    removed = failed = 0
+    for bucket, items in by_bucket.items():
+        try:
+            storage_service.delete_files(bucket, [item.file_path for item in items])
+        except Exception as exc:
+            now = timezone.now()
+            for item in items:
+                item.attempts += 1
+                item.last_error = str(exc)
+                item.next_attempt_at = now + _backoff(item.attempts)
+            StorageDeletion.objects.bulk_update(
+                items, ["attempts", "last_error", "next_attempt_at"]
+            )
+            failed += len(items)
+            logger.warning(
+                "[StorageOutbox] Falha ao remover %s ficheiro(s) de %s: %s",
+                len(items), bucket, exc,
+            )
+            continue
+
+        StorageDeletion.objects.filter(id__in=[item.id for item in items]).delete()
+        removed += len(items)
+
+    logger.info("[StorageOutbox] %s ficheiro(s) removido(s), %s reagendado(s)", removed, failed)
+    return removed, failed
+
+
+def drain(batch_size: int | None = None) -> tuple[int, int]:
+    """Processa lotes até não haver remoções vencidas."""
+    total_removed = total_failed = 0
+    storage_service = get_storage_service()
+    while True:
+        removed, failed = drain_once(batch_size, storage_service)
+        total_removed += removed
+        total_failed += failed
+        if not removed and not failed:
+            return total_removed, total_failed
+
+
+def _run_worker() -> None:
+    poll_interval = getattr(settings, "STORAGE_OUTBOX_POLL_INTERVAL", 30)
+    while True:
+        _wakeup.wait(poll_interval)
+        _wakeup.clear()
+        try:
+            drain()
+        except Exception:
+            logger.exception("[StorageOutbox] Erro inesperado ao processar a outbox")
+        finally:
+            connection.close()
+
+
+def wake_worker() -> None:
+    """Acorda (e se necessário arranca) o worker em background deste processo."""
+    global _worker
+    if not getattr(settings, "STORAGE_OUTBOX_WORKER_ENABLED", True):
+        return
+    if _worker is None:
+        with _lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_run_worker, name="storage-outbox", daemon=True)
+                _worker.start()
+    _wakeup.set()
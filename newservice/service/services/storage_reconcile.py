@@ -0,0 +1,185 @@
+"""
+Reconciliação entre os objetos do bucket ``cvs`` e ``Curriculo.file``.
+
+Upload e escrita na base de dados não são atómicos (POST /curriculo/me/,
+review do CR), pelo que o bucket acumula ficheiros órfãos e podem existir
+Curriculos a apontar para ficheiros inexistentes.
+
+As duas listas são lidas em streaming, ambas ordenadas por caminho (ordem
+de bytes): a listagem do storage página a página e os Curriculos com um
+cursor do lado do servidor. A comparação é um merge ordenado, com memória
+constante independentemente do número de objetos.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models.functions import Collate
+from django.utils import timezone
+
+from service.models import Curriculo, CVUpload
+from service.services.storage_service import get_storage_service
+
+logger = logging.getLogger(__name__)
+
+BUCKET_NAME = "cvs"
+
+
+# margem sobre a validade das URLs de upload direto (/curriculo/me/upload-url/)
+UPLOAD_MARGIN = timedelta(hours=1)
+
+
+def minimum_orphan_age() -> timedelta:
+    """
+    Idade mínima de um objeto para ser removido como órfão.
+
+    Um objeto enviado para uma URL de upload direto só tem Curriculo depois
+    do finalize-upload, que pode ser chamado até ``CV_UPLOAD_URL_MAX_AGE``
+    segundos depois de a URL ser emitida.
+    """
+    return timedelta(seconds=settings.CV_UPLOAD_URL_MAX_AGE) + UPLOAD_MARGIN
+
+
+class ReconcileOrderError(Exception):
+    """Uma das listagens não veio ordenada; o merge daria falsos órfãos."""
+
+
+def iter_curriculo_files(chunk_size: int = 2000):
+    """
+    Itera ``(file, curriculo_id)`` ordenado por caminho (collation "C").
+
+    Curriculos com upload em modo spool ainda em curso são excluídos: o
+    ficheiro ainda não está no storage.
+    """
+    queryset = (
+        Curriculo.objects.exclude(file__isnull=True)
+        .exclude(file="")
+        .exclude(upload__status=CVUpload.STATUS_UPLOADING)
+        .order_by(Collate("file", "C"), "id")
+        .values_list("file", "id")
+    )
+    # no PostgreSQL, iterator() usa um cursor do lado do servidor
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def _ordered(iterable, key, label):
+    previous = None
+    for item in iterable:
+        current = key(item)
+        if previous is not None and current.encode() < previous.encode():
+            raise ReconcileOrderError(f"Listagem {label} fora de ordem: {previous!r} > {current!r}")
+        previous = current
+        yield item
+
+
+def diff_sorted(objects, rows):
+    """
+    Merge ordenado de objetos do storage com linhas ``(file, id)``.
+
+    Produz ``("orphan", StoredObject)``, ``("missing", (file, id))`` e
+    ``("matched", StoredObject)``. Vários Curriculos com o mesmo ficheiro
+    contam como um único ``matched``.
+    """
+    objects = _ordered(objects, lambda obj: obj.path, "do storage")
+    rows = _ordered(rows, lambda row: row[0], "da base de dados")
+    obj = next(objects, None)
+    row = next(rows, None)
+
+    while obj is not None or row is not None:
+        if row is None or (obj is not None and obj.path.encode() < row[0].encode()):
+            yield "orphan", obj
+            obj = next(objects, None)
+        elif obj is None or row[0].encode() < obj.path.encode():
+            yield "missing", row
+            row = next(rows, None)
+        else:
+            yield "matched", obj
+            path = obj.path
+            obj = next(objects, None)
+            while row is not None and row[0] == path:
+                row = next(rows, None)
+
+
+def reconcile(delete=False, min_age=None, page_size=1000, batch_size=1000,
+              on_orphan=None, on_missing=None) -> dict:
+    """
+    Compara o bucket ``cvs`` com ``Curriculo.file``.
+
+    Args:
+        delete (bool): Remover os órfãos do storage, em lotes de ``batch_size``.
+        min_age (timedelta): Objetos mais recentes não são considerados órfãos
+            (o Curriculo pode ainda não ter sido gravado). Default e mínimo
+            com ``delete``: ``minimum_orphan_age()``.
+        page_size (int): Objetos por pedido de listagem.
+        batch_size (int): Caminhos por pedido de remoção.
+        on_orphan: Callable(StoredObject) chamado para cada órfão.
+        on_missing: Callable(file, curriculo_id) para cada ficheiro em falta.
+
+    Returns:
+        dict: Contagens (``objects``, ``rows``, ``matched``, ``orphans``,
+        ``orphan_bytes``, ``recent``, ``missing``, ``deleted``,
+        ``delete_failed``) e ``elapsed`` em segundos.
+
+    Erros:
+        ValueError: ``delete`` com ``min_age`` inferior a ``minimum_orphan_age()``.
+        StorageListException, ReconcileOrderError: A reconciliação é interrompida.
+    """
+    if min_age is None:
+        min_age = minimum_orphan_age()
+    elif delete and min_age < minimum_orphan_age():
+        raise ValueError(
+            f"min_age inferior a {minimum_orphan_age()}: uploads diretos ainda por "
+            "finalizar seriam removidos."
+        )
+    storage_service = get_storage_service()
+    cutoff = timezone.now() - min_age
+    stats = dict.fromkeys(
+        ("objects", "rows", "matched", "orphans", "orphan_bytes", "recent", "missing", "deleted", "delete_failed"), 0
+    )
+    pending = []
+
+    def flush():
+        try:
+            storage_service.delete_files(BUCKET_NAME, pending)
+            stats["deleted"] += len(pending)
+        except Exception as exc:
+            stats["delete_failed"] += len(pending)
+            logger.warning("[Reconcile] Falha ao remover %s órfãos: %s", len(pending), exc)
+        pending.clear()
+
+    def count_rows():
+        for row in iter_curriculo_files():
+            stats["rows"] += 1
+            yield row
+
+    def count_objects():
+        for obj in storage_service.list_files(BUCKET_NAME, page_size=page_size):
+            stats["objects"] += 1
+            yield obj
+
+    started = time.monotonic()
+    for kind, item in diff_sorted(count_objects(), count_rows()):
+        if kind == "matched":
+            stats["matched"] += 1
+        elif kind == "missing":
+            stats["missing"] += 1
+            if on_missing:
+                on_missing(*item)
+        elif item.updated_at is not None and item.updated_at > cutoff:
+            stats["recent"] += 1
+        else:
+            stats["orphans"] += 1
+            stats["orphan_bytes"] += item.size or 0
+            if on_orphan:
+                on_orphan(item)
+            if delete:
+                pending.append(item.path)
+                if len(pending) >= batch_size:
+                    flush()
+
+    if pending:
+        flush()
+
+    stats["elapsed"] = time.monotonic() - started
+    return stats
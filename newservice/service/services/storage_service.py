@@ -1,22 +1,123 @@
+import functools
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import NamedTuple
+
 from django.conf import settings
+from django.test.signals import setting_changed
+from django.utils.module_loading import import_string
+from storage3.exceptions import StorageApiError
+
+from newservice.supabase_client import get_service_client
+from service.services.exceptions import StorageUploadException, StorageDeleteException, StorageSignedUrlException, StorageInfoException, StorageDownloadException, StorageListException
+
+STORAGE_BACKENDS = {
+    "supabase": "service.services.storage_service.SupabaseStorageService",
+    "local": "service.services.local_storage.LocalStorageService",
+}
+
+
+class StoredObject(NamedTuple):
+    """Objeto devolvido por ``StorageService.list_files``."""
+
+    path: str
+    size: int | None
+    updated_at: datetime | None
+
+
+class StorageService(ABC):
+    """
+    Interface dos backends de storage de ficheiros.
+
+    Todos os métodos recebem o bucket e o caminho do objeto e lançam as
+    exceções de ``service.services.exceptions`` em caso de erro.
+    O backend é escolhido em ``settings.STORAGE_BACKEND`` (ver ``get_storage_service``).
+    """
+
+    @abstractmethod
+    def upload_file(self, file, bucket_name: str, file_path: str) -> str:
+        """Guarda ``file`` em ``bucket_name``/``file_path`` (substitui se existir)."""
+
+    @abstractmethod
+    def delete_file(self, bucket_name: str, file_path: str) -> None:
+        """Apaga um ficheiro."""
+
+    @abstractmethod
+    def delete_files(self, bucket_name: str, file_paths: list[str]) -> None:
+        """Apaga vários ficheiros; caminhos inexistentes são ignorados."""
+
+    @abstractmethod
+    def get_signed_url(self, bucket_name: str, file_path: str, expiration_seconds: int = 900) -> str:
+        """URL de leitura assinada e com expiração."""
 
-from service.services.exceptions import StorageUploadException, StorageDeleteException, StorageSignedUrlException
+    @abstractmethod
+    def get_signed_urls(self, bucket_name: str, file_paths: list[str], expiration_seconds: int = 900) -> dict[str, str]:
+        """Caminho -> URL assinada; caminhos inexistentes são omitidos."""
 
+    @abstractmethod
+    def create_signed_upload_url(self, bucket_name: str, file_path: str) -> dict:
+        """URL assinada para upload direto: {"signed_url", "token", "path"}."""
 
-from supabase import create_client
+    @abstractmethod
+    def get_file_info(self, bucket_name: str, file_path: str) -> dict | None:
+        """{"size", "content_type"} do ficheiro, ou None se não existir."""
 
+    @abstractmethod
+    def download_file(self, bucket_name: str, file_path: str) -> bytes:
+        """Conteúdo do ficheiro (para processamento em background)."""
 
-class SupabaseStorageService:
+    @abstractmethod
+    def list_files(self, bucket_name: str, prefix: str = "", page_size: int = 1000):
+        """
+        Itera todos os objetos do bucket (recursivamente) como ``StoredObject``,
+        ordenados por caminho (ordem de bytes), pedindo ``page_size`` de cada vez.
+        """
+
+
+@functools.lru_cache(maxsize=None)
+def _load_backend(path: str) -> StorageService:
+    return import_string(path)()
+
+
+def _reset_after_fork() -> None:
+    # o backend Supabase usa o client do processo pai, também recriado no filho
+    _load_backend.cache_clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _clear_on_setting_change(setting, **kwargs):
+    if setting.startswith(("STORAGE_", "LOCAL_STORAGE_")):
+        _load_backend.cache_clear()
+
+
+setting_changed.connect(_clear_on_setting_change)
+
+
+def get_storage_service() -> StorageService:
+    """
+    Backend de storage configurado em ``settings.STORAGE_BACKEND``.
+
+    Aceita ``"supabase"``, ``"local"`` ou o caminho completo de uma subclasse
+    de ``StorageService``. A instância é criada uma vez por processo e
+    partilhada (os backends não guardam estado por pedido).
+    """
+    backend = getattr(settings, "STORAGE_BACKEND", "supabase")
+    return _load_backend(STORAGE_BACKENDS.get(backend, backend))
+
+
+class SupabaseStorageService(StorageService):
     """
     Service layer responsible for interacting with Supabase Storage.
-    Encapsulates upload, delete and signed URL generation.
+    Encapsulates upload, delete, signed URL generation and object metadata.
     """
 
     def __init__(self):
-        self.client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_SERVICE_KEY
-        )
+        # client partilhado do processo (pool de ligações keep-alive)
+        self.client = get_service_client()
 
     def upload_file(self, file, bucket_name: str, file_path: str) -> str:
         """
@@ -36,17 +137,29 @@ class SupabaseStorageService:
         if not file:
             raise StorageUploadException("Ficheiro nulo")
 
-        try:
-            file_bytes = file.read()
+        # tipo detetado pelo upload handler tem prioridade sobre o header do cliente
+        content_type = getattr(file, "sniffed_content_type", None) or file.content_type
+        file_options = {
+            "content-type": content_type,
+            "upsert": "true",
+        }
 
-            response = self.client.storage.from_(bucket_name).upload(
-                path=file_path,
-                file=file_bytes,
-                file_options={
-                    "content-type": file.content_type,
-                    "upsert": "true",
-                },
-            )
+        try:
+            if hasattr(file, "temporary_file_path"):
+                # ficheiro em disco: enviado em streaming, sem o carregar em memória
+                with open(file.temporary_file_path(), "rb") as fh:
+                    self.client.storage.from_(bucket_name).upload(
+                        path=file_path,
+                        file=fh,
+                        file_options=file_options,
+                    )
+            else:
+                file.seek(0)
+                self.client.storage.from_(bucket_name).upload(
+                    path=file_path,
+                    file=file.read(),
+                    file_options=file_options,
+                )
 
         except Exception as exc:
             raise StorageUploadException(str(exc)) from exc
@@ -72,6 +185,31 @@ class SupabaseStorageService:
         except Exception as exc:
             raise StorageDeleteException(str(exc)) from exc
 
+    def delete_files(self, bucket_name: str, file_paths: list[str]) -> None:
+        """
+        Apaga vários ficheiros do Supabase Storage num único pedido.
+
+        Caminhos inexistentes são ignorados pelo storage.
+
+        Args:
+            bucket_name (str): Nome do bucket.
+            file_paths (list[str]): Caminhos dos ficheiros a apagar.
+
+        Erros:
+            StorageDeleteException: Se o pedido de remoção falhar.
+        """
+        if not file_paths:
+            return
+
+        try:
+            response = self.client.storage.from_(bucket_name).remove(list(file_paths))
+
+            if isinstance(response, dict) and response.get("error"):
+                raise StorageDeleteException(response["error"]["message"])
+
+        except Exception as exc:
+            raise StorageDeleteException(str(exc)) from exc
+
     def get_signed_url(
         self,
         bucket_name: str,
@@ -105,3 +243,161 @@ class SupabaseStorageService:
 
         except Exception as exc:
             raise StorageSignedUrlException(str(exc)) from exc
+
+    def get_signed_urls(
+        self,
+        bucket_name: str,
+        file_paths: list[str],
+        expiration_seconds: int = 900,
+    ) -> dict[str, str]:
+        """
+        Gera signed URLs para vários ficheiros num único pedido ao Supabase Storage.
+
+        Args:
+            bucket_name (str): Nome do bucket.
+            file_paths (list[str]): Caminhos dos ficheiros.
+            expiration_seconds (int): Tempo de expiração dos URLs em segundos.
+
+        Devolve:
+            dict[str, str]: Caminho -> signed URL. Caminhos com erro (e.g. ficheiro
+            inexistente) não são incluídos.
+
+        Erros:
+            StorageSignedUrlException: Se o pedido falhar.
+        """
+        if not file_paths:
+            return {}
+
+        try:
+            response = self.client.storage.from_(bucket_name).create_signed_urls(
+                paths=list(file_paths),
+                expires_in=expiration_seconds,
+            )
+
+            return {
+                item["path"]: item["signedURL"]
+                for item in response
+                if not item.get("error") and item.get("signedURL")
+            }
+
+        except Exception as exc:
+            raise StorageSignedUrlException(str(exc)) from exc
+
+    def create_signed_upload_url(self, bucket_name: str, file_path: str) -> dict:
+        """
+        Gera um URL assinado para o cliente enviar o ficheiro diretamente ao Storage.
+
+        Args:
+            bucket_name (str): Nome do bucket.
+            file_path (str): Caminho onde o ficheiro será armazenado.
+
+        Devolve:
+            dict: {"signed_url": str, "token": str, "path": str}
+
+        Erros:
+            StorageSignedUrlException: Se a geração do URL falhar.
+        """
+        try:
+            response = self.client.storage.from_(bucket_name).create_signed_upload_url(
+                file_path
+            )
+            return {
+                "signed_url": response["signed_url"],
+                "token": response["token"],
+                "path": response["path"],
+            }
+
+        except Exception as exc:
+            raise StorageSignedUrlException(str(exc)) from exc
+
+    def get_file_info(self, bucket_name: str, file_path: str) -> dict | None:
+        """
+        Obtém metadata de um ficheiro (stat) sem o descarregar.
+
+        Args:
+            bucket_name (str): Nome do bucket.
+            file_path (str): Caminho do ficheiro.
+
+        Devolve:
+            dict | None: {"size": int | None, "content_type": str | None} ou None
+            se o ficheiro não existir.
+
+        Erros:
+            StorageInfoException: Se o pedido falhar por outro motivo.
+        """
+        try:
+            info = self.client.storage.from_(bucket_name).info(file_path)
+        except StorageApiError as exc:
+            if str(exc.status) in ("400", "404"):
+                return None
+            raise StorageInfoException(str(exc)) from exc
+        except Exception as exc:
+            raise StorageInfoException(str(exc)) from exc
+
+        # a API devolve os campos no topo ou dentro de "metadata" consoante a versão
+        metadata = info.get("metadata") or {}
+        size = info.get("size", metadata.get("size"))
+        return {
+            "size": int(size) if size is not None else None,
+            "content_type": info.get("content_type") or metadata.get("mimetype"),
+        }
+
+    def download_file(self, bucket_name: str, file_path: str) -> bytes:
+        """
+        Descarrega um ficheiro do Supabase Storage.
+
+        Args:
+            bucket_name (str): Nome do bucket.
+            file_path (str): Caminho do ficheiro.
+
+        Devolve:
+            bytes: Conteúdo do ficheiro.
+
+        Erros:
+            StorageDownloadException: Se o ficheiro não existir ou o pedido falhar.
+        """
+        try:
+            return self.client.storage.from_(bucket_name).download(file_path)
+        except Exception as exc:
+            raise StorageDownloadException(str(exc)) from exc
+
+    def list_files(self, bucket_name: str, prefix: str = "", page_size: int = 1000):
+        """
+        Itera os objetos do bucket com a listagem v2 (paginada por cursor e
+        sem delimitador, i.e. recursiva), ordenados por nome.
+
+        Args:
+            bucket_name (str): Nome do bucket.
+            prefix (str): Prefixo dos caminhos a listar.
+            page_size (int): Objetos por pedido (máximo 1000).
+
+        Devolve:
+            Iterator[StoredObject]
+
+        Erros:
+            StorageListException: Se algum pedido de listagem falhar.
+        """
+        bucket = self.client.storage.from_(bucket_name)
+        options = {
+            "limit": page_size,
+            "prefix": prefix,
+            "with_delimiter": False,
+            "sortBy": {"column": "name", "order": "asc"},
+        }
+        while True:
+            try:
+                page = bucket.list_v2(options)
+            except Exception as exc:
+                raise StorageListException(str(exc)) from exc
+
+            for obj in page.objects:
+                size = (obj.metadata or {}).get("size")
+                yield StoredObject(
+                    obj.key or obj.name,
+                    int(size) if size is not None else None,
+                    obj.updated_at,
+                )
+
+            if not page.hasNext or not page.nextCursor:
+                return
+            options = {**options, "cursor": page.nextCursor}
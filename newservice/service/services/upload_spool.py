@@ -0,0 +1,191 @@
+"""
+Envio em background de CVs submetidos em modo spool.
+
+POST /curriculo/me/ guarda o PDF validado em ``CV_UPLOAD_SPOOL_DIR``, cria o
+Curriculo pendente com um ``CVUpload`` em estado ``uploading`` e responde 202.
+Um pool de threads por processo envia o ficheiro para o storage, com
+tentativas e backoff exponencial; o estado fica disponível em
+GET /curriculo/me/upload-status/{id}/.
+
+Uploads que fiquem por enviar (e.g. reinício do processo) são retomados com
+``python manage.py push_spooled_cvs``.
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connection
+from django.utils import timezone
+
+from service.models import CVUpload
+from service.services.cv_text import schedule_indexing
+from service.services.storage_outbox import enqueue_deletion
+from service.services.storage_service import get_storage_service
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_executor = None
+
+
+def _reset_after_fork() -> None:
+    # as threads do pool não existem no processo filho
+    global _lock, _executor
+    _lock = threading.Lock()
+    _executor = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "CV_UPLOAD_SPOOL_WORKERS", 2),
+                    thread_name_prefix="cv-upload",
+                )
+    return _executor
+
+
+def spool_file(file) -> str:
+    """
+    Copia o ficheiro recebido para a diretoria de spool.
+
+    Args:
+        file: UploadedFile já validado.
+
+    Returns:
+        str: Caminho absoluto do ficheiro no spool.
+    """
+    spool_dir = settings.CV_UPLOAD_SPOOL_DIR
+    os.makedirs(spool_dir, exist_ok=True)
+    spool_path = os.path.join(spool_dir, f"{uuid.uuid4().hex}.pdf")
+
+    if hasattr(file, "temporary_file_path"):
+        shutil.copyfile(file.temporary_file_path(), spool_path)
+    else:
+        file.seek(0)
+        with open(spool_path, "wb") as fh:
+            for chunk in file.chunks():
+                fh.write(chunk)
+    return spool_path
+
+
+def discard_spool_file(spool_path: str) -> None:
+    """Remove um ficheiro do spool (ignora se já não existir)."""
+    try:
+        os.remove(spool_path)
+    except FileNotFoundError:
+        pass
+
+
+class SpooledFile(File):
+    """PDF no spool, enviado a partir do disco pelos backends de storage."""
+
+    def __init__(self, spool_path: str):
+        super().__init__(None, spool_path)
+        self.content_type = settings.ALLOWED_MIME
+
+    def temporary_file_path(self) -> str:
+        return self.name
+
+
+def push_upload(upload_id: int) -> str | None:
+    """
+    Envia para o storage o ficheiro de um ``CVUpload``, com tentativas.
+
+    Entre tentativas espera ``CV_UPLOAD_RETRY_BACKOFF * 2**n`` segundos. Se o
+    Curriculo for eliminado durante o envio, o objeto enviado é removido.
+
+    Returns:
+        str | None: Estado final do upload, ou None se já não existir.
+    """
+    try:
+        upload = CVUpload.objects.get(id=upload_id)
+    except CVUpload.DoesNotExist:
+        return None
+    if upload.status == CVUpload.STATUS_DONE:
+        return upload.status
+
+    storage_service = get_storage_service()
+    max_attempts = getattr(settings, "CV_UPLOAD_MAX_ATTEMPTS", 5)
+    backoff = getattr(settings, "CV_UPLOAD_RETRY_BACKOFF", 2)
+
+    for attempt in range(max_attempts):
+        if not os.path.exists(upload.spool_path):
+            # sem ficheiro no spool não há nada a repetir
+            upload.last_error = f"Ficheiro em falta no spool: {upload.spool_path}"
+            break
+        try:
+            storage_service.upload_file(
+                file=SpooledFile(upload.spool_path),
+                bucket_name=upload.bucket,
+                file_path=upload.file_path,
+            )
+        except Exception as exc:
+            upload.attempts += 1
+            upload.last_error = str(exc)
+            CVUpload.objects.filter(id=upload.id).update(
+                attempts=upload.attempts, last_error=upload.last_error, updated_at=timezone.now()
+            )
+            logger.warning(
+                "[CVUpload] Falha ao enviar curriculo_id=%s (tentativa %s/%s): %s",
+                upload.curriculo_id, attempt + 1, max_attempts, exc,
+            )
+            if attempt + 1 < max_attempts:
+                time.sleep(backoff * (2 ** attempt))
+            continue
+
+        upload.attempts += 1
+        updated = CVUpload.objects.filter(id=upload.id).update(
+            status=CVUpload.STATUS_DONE, attempts=upload.attempts, last_error="",
+            updated_at=timezone.now(),
+        )
+        discard_spool_file(upload.spool_path)
+
+        if not updated:
+            # CV eliminado enquanto o ficheiro era enviado
+            logger.info(
+                "[CVUpload] curriculo_id=%s eliminado durante o envio; a remover %s",
+                upload.curriculo_id, upload.file_path,
+            )
+            enqueue_deletion(upload.bucket, upload.file_path)
+            return None
+
+        logger.info("[CVUpload] curriculo_id=%s enviado para o storage", upload.curriculo_id)
+        schedule_indexing(upload.curriculo_id)
+        return CVUpload.STATUS_DONE
+
+    CVUpload.objects.filter(id=upload.id).update(
+        status=CVUpload.STATUS_FAILED, last_error=upload.last_error, updated_at=timezone.now()
+    )
+    logger.error(
+        "[CVUpload] Upload falhado para curriculo_id=%s: %s",
+        upload.curriculo_id, upload.last_error,
+    )
+    return CVUpload.STATUS_FAILED
+
+
+def _run(upload_id: int) -> None:
+    try:
+        push_upload(upload_id)
+    except Exception:
+        logger.exception("[CVUpload] Erro inesperado no upload %s", upload_id)
+    finally:
+        connection.close()
+
+
+def schedule_upload(upload_id: int) -> None:
+    """Agenda o envio de um ``CVUpload`` no pool de background."""
+    _get_executor().submit(_run, upload_id)
+
@@ -0,0 +1,219 @@
+"""
+Contagens agregadas de visualizações de CVs (rollups de ``cv_access_log``).
+
+Três tabelas, atualizadas de forma incremental pelo access_log_writer na
+mesma transação em que cada lote é inserido em ``CVAccessLog``:
+
+- ``cv_view_stats``: totais por CV (acessos, acessos e empresas distintas);
+- ``cv_viewer_stats``: acessos por CV e utilizador;
+- ``cv_daily_views``: acessos por CV e dia (``TIME_ZONE``).
+
+Os endpoints de estatísticas leem apenas estas tabelas, por isso o custo
+não depende do volume do histórico. ``rebuild_view_rollups`` recalcula
+tudo a partir de ``cv_access_log`` (instalação inicial ou correção).
+"""
+import uuid
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from service.models import CVDailyViews, CVViewerStats, CVViewStats
+
+ROLE_COMPANY = 1
+
+# linhas por INSERT ... ON CONFLICT
+_CHUNK_SIZE = 500
+
+
+def _prep(model, field_name, value):
+    return model._meta.get_field(field_name).get_db_prep_value(value, connection)
+
+
+def _upsert(cursor, model, columns, rows, on_conflict) -> None:
+    table = model._meta.db_table
+    names = ", ".join(model._meta.get_field(column).column for column in columns)
+    placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    for start in range(0, len(rows), _CHUNK_SIZE):
+        chunk = rows[start:start + _CHUNK_SIZE]
+        params = [
+            _prep(model, column, value)
+            for row in chunk
+            for column, value in zip(columns, row)
+        ]
+        cursor.execute(
+            f"INSERT INTO {table} ({names}) "
+            f"VALUES {', '.join([placeholders] * len(chunk))} "
+            f"ON CONFLICT {on_conflict}",
+            params,
+        )
+
+
+def _latest(table: str, column: str) -> str:
+    return (
+        f"CASE WHEN {table}.{column} IS NULL OR EXCLUDED.{column} > {table}.{column} "
+        f"THEN EXCLUDED.{column} ELSE {table}.{column} END"
+    )
+
+
+def _earliest(table: str, column: str) -> str:
+    return (
+        f"CASE WHEN EXCLUDED.{column} < {table}.{column} "
+        f"THEN EXCLUDED.{column} ELSE {table}.{column} END"
+    )
+
+
+def _viewer_order(item):
+    (cv_id, user_id), _ = item
+    return cv_id, str(user_id)
+
+
+def apply_view_rollups(entries) -> None:
+    """
+    Acrescenta um lote de acessos (``CVAccessLog`` já inseridos) aos rollups.
+
+    Deve correr na transação do INSERT, para que um lote falhado ou reenviado
+    não seja contado duas vezes. A linha de ``cv_view_stats`` de cada CV é
+    atualizada primeiro (por ordem de id): o lock dessa linha serializa os
+    lotes concorrentes do mesmo CV e evita deadlocks entre processos.
+    """
+    if not entries:
+        return
+
+    totals = {}   # curriculo_id -> [views, company_views, last_viewed_at]
+    viewers = {}  # (curriculo_id, user_id) -> [role, views, first, last]
+    daily = {}    # (curriculo_id, dia) -> [views, company_views]
+    for entry in entries:
+        is_company = int(entry.accessed_by_role == ROLE_COMPANY)
+        user_id = uuid.UUID(str(entry.accessed_by_user_id))
+        at = entry.accessed_at
+
+        total = totals.setdefault(entry.curriculo_id, [0, 0, at])
+        total[0] += 1
+        total[1] += is_company
+        total[2] = max(total[2], at)
+
+        viewer = viewers.setdefault(
+            (entry.curriculo_id, user_id),
+            [entry.accessed_by_role, 0, at, at],
+        )
+        viewer[1] += 1
+        viewer[2] = min(viewer[2], at)
+        viewer[3] = max(viewer[3], at)
+
+        day = daily.setdefault((entry.curriculo_id, timezone.localdate(at)), [0, 0])
+        day[0] += 1
+        day[1] += is_company
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        _upsert(
+            cursor,
+            CVViewStats,
+            ["curriculo", "views", "company_views", "unique_companies", "last_viewed_at"],
+            [(cv_id, views, company, 0, last) for cv_id, (views, company, last) in sorted(totals.items())],
+            "(curriculo_id) DO UPDATE SET "
+            "views = cv_view_stats.views + EXCLUDED.views, "
+            "company_views = cv_view_stats.company_views + EXCLUDED.company_views, "
+            f"last_viewed_at = {_latest('cv_view_stats', 'last_viewed_at')}",
+        )
+
+        # empresas novas: pares (CV, empresa) ainda sem linha em cv_viewer_stats;
+        # consistente porque as linhas dos CVs em causa estão bloqueadas acima
+        company_keys = [key for key, viewer in viewers.items() if viewer[0] == ROLE_COMPANY]
+        known = set()
+        if company_keys:
+            known = set(
+                CVViewerStats.objects.filter(
+                    curriculo_id__in={cv_id for cv_id, _ in company_keys},
+                    viewer_user_id__in={user_id for _, user_id in company_keys},
+                ).values_list("curriculo_id", "viewer_user_id")
+            )
+        new_companies = {}
+        for cv_id, user_id in company_keys:
+            if (cv_id, user_id) not in known:
+                new_companies[cv_id] = new_companies.get(cv_id, 0) + 1
+
+        _upsert(
+            cursor,
+            CVViewerStats,
+            ["curriculo", "viewer_user_id", "viewer_role", "views", "first_viewed_at", "last_viewed_at"],
+            [
+                (cv_id, user_id, role, views, first, last)
+                for (cv_id, user_id), (role, views, first, last) in sorted(viewers.items(), key=_viewer_order)
+            ],
+            "(curriculo_id, viewer_user_id) DO UPDATE SET "
+            "views = cv_viewer_stats.views + EXCLUDED.views, "
+            f"first_viewed_at = {_earliest('cv_viewer_stats', 'first_viewed_at')}, "
+            f"last_viewed_at = {_latest('cv_viewer_stats', 'last_viewed_at')}",
+        )
+
+        for cv_id, count in sorted(new_companies.items()):
+            CVViewStats.objects.filter(curriculo_id=cv_id).update(
+                unique_companies=F("unique_companies") + count
+            )
+
+        _upsert(
+            cursor,
+            CVDailyViews,
+            ["curriculo", "day", "views", "company_views"],
+            [(cv_id, day, views, company) for (cv_id, day), (views, company) in sorted(daily.items())],
+            "(curriculo_id, day) DO UPDATE SET "
+            "views = cv_daily_views.views + EXCLUDED.views, "
+            "company_views = cv_daily_views.company_views + EXCLUDED.company_views",
+        )
+
+
+REBUILD_SQL = [
+    "LOCK TABLE cv_view_stats, cv_viewer_stats, cv_daily_views IN EXCLUSIVE MODE",
+    "DELETE FROM cv_daily_views",
+    "DELETE FROM cv_viewer_stats",
+    "DELETE FROM cv_view_stats",
+    """
+    INSERT INTO cv_viewer_stats
+        (curriculo_id, viewer_user_id, viewer_role, views, first_viewed_at, last_viewed_at)
+    SELECT curriculo_id, accessed_by_user_id, min(accessed_by_role), count(*),
+           min(accessed_at), max(accessed_at)
+    FROM cv_access_log
+    GROUP BY curriculo_id, accessed_by_user_id
+    """,
+    """
+    INSERT INTO cv_view_stats
+        (curriculo_id, views, company_views, unique_companies, last_viewed_at)
+    SELECT curriculo_id, sum(views),
+           coalesce(sum(views) FILTER (WHERE viewer_role = %(company)s), 0),
+           count(*) FILTER (WHERE viewer_role = %(company)s),
+           max(last_viewed_at)
+    FROM cv_viewer_stats
+    GROUP BY curriculo_id
+    """,
+    """
+    INSERT INTO cv_daily_views (curriculo_id, day, views, company_views)
+    SELECT curriculo_id, (accessed_at AT TIME ZONE %(tz)s)::date, count(*),
+           count(*) FILTER (WHERE accessed_by_role = %(company)s)
+    FROM cv_access_log
+    GROUP BY 1, 2
+    """,
+]
+
+
+def rebuild_view_rollups() -> dict:
+    """
+    Recalcula os rollups a partir de ``cv_access_log`` (PostgreSQL).
+
+    As três tabelas ficam bloqueadas para escrita durante o recálculo; os
+    lotes do access_log_writer esperam e são aplicados por cima do resultado.
+    Acessos já removidos por retenção deixam de ser contados.
+
+    Returns:
+        dict: Número de linhas de cada tabela.
+    """
+    params = {"company": ROLE_COMPANY, "tz": settings.TIME_ZONE}
+    with transaction.atomic(), connection.cursor() as cursor:
+        for sql in REBUILD_SQL:
+            cursor.execute(sql, params if "%(" in sql else None)
+    return {
+        "cv_view_stats": CVViewStats.objects.count(),
+        "cv_viewer_stats": CVViewerStats.objects.count(),
+        "cv_daily_views": CVDailyViews.objects.count(),
+    }
@@ -1,14 +1,16 @@
 from requests.exceptions import RequestException, Timeout
-from supabase import create_client, Client
+import httpx
 from postgrest.exceptions import APIError
 from django.conf import settings
+from newservice.supabase_client import get_anon_client, get_service_client
+from service.services.single_flight import SingleFlight
 import os
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+email_lookups = SingleFlight()
 
 
 class UserNotFoundError(Exception):
@@ -19,11 +21,20 @@ class InvalidUserRoleError(Exception):
     pass
 
 
+def _fetch_user_email(user_uuid: str):
+    response = get_service_client().auth.admin.get_user_by_id(user_uuid)
+
+    if response and response.user and response.user.email:
+        return response.user.email
+    return None
+
+
 def get_user_email(user_uuid: str) -> str:
     """
     Obtém o email de um utilizador a partir do Supabase Auth.
 
-    Utiliza a Service Role Key para aceder à Admin API.
+    Utiliza a Service Role Key para aceder à Admin API. Pedidos concorrentes
+    para o mesmo utilizador partilham uma só chamada.
     Se falhar em produção, lança uma exceção.
     Em DEBUG, retorna um email de fallback.
 
@@ -42,11 +53,9 @@ def get_user_email(user_uuid: str) -> str:
                 "SUPABASE_URL e SUPABASE_SERVICE_KEY não estão configurados"
             )
 
-        admin_client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
-        response = admin_client.auth.admin.get_user_by_id(user_uuid)
-
-        if response and response.user and response.user.email:
-            return response.user.email
+        email = email_lookups.do(str(user_uuid), _fetch_user_email, user_uuid)
+        if email:
+            return email
 
     except Exception as e:
         # Fallback para desenvolvimento/teste
@@ -82,7 +91,7 @@ def get_user_role(user_id):
     """
     try:
         response = (
-            supabase.table("utilizador")
+            get_anon_client().table("utilizador")
             .select("tipo")
             .eq("auth_user_supabase__id", user_id)
             .maybe_single()
@@ -103,7 +112,7 @@ def get_user_role(user_id):
     except APIError as e:
         # APIError do Postgrest quando não encontra resultados ou há erro na query
         raise UserNotFoundError(f"Usuário {user_id} não existe")
-    except (RequestException, Timeout) as e:
+    except (RequestException, Timeout, httpx.HTTPError) as e:
         # Tratamento de rede/timeout
         raise ConnectionError(f"Falha ao conectar com Supabase: {str(e)}")
     """
@@ -116,7 +125,7 @@ def get_user_role(user_id):
     """
     try:
         response = (
-            supabase.table("utilizador")
+            get_anon_client().table("utilizador")
             .select("tipo")
             .eq("auth_user_supabase__id", user_id)
             .maybe_single()
@@ -137,6 +146,6 @@ def get_user_role(user_id):
     except APIError as e:
         # APIError do Postgrest quando não encontra resultados ou há erro na query
         raise UserNotFoundError(f"Usuário {user_id} não existe")
-    except (RequestException, Timeout) as e:
+    except (RequestException, Timeout, httpx.HTTPError) as e:
         # Tratamento de rede/timeout
         raise ConnectionError(f"Falha ao conectar com Supabase: {str(e)}")
@@ -0,0 +1,105 @@
+"""
+Upload handler para submissão de CVs (POST /curriculo/me/).
+
+Valida o ficheiro à medida que é recebido, em vez de depois de o Django
+ter lido todo o corpo multipart:
+
+- rejeita pedidos cujo Content-Length já excede o limite, sem ler o corpo;
+- interrompe a leitura assim que o ficheiro ultrapassa ``MAX_FILE_SIZE``;
+- confirma os magic bytes ``%PDF-`` no primeiro chunk (o content-type
+  enviado pelo cliente não é fiável);
+- calcula o SHA-256 em streaming e guarda o ficheiro em disco (spool).
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopUpload
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+
+PDF_MAGIC = b"%PDF-"
+
+# folga para boundaries/headers multipart e campos de texto do formulário
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class CVUploadHandler(FileUploadHandler):
+    """
+    Recebe o campo ``cv`` diretamente para um ficheiro temporário.
+
+    Após o parse, ``rejection`` indica o motivo de rejeição
+    (``REJECT_TOO_LARGE`` / ``REJECT_NOT_PDF``) ou None. O ficheiro devolvido
+    tem os atributos ``sha256`` (hex) e ``sniffed_content_type``.
+    """
+
+    REJECT_TOO_LARGE = "too_large"
+    REJECT_NOT_PDF = "not_pdf"
+
+    field_name_allowed = "cv"
+
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = max_size if max_size is not None else settings.MAX_FILE_SIZE
+        self.rejection = None
+        self._hash = None
+        self._header = b""
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > self.max_size + MULTIPART_OVERHEAD:
+            # não ler o corpo: o pedido nunca poderia ser aceite
+            self.rejection = self.REJECT_TOO_LARGE
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        if field_name != self.field_name_allowed:
+            raise SkipFile()
+
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+
+        if content_length is not None and content_length > self.max_size:
+            self.rejection = self.REJECT_TOO_LARGE
+            raise StopUpload(connection_reset=True)
+
+        self.file = TemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset, self.content_type_extra
+        )
+        self._hash = hashlib.sha256()
+        self._header = b""
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_size:
+            self.rejection = self.REJECT_TOO_LARGE
+            raise StopUpload(connection_reset=True)
+
+        if len(self._header) < len(PDF_MAGIC):
+            self._header += raw_data[: len(PDF_MAGIC) - len(self._header)]
+            if not PDF_MAGIC.startswith(self._header):
+                self.rejection = self.REJECT_NOT_PDF
+                raise StopUpload(connection_reset=True)
+
+        self._hash.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        # o MultiPartParser fecha ``handler.file`` em SkipFile/StopUpload
+        # posteriores; o ficheiro concluído deixa de ser o ficheiro em curso
+        file = self.file
+        del self.file
+
+        if self._header != PDF_MAGIC:
+            self.rejection = self.REJECT_NOT_PDF
+            file.close()
+            return None
+
+        file.seek(0)
+        file.size = file_size
+        file.sha256 = self._hash.hexdigest()
+        file.sniffed_content_type = settings.ALLOWED_MIME
+        return file
+
+    def upload_interrupted(self):
+        if hasattr(self, "file"):
+            self.file.close()
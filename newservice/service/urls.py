@@ -14,6 +14,8 @@ routernotification.register(r'curriculo/notifications', views.NotificationViewSe
 urlpatterns = [
     path("", views.idex, name="idex"),
     path("teste/", views.teste.as_view(), name="test"),
+    # backend de storage local (URLs assinadas)
+    path("files/<str:bucket>/<path:file_path>", views.local_storage_file, name="local-storage-file"),
     
     # Incluir rotas do router
    ]
@@ -1,5 +1,14 @@
+import datetime
+import hashlib
 import logging
-from django.http import HttpResponse
+import mimetypes
+import os
+import uuid
+from urllib.parse import quote
+from django.core import signing
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import viewsets, status
@@ -7,17 +16,23 @@ from rest_framework.decorators import action
 from rest_framework.permissions import BasePermission, AllowAny
 from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.pagination import PageNumberPagination
+from .pagination import CursorModePagination
 from django_filters.rest_framework import DjangoFilterBackend
 from .middleware import IsCompany, IsCR, IsStudent, VagaPermission, IsAll, IsCROrIsCompany, IsStudentOrCR
-from .models import Curriculo, Estudante, Vaga, CVAccessLog, CV_STATUS_LABELS, Notification
-from .serializers import CurriculoSerializer, VagaSerializer, CVSignedUrlSerializer, CVAccessLogSerializer, NotificationSerializer, NotificationReadSerializer, CRReviewSerializer, CRReviewResponseSerializer
+from .models import Curriculo, Estudante, Vaga, CVAccessLog, CV_STATUS_LABELS, Notification, CVUpload, CVPreview, CVViewStats, CVViewerStats, CVDailyViews
+from .serializers import CurriculoSerializer, VagaSerializer, CVSignedUrlSerializer, CVAccessLogSerializer, NotificationSerializer, NotificationReadSerializer, CRReviewSerializer, CRReviewResponseSerializer, CVBulkViewSerializer, CVViewerStatsSerializer, CVDailyViewsSerializer
 from .filters import CurriculoFilterSet
-from service.services.storage_service import SupabaseStorageService
+from .upload_handlers import CVUploadHandler, PDF_MAGIC
+from .ranges import ranged_file_response
+from service.services.storage_service import get_storage_service
+from service.services.local_storage import LocalStorageService
 from service.services.cv_service import CVService
-from service.services.exceptions import StorageUploadException, StorageSignedUrlException
+from service.services import upload_spool
+from service.services.storage_outbox import enqueue_deletion
+from service.services.cv_text import schedule_indexing
+from service.services.exceptions import StorageUploadException, StorageSignedUrlException, StorageInfoException, StorageDownloadException
 from django.conf import settings
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.db.models import Count, Avg, F, ExpressionWrapper, Q, FloatField
 from .filters import VagaFilterSet, NotificationFilterSet
 from django.utils import timezone
@@ -25,16 +40,85 @@ from django.db.models.functions import Cast, Extract
 
 logger = logging.getLogger(__name__)
 
+# salt dos tokens de upload direto (/curriculo/me/upload-url/)
+CV_UPLOAD_SALT = "service.curriculo.direct-upload"
+
+# janela das visualizações diárias em /view-stats/
+VIEW_STATS_DEFAULT_DAYS = 30
+VIEW_STATS_MAX_DAYS = 366
+
 
 def idex(request):
     return HttpResponse("You're at the service indexs.")
 
 
-class AccessHistoryPagination(PageNumberPagination):
+@csrf_exempt
+@require_http_methods(["GET", "HEAD", "PUT"])
+def local_storage_file(request, bucket, file_path):
+    """
+    Serve e recebe objetos do backend de storage local (STORAGE_BACKEND="local").
+
+    GET /service/files/<bucket>/<caminho>?expires=...&signature=...
+    - URL gerada por get_signed_url; ficheiro devolvido com FileResponse
+      (sendfile do servidor WSGI, com suporte a Range) ou delegado ao proxy
+      via LOCAL_STORAGE_SENDFILE_HEADER (e.g. X-Accel-Redirect)
+
+    PUT /service/files/<bucket>/<caminho>?expires=...&signature=...
+    - URL gerada por create_signed_upload_url; grava o corpo do pedido
+
+    A autenticação é apenas a assinatura HMAC (sem X-User-ID).
+    """
+    storage = get_storage_service()
+    if not isinstance(storage, LocalStorageService):
+        raise Http404
+
+    method = "PUT" if request.method == "PUT" else "GET"
+    if not storage.verify_signature(
+        method, bucket, file_path,
+        request.GET.get("expires"), request.GET.get("signature"),
+    ):
+        return JsonResponse({"detail": "Assinatura inválida ou expirada."}, status=403)
+
+    try:
+        full_path = storage.path(bucket, file_path)
+    except ValueError:
+        raise Http404
+
+    if method == "PUT":
+        try:
+            storage.write_stream(bucket, file_path, request, settings.LOCAL_STORAGE_MAX_UPLOAD_SIZE)
+        except StorageUploadException as e:
+            return JsonResponse({"detail": str(e)}, status=400)
+        return JsonResponse({"Key": f"{bucket}/{file_path}"}, status=200)
+
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    sendfile_header = settings.LOCAL_STORAGE_SENDFILE_HEADER
+    if sendfile_header:
+        # o proxy envia o ficheiro; o Django só devolve os headers
+        response = HttpResponse(content_type=content_type)
+        prefix = settings.LOCAL_STORAGE_SENDFILE_PREFIX
+        response[sendfile_header] = (
+            f"{prefix.rstrip('/')}/{quote(bucket)}/{quote(file_path)}" if prefix else full_path
+        )
+        return response
+
+    return ranged_file_response(request, open(full_path, "rb"), content_type)
+
+
+class AccessHistoryPagination(CursorModePagination):
     """Paginação customizada para histórico de acessos - 50 registos por página."""
     page_size = 50
     page_size_query_param = 'page_size'
     max_page_size = 100
+    cursor_ordering = '-accessed_at'
+
+
+class ViewerStatsPagination(AccessHistoryPagination):
+    """Paginação das visualizações por utilizador (/viewers/)."""
+    cursor_ordering = '-last_viewed_at'
 
 
 class teste(APIView):
@@ -57,7 +141,13 @@ class CurriculoViewSet(viewsets.ModelViewSet):
     - GET curriculo/me/ - Retorna o CV do estudante autenticado
     - POST curriculo/me/ - Cria um novo CV para o estudante autenticado
     - DELETE curriculo/me/ - Remove o CV do estudante autenticado
+    - POST curriculo/me/upload-url/ - URL assinado para upload direto ao storage
+    - POST curriculo/me/finalize-upload/ - Confirma o upload direto e cria o CV
+    - GET curriculo/me/upload-status/{id}/ - Estado do envio em modo spool
     - GET /curriculo/{id}/view/ - Visualiza CV com signed URL
+    - GET /curriculo/{id}/file/ - PDF do CV via cache local (Range, ETag)
+    - GET /curriculo/{id}/thumbnail/ - Pré-visualização da primeira página
+    - POST /curriculo/view-bulk/ - Signed URLs para vários CVs num só pedido
     - GET /curriculo/{id}/access-history/ - Histórico de acessos (CR only)
     
     Filtros disponíveis (query params):
@@ -71,6 +161,8 @@ class CurriculoViewSet(viewsets.ModelViewSet):
     - estudante_ano_max: Ano de faculdade máximo
     - estudante_area: ID da área do estudante
     - estudante_area_nome: Nome da área do estudante (case-insensitive)
+    - with_signed_urls=true: inclui signed_url/expires_in_seconds em cada CV da página
+    - pagination=cursor: paginação por cursor, ordenada por id, ou por relevância com q (ver service.pagination)
     
     Permissões: 
     - Student (role=2): Pode visualizar, criar, atualizar e deletar seu próprio CV
@@ -89,7 +181,8 @@ class CurriculoViewSet(viewsets.ModelViewSet):
         - Empresa (role=1): Pode ver apenas CVs com status=1 (aprovados)
         - Estudante (role=2): Vê seu próprio CV via /me/
         """
-        queryset = Curriculo.objects.all()
+        # metadata da pré-visualização no mesmo SELECT, sem a imagem
+        queryset = Curriculo.objects.select_related('preview').defer('preview__thumbnail')
         user_role = getattr(self.request, 'role', None)
         
         # Empresa (1) só vê CVs aprovados
@@ -107,17 +200,19 @@ class CurriculoViewSet(viewsets.ModelViewSet):
         
         IsStudent: Pode gerir o seu próprio CV. (GET, POST, DELETE em /curriculo/me/)
         IsAll: Qualquer utilizador pode fazer GET para ver vários CVs com filtros
-        IsCR: Apenas CR pode ver histórico de acessos
+        IsCR: Apenas CR pode ver histórico de acessos e estatísticas de visualizações
         
 
         """
-        if self.action == 'get_my_cv':
+        if self.action in ['get_my_cv', 'upload_url', 'finalize_upload', 'upload_status', 'my_view_stats']:
             # Estudante acede ao seu próprio CV
             permission_classes = [IsStudent]
-        elif self.action in ['access_history', 'review', 'stats']:
+        elif self.action in ['access_history', 'view_stats', 'viewers', 'review', 'stats']:
             permission_classes = [IsCR]
-        elif self.action in ['view_cv']:
+        elif self.action in ['view_cv', 'cv_file']:
             permission_classes = [IsAll]
+        elif self.action in ['view_bulk', 'thumbnail']:
+            permission_classes = [IsCROrIsCompany]
         else:
             # GET para listar vários CVs com filtros
             permission_classes = [IsCROrIsCompany]
@@ -125,6 +220,401 @@ class CurriculoViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
        
         
+    def list(self, request, *args, **kwargs):
+        """
+        Lista CVs com filtros. Com ``?with_signed_urls=true`` cada CV da página
+        inclui ``signed_url`` e ``expires_in_seconds`` (gerados em lote, com
+        registo de auditoria para cada CV).
+        """
+        response = super().list(request, *args, **kwargs)
+
+        if request.query_params.get('with_signed_urls', '').lower() != 'true':
+            return response
+
+        items = response.data.get('results') if isinstance(response.data, dict) else response.data
+        ids = [item['id'] for item in items]
+        if not ids:
+            return response
+
+        curriculos = self.get_queryset().filter(id__in=ids)
+        signed_urls = CVService().get_signed_urls_for_curriculos(
+            curriculos, request.user_id, request.role
+        )
+
+        for item in items:
+            signed_url, expires_in = signed_urls.get(item['id'], (None, None))
+            item['signed_url'] = signed_url
+            item['expires_in_seconds'] = expires_in
+
+        return response
+
+    def _duplicate_cv_response(self, duplicate):
+        """
+        Response 409 para um ficheiro idêntico a um CV já submetido pelo estudante.
+
+        Só CVs pendentes ou aprovados podem ser duplicados: os rejeitados são
+        eliminados na review, com o respetivo hash.
+        """
+        messages = {
+            Curriculo.CV_STATUS_PENDING: "Este ficheiro é idêntico ao CV pendente de validação.",
+            Curriculo.CV_STATUS_APPROVED: "Este ficheiro é idêntico ao CV aprovado atual.",
+        }
+        return Response(
+            {
+                "detail": messages.get(duplicate.status, "Este ficheiro já foi submetido."),
+                "duplicate_of": duplicate.id,
+                "status": duplicate.status,
+            },
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    def _create_pending_cv(self, estudante, user_id, file_path, cv_aprovado, storage_service, bucket_name, file_sha256=None):
+        """
+        Regista um CV pendente para um ficheiro já guardado no storage.
+
+        Em caso de erro na BD o ficheiro é removido do storage (rollback).
+        Devolve a Response 201 (ou 500) a enviar ao cliente.
+        """
+        try:
+            with transaction.atomic():
+                curriculo = Curriculo.objects.create(
+                    estudante_utilizador_auth_user_supabase_field=estudante,
+                    file=file_path,
+                    file_sha256=file_sha256,
+                    status=Curriculo.CV_STATUS_PENDING,
+                    creation_date=timezone.now().date(),
+                )
+                schedule_indexing(curriculo.id)
+                
+                logger.info(
+                    "Novo CV submetido para estudante %s (curriculo_id=%s, tem_cv_aprovado=%s)",
+                    user_id, curriculo.id, cv_aprovado is not None
+                )
+                message = "CV submetido com sucesso. Aguarda validação."
+                if cv_aprovado:
+                    message = "Novo CV submetido. O CV aprovado atual mantém-se ativo até o novo ser aprovado."
+                    
+        except Exception as e:
+            if isinstance(e, IntegrityError) and Curriculo.objects.filter(file=file_path).exists():
+                # finalize concorrente do mesmo upload: o ficheiro pertence ao CV já criado
+                return Response(
+                    {"detail": "Este upload já foi finalizado."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            logger.error("Erro ao registar CV para estudante %s: %s", user_id, str(e))
+            # rollback do storage
+            storage_service.delete_file(
+                bucket_name=bucket_name,
+                file_path=file_path,
+            )
+            return Response(
+                {"detail": "Erro ao registar CV"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        
+        return Response(
+            {
+                "id": curriculo.id,
+                "file": file_path,
+                "status": curriculo.status,
+                "creation_date": curriculo.creation_date,
+                "message": message,
+                "cv_aprovado_ativo": cv_aprovado.id if cv_aprovado else None,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def _create_spooled_cv(self, estudante, user_id, file, file_path, cv_aprovado, bucket_name):
+        """
+        Modo spool: guarda o PDF localmente, regista o CV pendente com um
+        CVUpload em estado ``uploading`` e agenda o envio para o storage.
+
+        Devolve a Response 202 (ou 500) a enviar ao cliente.
+        """
+        try:
+            spool_path = upload_spool.spool_file(file)
+        except OSError as e:
+            logger.error("Erro ao guardar CV no spool para estudante %s: %s", user_id, str(e))
+            return Response(
+                {"detail": "Erro ao registar CV"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        try:
+            with transaction.atomic():
+                curriculo = Curriculo.objects.create(
+                    estudante_utilizador_auth_user_supabase_field=estudante,
+                    file=file_path,
+                    file_sha256=getattr(file, "sha256", None),
+                    status=Curriculo.CV_STATUS_PENDING,
+                    creation_date=timezone.now().date(),
+                )
+                upload = CVUpload.objects.create(
+                    curriculo=curriculo,
+                    bucket=bucket_name,
+                    file_path=file_path,
+                    spool_path=spool_path,
+                )
+                # só depois do commit: o worker tem de ver o CVUpload
+                transaction.on_commit(lambda: upload_spool.schedule_upload(upload.id))
+        except Exception as e:
+            logger.error("Erro ao registar CV para estudante %s: %s", user_id, str(e))
+            upload_spool.discard_spool_file(spool_path)
+            return Response(
+                {"detail": "Erro ao registar CV"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        logger.info(
+            "Novo CV submetido (spool) para estudante %s (curriculo_id=%s, tem_cv_aprovado=%s)",
+            user_id, curriculo.id, cv_aprovado is not None
+        )
+        message = "CV recebido. O envio para o storage está em curso."
+        if cv_aprovado:
+            message = "Novo CV recebido. O CV aprovado atual mantém-se ativo até o novo ser aprovado."
+
+        return Response(
+            {
+                "id": curriculo.id,
+                "file": file_path,
+                "status": curriculo.status,
+                "upload_status": upload.status,
+                "creation_date": curriculo.creation_date,
+                "message": message,
+                "cv_aprovado_ativo": cv_aprovado.id if cv_aprovado else None,
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    def _get_submission_context(self, user_id):
+        """
+        Valida que o estudante pode submeter um novo CV.
+
+        Devolve (estudante, cv_aprovado, None) ou (None, None, Response de erro).
+        """
+        try:
+            estudante = Estudante.objects.get(
+                utilizador_auth_user_supabase_field=user_id
+            )
+        except Estudante.DoesNotExist:
+            return None, None, Response(
+                {"detail": "Perfil de estudante não encontrado."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # Validação de consentimento (C9)
+        if not estudante.share_aceites:
+            return None, None, Response(
+                {"detail": "Deves aceitar partilhar os dados para submeter o currículo."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if Curriculo.objects.filter(
+            estudante_utilizador_auth_user_supabase_field=estudante,
+            status=Curriculo.CV_STATUS_PENDING
+        ).exists():
+            return None, None, Response(
+                {"detail": "Já existe um CV pendente de validação. Aguarde a validação ou elimine o CV pendente antes de submeter um novo."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cv_aprovado = Curriculo.objects.filter(
+            estudante_utilizador_auth_user_supabase_field=estudante,
+            status=Curriculo.CV_STATUS_APPROVED
+        ).first()
+        return estudante, cv_aprovado, None
+
+    @action(detail=False, methods=['post'], url_path='me/upload-url')
+    def upload_url(self, request):
+        """
+        Fase 1 do upload direto: gera um URL assinado para o estudante enviar
+        o PDF diretamente ao Supabase Storage, sem passar pelo Django.
+
+        POST /curriculo/me/upload-url/
+
+        Retorna:
+        - signed_url: URL para PUT/POST do ficheiro
+        - upload_token: token a enviar em /curriculo/me/finalize-upload/
+        - max_size / content_type: restrições aplicadas na finalização
+        """
+        user_id = request.user_id
+        _, _, error = self._get_submission_context(user_id)
+        if error:
+            return error
+
+        file_path = f"estudante_{user_id}/cv_{uuid.uuid4().hex[:8]}.pdf"
+
+        try:
+            upload = get_storage_service().create_signed_upload_url(
+                bucket_name="cvs", file_path=file_path
+            )
+        except StorageSignedUrlException as e:
+            logger.error("Erro ao gerar URL de upload para estudante %s: %s", user_id, str(e))
+            return Response(
+                {"detail": "Erro ao gerar URL de upload."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        upload_token = signing.dumps(
+            {"path": file_path, "user": str(user_id)}, salt=CV_UPLOAD_SALT
+        )
+        return Response(
+            {
+                "file": file_path,
+                "signed_url": upload["signed_url"],
+                "token": upload["token"],
+                "upload_token": upload_token,
+                "max_size": settings.MAX_FILE_SIZE,
+                "content_type": settings.ALLOWED_MIME,
+                "expires_in_seconds": settings.CV_UPLOAD_URL_MAX_AGE,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=['post'], url_path='me/finalize-upload')
+    def finalize_upload(self, request):
+        """
+        Fase 2 do upload direto: confirma o ficheiro enviado e cria o CV pendente.
+
+        POST /curriculo/me/finalize-upload/
+        Body: {"upload_token": "..."}
+
+        Verifica que o objeto existe no storage, que não excede MAX_FILE_SIZE e
+        que o MIME é application/pdf; descarrega-o para confirmar os magic
+        bytes ``%PDF-`` e calcular o SHA-256 (deteção de duplicados, como no
+        upload multipart). Ficheiros inválidos ou duplicados são removidos.
+        """
+        user_id = request.user_id
+
+        try:
+            ticket = signing.loads(
+                request.data.get("upload_token", ""),
+                salt=CV_UPLOAD_SALT,
+                max_age=settings.CV_UPLOAD_URL_MAX_AGE,
+            )
+        except signing.BadSignature:
+            return Response(
+                {"detail": "upload_token inválido ou expirado."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if ticket.get("user") != str(user_id):
+            return Response(
+                {"detail": "upload_token não pertence a este utilizador."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        estudante, cv_aprovado, error = self._get_submission_context(user_id)
+        if error:
+            return error
+
+        storage_service = get_storage_service()
+        bucket_name = "cvs"
+        file_path = ticket["path"]
+
+        if Curriculo.objects.filter(file=file_path).exists():
+            return Response(
+                {"detail": "Este upload já foi finalizado."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            info = storage_service.get_file_info(bucket_name=bucket_name, file_path=file_path)
+        except StorageInfoException as e:
+            logger.error("Erro ao verificar upload do estudante %s: %s", user_id, str(e))
+            return Response(
+                {"detail": "Erro ao verificar o ficheiro no storage."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        if info is None:
+            return Response(
+                {"detail": "Ficheiro não encontrado no storage. Faça o upload antes de finalizar."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        invalid = None
+        if info["content_type"] != settings.ALLOWED_MIME:
+            invalid = "Apenas ficheiros PDF são permitidos."
+        elif info["size"] is None or info["size"] > settings.MAX_FILE_SIZE:
+            invalid = "O ficheiro excede o tamanho máximo de 5MB."
+
+        if invalid:
+            self._discard_direct_upload(storage_service, bucket_name, file_path)
+            return Response({"detail": invalid}, status=status.HTTP_400_BAD_REQUEST)
+
+        # o content-type é declarado pelo cliente: confirmar o conteúdo
+        try:
+            data = storage_service.download_file(bucket_name=bucket_name, file_path=file_path)
+        except StorageDownloadException as e:
+            logger.error("Erro ao ler upload do estudante %s: %s", user_id, str(e))
+            return Response(
+                {"detail": "Erro ao verificar o ficheiro no storage."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        if not data.startswith(PDF_MAGIC):
+            self._discard_direct_upload(storage_service, bucket_name, file_path)
+            return Response(
+                {"detail": "Apenas ficheiros PDF são permitidos."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        file_sha256 = hashlib.sha256(data).hexdigest()
+        duplicate = CVService().find_duplicate_cv(estudante, file_sha256)
+        if duplicate:
+            self._discard_direct_upload(storage_service, bucket_name, file_path)
+            return self._duplicate_cv_response(duplicate)
+
+        return self._create_pending_cv(
+            estudante, user_id, file_path, cv_aprovado, storage_service, bucket_name,
+            file_sha256=file_sha256,
+        )
+
+    def _discard_direct_upload(self, storage_service, bucket_name, file_path):
+        """Remove do storage um upload direto rejeitado no finalize."""
+        try:
+            storage_service.delete_file(bucket_name=bucket_name, file_path=file_path)
+        except Exception as e:
+            logger.warning("Erro ao remover upload inválido %s: %s", file_path, str(e))
+
+    @action(detail=False, methods=['get'], url_path=r'me/upload-status/(?P<curriculo_id>\d+)')
+    def upload_status(self, request, curriculo_id=None):
+        """
+        Estado do envio para o storage de um CV submetido em modo spool.
+
+        GET /curriculo/me/upload-status/{id}/
+
+        Retorna:
+        - upload_status: "uploading", "done" ou "failed"
+        - attempts: tentativas de envio já feitas
+        CVs enviados de forma síncrona (sem spool) são reportados como "done".
+        """
+        curriculo = Curriculo.objects.filter(
+            id=curriculo_id,
+            estudante_utilizador_auth_user_supabase_field=request.user_id,
+        ).select_related('upload').first()
+        if curriculo is None:
+            return Response(
+                {"detail": "CV não encontrado."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            upload = curriculo.upload
+        except CVUpload.DoesNotExist:
+            upload = None
+
+        return Response(
+            {
+                "id": curriculo.id,
+                "upload_status": upload.status if upload else CVUpload.STATUS_DONE,
+                "attempts": upload.attempts if upload else None,
+                "updated_at": upload.updated_at if upload else None,
+            },
+            status=status.HTTP_200_OK,
+        )
+
     @action(detail=False, methods=['get', 'post', 'delete'], url_path='me')
     def get_my_cv(self, request):
         
@@ -151,28 +641,37 @@ class CurriculoViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
+            # validação em streaming: tamanho e magic bytes verificados
+            # durante a leitura do corpo, antes de o pedido ser lido por inteiro
+            upload_handler = CVUploadHandler(request._request)
+            request._request.upload_handlers = [upload_handler]
             file = request.FILES.get("cv")
 
-            # validação do ficheiro
-            if not file:
+            if upload_handler.rejection == CVUploadHandler.REJECT_NOT_PDF:
                 return Response(
-                    {"detail": "Ficheiro de currículo é obrigatório."},
+                    {"detail": "Apenas ficheiros PDF são permitidos."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            if file.content_type != settings.ALLOWED_MIME:
+            # validação de tamanho
+            if upload_handler.rejection == CVUploadHandler.REJECT_TOO_LARGE:
                 return Response(
-                    {"detail": "Apenas ficheiros PDF são permitidos."},
+                    {"detail": "O ficheiro excede o tamanho máximo de 5MB."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
- 
-            # validação de tamanho
-            if file.size > settings.MAX_FILE_SIZE:
+
+            # validação do ficheiro
+            if not file:
                 return Response(
-                    {"detail": "O ficheiro excede o tamanho máximo de 5MB."},
+                    {"detail": "Ficheiro de currículo é obrigatório."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
+            # deduplicação: resubmissão do mesmo PDF não gera novo upload nem CV
+            duplicate = CVService().find_duplicate_cv(estudante, file.sha256)
+            if duplicate:
+                return self._duplicate_cv_response(duplicate)
+
             # Verificar CVs existentes do estudante
             cv_aprovado = Curriculo.objects.filter(
                 estudante_utilizador_auth_user_supabase_field=estudante,
@@ -192,16 +691,19 @@ class CurriculoViewSet(viewsets.ModelViewSet):
                 )
 
             # upload para Supabase
-            storage_service = SupabaseStorageService()
+            storage_service = get_storage_service()
             bucket_name = "cvs"
             
             # Gerar path único para novo CV
-            import uuid
             unique_id = uuid.uuid4().hex[:8]
             file_path = f"estudante_{user_id}/cv_{unique_id}.pdf"
 
+            if settings.CV_UPLOAD_SPOOL_ENABLED:
+                return self._create_spooled_cv(
+                    estudante, user_id, file, file_path, cv_aprovado, bucket_name
+                )
+
             try:
-                file.seek(0)
                 storage_service.upload_file(
                     file=file,
                     bucket_name=bucket_name,
@@ -215,45 +717,9 @@ class CurriculoViewSet(viewsets.ModelViewSet):
                 )
 
             # Criar novo CV pendente
-            try:
-                with transaction.atomic():
-                    curriculo = Curriculo.objects.create(
-                        estudante_utilizador_auth_user_supabase_field=estudante,
-                        file=file_path,
-                        status=Curriculo.CV_STATUS_PENDING,
-                        creation_date=timezone.now().date(),
-                    )
-                    
-                    logger.info(
-                        "Novo CV submetido para estudante %s (curriculo_id=%s, tem_cv_aprovado=%s)",
-                        user_id, curriculo.id, cv_aprovado is not None
-                    )
-                    message = "CV submetido com sucesso. Aguarda validação."
-                    if cv_aprovado:
-                        message = "Novo CV submetido. O CV aprovado atual mantém-se ativo até o novo ser aprovado."
-                        
-            except Exception as e:
-                logger.error("Erro ao registar CV para estudante %s: %s", user_id, str(e))
-                # rollback do storage
-                storage_service.delete_file(
-                    bucket_name=bucket_name,
-                    file_path=file_path,
-                )
-                return Response(
-                    {"detail": "Erro ao registar CV"},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
-            
-            return Response(
-                {
-                    "id": curriculo.id,
-                    "file": file_path,
-                    "status": curriculo.status,
-                    "creation_date": curriculo.creation_date,
-                    "message": message,
-                    "cv_aprovado_ativo": cv_aprovado.id if cv_aprovado else None,
-                },
-                status=status.HTTP_201_CREATED,
+            return self._create_pending_cv(
+                estudante, user_id, file_path, cv_aprovado, storage_service, bucket_name,
+                file_sha256=file.sha256,
             )
         # GET e DELETE - Buscar CVs do estudante
         cv_aprovado = Curriculo.objects.filter(
@@ -308,26 +774,18 @@ class CurriculoViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            storage_service = SupabaseStorageService()
-            bucket_name = "cvs"
-            file_path = curriculo.file
-
-            # tentar remover do storage (se existir)
-            try:
-                if file_path:
-                    storage_service.delete_file(
-                        bucket_name=bucket_name,
-                        file_path=file_path,
-                    )
-            except Exception:
-                return Response(
-                    {"detail": "Erro ao remover o currículo do storage."},
-                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
-                )
+            # descartar cópia local de um envio em modo spool ainda por concluir
+            spool_path = CVUpload.objects.filter(
+                curriculo=curriculo
+            ).exclude(status=CVUpload.STATUS_DONE).values_list('spool_path', flat=True).first()
+            if spool_path:
+                upload_spool.discard_spool_file(spool_path)
 
-            # remover registo do BD
+            # remover registo do BD; o ficheiro é removido do storage após o commit (outbox)
             logger.info("CV removido pelo estudante %s (curriculo_id=%s)", user_id, curriculo.id)
-            self.perform_destroy(curriculo)
+            with transaction.atomic():
+                enqueue_deletion("cvs", curriculo.file)
+                self.perform_destroy(curriculo)
             return Response(
                 {"message": "Currículo eliminado com sucesso."},
                 status=status.HTTP_204_NO_CONTENT
@@ -345,8 +803,9 @@ class CurriculoViewSet(viewsets.ModelViewSet):
         if cv_aprovado:
             serializer = self.get_serializer(cv_aprovado)
             cv_data = serializer.data
-            cv_data['signed_url'] = cv_service.get_signed_url_for_curriculo(cv_aprovado, user_id, request.role)
-            cv_data['expires_in_seconds'] = 900
+            signed_url, expires_in = cv_service.get_signed_url_with_expiry(cv_aprovado, user_id, request.role)
+            cv_data['signed_url'] = signed_url
+            cv_data['expires_in_seconds'] = expires_in
             cv_data['message'] = "CV aprovado e ativo."
             response_data['cv_aprovado'] = cv_data
         
@@ -354,6 +813,9 @@ class CurriculoViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(cv_pendente)
             cv_data = serializer.data
             cv_data['message'] = "CV pendente de validação."
+            cv_data['upload_status'] = CVUpload.objects.filter(
+                curriculo=cv_pendente
+            ).values_list('status', flat=True).first() or CVUpload.STATUS_DONE
             response_data['cv_pendente'] = cv_data
         
         if cv_rejeitado and not cv_aprovado and not cv_pendente:
@@ -365,6 +827,36 @@ class CurriculoViewSet(viewsets.ModelViewSet):
         
         return Response(response_data, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['get'], url_path='thumbnail')
+    def thumbnail(self, request, pk=None):
+        """
+        Pré-visualização (primeira página, WebP) de um CV.
+
+        GET /curriculo/{id}/thumbnail/
+
+        O ficheiro de um Curriculo nunca muda, por isso a imagem é servida com
+        cache longa (Cache-Control immutable) e ETag; pedidos com
+        If-None-Match respondem 304 sem ler a imagem.
+        """
+        curriculo = self.get_object()
+        preview = CVPreview.objects.filter(curriculo=curriculo).only('thumbnail_etag').first()
+        if preview is None or not preview.thumbnail_etag:
+            return Response(
+                {"detail": "Pré-visualização ainda não disponível."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        etag = f'"{preview.thumbnail_etag}"'
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            image = CVPreview.objects.filter(pk=preview.pk).values_list('thumbnail', flat=True).first()
+            response = HttpResponse(bytes(image), content_type="image/webp")
+        response['ETag'] = etag
+        # private: o conteúdo depende das permissões do utilizador
+        response['Cache-Control'] = f"private, max-age={settings.CV_THUMBNAIL_MAX_AGE}, immutable"
+        return response
+
     @action(detail=True, methods=['get'], url_path='view')
     def view_cv(self, request, pk=None):
         """
@@ -379,7 +871,8 @@ class CurriculoViewSet(viewsets.ModelViewSet):
         
         Retorna:
         - JSON com signed_url + metadata do CV
-        - URL válida por 15 minutos (900 segundos)
+        - URL válida por 15 minutos (900 segundos); URLs em cache são
+          reutilizadas e expires_in_seconds indica o tempo restante
         
         """
         try:
@@ -394,7 +887,16 @@ class CurriculoViewSet(viewsets.ModelViewSet):
         user_id = request.user_id
         user_role = request.role
         
-        # Validar permissões baseado na role
+        forbidden = self._view_forbidden_response(curriculo, user_role)
+        if forbidden is not None:
+            return forbidden
+        
+        # Gerar response com signed URL via service
+        cv_service = CVService()
+        return cv_service.generate_signed_url_response(curriculo, user_id, user_role)
+
+    def _view_forbidden_response(self, curriculo, user_role):
+        """Response 403 se ``user_role`` não pode visualizar o CV, ou None."""
         if user_role == 2:  # Estudante
             # Estudante deve usar /me/ para seu CV
             return Response(
@@ -421,10 +923,100 @@ class CurriculoViewSet(viewsets.ModelViewSet):
                 {"detail": "Role não reconhecido."},
                 status=status.HTTP_403_FORBIDDEN
             )
-        
-        # Gerar response com signed URL via service
-        cv_service = CVService()
-        return cv_service.generate_signed_url_response(curriculo, user_id, user_role)
+        return None
+
+    @action(detail=True, methods=['get'], url_path='file')
+    def cv_file(self, request, pk=None):
+        """
+        PDF de um CV servido pelo próprio serviço, a partir da cache local em disco.
+
+        GET /curriculo/{id}/file/  (requer CV_FILE_CACHE_ENABLED)
+
+        Permissões iguais a /curriculo/{id}/view/. Suporta Range (206),
+        ETag pelo SHA-256 do conteúdo (If-None-Match -> 304) e envio com
+        sendfile. Num miss o ficheiro é descarregado do storage uma vez.
+
+        Cada visualização é registada no histórico de acessos; pedidos
+        byte-range que não começam no início do ficheiro (continuação da
+        mesma leitura) não são registados.
+        """
+        if not settings.CV_FILE_CACHE_ENABLED:
+            raise Http404
+
+        curriculo = self.get_object()
+        forbidden = self._view_forbidden_response(curriculo, request.role)
+        if forbidden is not None:
+            return forbidden
+
+        range_header = request.headers.get('Range', '').replace(' ', '')
+        log_access = not range_header or range_header.startswith('bytes=0-')
+
+        try:
+            file, content_hash = CVService().open_cv_file(
+                curriculo, request.user_id, request.role, log_access=log_access
+            )
+        except StorageDownloadException as e:
+            logger.warning("[CVFileCache] Falha ao obter curriculo_id=%s: %s", curriculo.id, e)
+            return Response(
+                {"detail": "Erro ao obter o ficheiro do CV."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        response = ranged_file_response(
+            request, file, settings.ALLOWED_MIME,
+            etag=f'"{content_hash}"', filename=os.path.basename(curriculo.file),
+        )
+        # o conteúdo de um CV pode mudar (e.g. linearização): revalidar sempre
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='view-bulk')
+    def view_bulk(self, request):
+        """
+        Visualização de vários CVs com URLs assinadas num único pedido.
+
+        POST /curriculo/view-bulk/
+        Body: {"ids": [1, 2, 3]}  (máximo 100)
+
+        Permissões:
+        - Empresa: apenas CVs aprovados (status = 1); os restantes vêm em not_found
+        - CR: todos os CVs
+
+        Retorna:
+        - results: lista com signed_url + metadata de cada CV
+        - not_found: ids inexistentes, não autorizados ou sem URL disponível
+        """
+        serializer = CVBulkViewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+
+        # get_queryset aplica a restrição status=1 para empresas
+        curriculos = list(self.get_queryset().filter(id__in=ids))
+        signed_urls = CVService().get_signed_urls_for_curriculos(
+            curriculos, request.user_id, request.role
+        )
+
+        results = []
+        for curriculo in curriculos:
+            if curriculo.id not in signed_urls:
+                continue
+            signed_url, expires_in = signed_urls[curriculo.id]
+            results.append(CVSignedUrlSerializer({
+                "id": curriculo.id,
+                "signed_url": signed_url,
+                "status": curriculo.status,
+                "validated_date": curriculo.validated_date,
+                "expires_in_seconds": expires_in,
+            }).data)
+
+        found = {item["id"] for item in results}
+        return Response(
+            {
+                "results": results,
+                "not_found": [cv_id for cv_id in ids if cv_id not in found],
+            },
+            status=status.HTTP_200_OK,
+        )
 
     @action(detail=True, methods=['get'], url_path='access-history')
     def access_history(self, request, pk=None):
@@ -439,6 +1031,9 @@ class CurriculoViewSet(viewsets.ModelViewSet):
         Query params:
         - page: Número da página (padrão: 1)
         - page_size: Número de registos por página (padrão: 50, máximo: 100)
+        - accessed_after: Apenas acessos a partir desta data (YYYY-MM-DD); a
+          consulta lê só as partições mensais desse período
+        - pagination=cursor: paginação por cursor (sem OFFSET nem COUNT)
         
         Retorna:
         - JSON com lista paginada de acessos ao CV
@@ -464,6 +1059,20 @@ class CurriculoViewSet(viewsets.ModelViewSet):
         access_logs = CVAccessLog.objects.filter(
             curriculo=curriculo
         ).order_by('-accessed_at')
+
+        accessed_after = request.query_params.get('accessed_after')
+        if accessed_after:
+            try:
+                since = datetime.date.fromisoformat(accessed_after)
+            except ValueError:
+                return Response(
+                    {"detail": "accessed_after deve estar no formato YYYY-MM-DD."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            # comparação direta com a coluna para o Postgres excluir partições
+            access_logs = access_logs.filter(
+                accessed_at__gte=timezone.make_aware(datetime.datetime.combine(since, datetime.time.min))
+            )
         
         # Aplicar paginação
         paginator = AccessHistoryPagination()
@@ -477,6 +1086,117 @@ class CurriculoViewSet(viewsets.ModelViewSet):
         serializer = CVAccessLogSerializer(access_logs, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def _daily_views(self, request, curriculo_id):
+        """
+        Visualizações por dia dos últimos ``?days=`` dias (padrão 30, máximo 366).
+
+        Devolve (queryset, None) ou (None, Response de erro).
+        """
+        try:
+            days = int(request.query_params.get('days', VIEW_STATS_DEFAULT_DAYS))
+        except ValueError:
+            days = 0
+        if not 1 <= days <= VIEW_STATS_MAX_DAYS:
+            return None, Response(
+                {"detail": f"days deve ser um inteiro entre 1 e {VIEW_STATS_MAX_DAYS}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        since = timezone.localdate() - datetime.timedelta(days=days - 1)
+        return CVDailyViews.objects.filter(curriculo_id=curriculo_id, day__gte=since).order_by('day'), None
+
+    @action(detail=True, methods=['get'], url_path='view-stats')
+    def view_stats(self, request, pk=None):
+        """
+        Contagens de visualizações de um CV (CR only).
+
+        GET /curriculo/{id}/view-stats/
+
+        Lê apenas as tabelas de rollup (cv_view_stats, cv_daily_views), com
+        custo constante independentemente do volume do histórico de acessos.
+
+        Query params:
+        - days: Dias de visualizações diárias devolvidos (padrão: 30, máximo: 366)
+        """
+        curriculo = self.get_object()
+        daily, error = self._daily_views(request, curriculo.id)
+        if error is not None:
+            return error
+
+        stats = CVViewStats.objects.filter(curriculo=curriculo).first() or CVViewStats(curriculo=curriculo)
+        return Response({
+            "curriculo_id": curriculo.id,
+            "views": stats.views,
+            "company_views": stats.company_views,
+            "unique_companies": stats.unique_companies,
+            "last_viewed_at": stats.last_viewed_at,
+            "daily": CVDailyViewsSerializer(daily, many=True).data,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'], url_path='viewers')
+    def viewers(self, request, pk=None):
+        """
+        Visualizações de um CV por utilizador (CR only).
+
+        GET /curriculo/{id}/viewers/
+
+        Query params:
+        - page, page_size: como em /access-history/
+        - role: Apenas utilizadores deste role (0 = CR, 1 = Empresa)
+
+        Ordenado por last_viewed_at DESC.
+        """
+        curriculo = self.get_object()
+        viewer_stats = CVViewerStats.objects.filter(curriculo=curriculo).order_by('-last_viewed_at')
+
+        role = request.query_params.get('role')
+        if role is not None:
+            if role not in ('0', '1'):
+                return Response(
+                    {"detail": "role deve ser 0 (CR) ou 1 (Empresa)."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            viewer_stats = viewer_stats.filter(viewer_role=int(role))
+
+        paginator = ViewerStatsPagination()
+        page = paginator.paginate_queryset(viewer_stats, request)
+        return paginator.get_paginated_response(CVViewerStatsSerializer(page, many=True).data)
+
+    @action(detail=False, methods=['get'], url_path='me/view-stats')
+    def my_view_stats(self, request):
+        """
+        Visualizações do CV aprovado do estudante por empresas.
+
+        GET /curriculo/me/view-stats/
+
+        Não identifica as empresas nem conta os acessos de CRs.
+
+        Query params:
+        - days: Dias de visualizações diárias devolvidos (padrão: 30, máximo: 366)
+        """
+        curriculo = Curriculo.objects.filter(
+            estudante_utilizador_auth_user_supabase_field=request.user_id,
+            status=Curriculo.CV_STATUS_APPROVED
+        ).first()
+        if curriculo is None:
+            return Response(
+                {"detail": "Não existe CV aprovado."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        daily, error = self._daily_views(request, curriculo.id)
+        if error is not None:
+            return error
+
+        stats = CVViewStats.objects.filter(curriculo=curriculo).first() or CVViewStats(curriculo=curriculo)
+        return Response({
+            "curriculo_id": curriculo.id,
+            "views": stats.company_views,
+            "unique_companies": stats.unique_companies,
+            "daily": [
+                {"day": day, "views": views}
+                for day, views in daily.values_list('day', 'company_views')
+            ],
+        }, status=status.HTTP_200_OK)
+
     @action(detail=True,methods=["post"],url_path="review",permission_classes=[IsCR])
     def review(self, request, pk=None):
         """
@@ -626,6 +1346,7 @@ class VagaViewSet(viewsets.ModelViewSet):
     Paginação:
     - page: número da página (default: 1)
     - page_size: itens por página (default: 20)
+    - pagination=cursor: paginação por cursor (keyset), ver service.pagination
     
     Ordenação:
     - Ordenado por id ascendente por padrão
@@ -661,11 +1382,12 @@ class VagaViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class NotificationPagination(PageNumberPagination):
+class NotificationPagination(CursorModePagination):
     """Paginação para listagem de notificações - 20 por página."""
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+    cursor_ordering = '-created_at'
 
 
 
@@ -696,6 +1418,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     Paginação:
         - page: número da página (default: 1)
         - page_size: registos por página (default: 20, máximo: 100)
+        - pagination=cursor: paginação por cursor (keyset), ver service.pagination
     """
 
     permission_classes = [IsStudentOrCR]
@@ -703,7 +1426,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_class = NotificationFilterSet
     ordering_fields = ['created_at', 'updated_at', 'type', 'status']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
     http_method_names = ['get', 'patch', 'head', 'options']
 
     def get_serializer_class(self):